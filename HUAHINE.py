@@ -1,60 +1,238 @@
 import asyncio
-import csv
 import os
 import subprocess
 import sys
+import threading
 import webbrowser
+import numpy as np
 import qasync
-import ctypes
 
 from quart import Quart
 from quart import jsonify, render_template
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtWidgets import QTableView, QMessageBox, QFileDialog
-from PyQt5.QtWidgets import QMainWindow, QAbstractItemView
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QMainWindow, QAbstractItemView, QProgressDialog, QAction, QInputDialog
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLineEdit, QLabel
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
 from PyQt5 import uic
 from PyQt5.QtGui import QIcon
 
 # Import des packages personnalisés
-from Package.CAN_dll import CANDll
+from Package.constante import SOCKETCAN_CANAL, SIMULATION_TRAMES_S, FILTRE_ECHANTILLON
+from Package.constante import TABLE_RAFRAICHISSEMENT_HZ, TABLE_CACHE_LIGNES, TABLE_FICHIER_BLOC, TABLE_FICHIER_BLOCS
 from Package.TempsReel import TempsReel
-from Package.NMEA_2000 import NMEA2000
-from Package.CANApplication import CANApplication
+from Package.NMEA_2000 import NMEA2000, CACHE_DECODAGE
+from Package.ExportNMEA import exporter_csv_parallele, lots_trames
+from Package.ExportColonnes import exporter_npz
+from Package.BaseSQLite import BaseSQLite, exporter_sqlite
+from Package.JournalBinaire import TRAME, est_binaire, lire_binaire, tableau_lot
+from Package.IndexLignes import IndexLignes
+from Package.CANApplication import CANApplication, autoriser_veille
+from Package.InterfacesCAN import INTERFACES
+from Package.FiltreCAN import PlanFiltre, MODES_FILTRE, plan_mode
+from Package.IndexTrames import IndexTrames, index_fichier, lire_criteres, texte_criteres
+
+TRAME_VIDE = ("", "", "")
+
+# Colonnes de la table : les trois premières viennent de la trame, les suivantes du décodage NMEA 2000 (en option).
+ENTETES = ("ID", "Len", "Datas", "PGN", "Source", "Valeurs")
+COLONNES_TRAME = 3
+
+
+# Fonction qui retourne une colonne décodée (PGN, Source ou Valeurs) d'une ligne (ID, Len, Datas) de la table. ---------
+# Le décodage est gardé par (identifiant, octets) : une trame déjà vue n'est pas décodée à nouveau.
+def colonne_decodee(ligne, colonne):
+    try:
+        decodage = CACHE_DECODAGE.texte(int(ligne[0], 16), bytes.fromhex(ligne[2]))
+    except ValueError:
+        return None
+    pgn, source, valeurs = decodage
+    return (str(pgn), str(source), valeurs)[colonne - COLONNES_TRAME]
+
 
 # ********************************** CLASSE MODELE DE LA TABLE *********************************************************
 # Cette classe sert de modèle à la table incluse dans MainWindow().
 class TableModel(QAbstractTableModel):
-    def __init__(self, buffer, buffer_index, buffer_capacity):
+    def __init__(self, buffer_capacity, rafraichissement_hz=TABLE_RAFRAICHISSEMENT_HZ, taille_cache=TABLE_CACHE_LIGNES):
         """
         Initialise le modèle avec le buffer circulaire.
+        Les trames sont gardées dans un tableau "TRAME" (20 octets par trame), mises en texte seulement à l'affichage.
         """
         super().__init__()
-        self._buffer_count = 0
-        self._buffer = buffer
-        self._buffer_index = buffer_index
         self._buffer_capacity = buffer_capacity
-        self._row_count = 0  # Nombre réel de lignes dans le buffer.
-        self._model = None  # Par exemple, initialisez avec un modèle qui sera défini plus tard
+        self._buffer = np.zeros(buffer_capacity, dtype=TRAME)
+        self._ecrites = 0           # Trames ajoutées depuis le début : la case est ce numéro modulo la capacité.
+
+        # Ce que la vue connaît : les lignes annoncées et le nombre de trames ajoutées à la dernière mise à jour.
+        self._row_count = 0
+        self._ecrites_affiche = 0
+
+        # Lignes mises en texte, par numéro de trame, de la moins récemment affichée à la plus récente.
+        self._taille_cache = taille_cache
+        self._lignes = {}
+
+        # Index PGN, source et destination des trames du buffer, complété à chaque rafraîchissement.
+        # Avec un filtre, "_selection" est la liste des numéros des trames affichées.
+        self._index = IndexTrames()
+        self.criteres = None
+        self._selection = None
+
+        # PGN, source et valeurs décodées en colonnes, pour les seules lignes affichées.
+        self.colonnes_decodees = False
+
+        # Les trames ajoutées sont annoncées à la vue au plus "rafraichissement_hz" fois par seconde.
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000 / rafraichissement_hz))
+        self._timer.timeout.connect(self.rafraichir)
 
     # ==================================== DEBUT DES METHODES DE LA TABLE ==============================================
-    # Méthode pour actualiser le buffer de la table. -------------------------------------------------------------------
-    def update_buffer(self, buffer, buffer_index, row_count):
+    # Méthode pour ajouter un tableau de trames (champs ID, TimeStamp, flags, len, data) au buffer. --------------------
+    # Le tableau est copié : il peut s'agir des cases de l'anneau de l'acquisition.
+    # La vue n'est prévenue qu'au prochain rafraîchissement.
+    def ajouter_lot(self, tableau):
+        nombre = len(tableau)
+        if not nombre:
+            return
+        if nombre > self._buffer_capacity:
+            # Seules les dernières trames restent dans le buffer.
+            self._ecrites += nombre - self._buffer_capacity
+            tableau = tableau[-self._buffer_capacity:]
+            nombre = self._buffer_capacity
+
+        debut = self._ecrites % self._buffer_capacity
+        premier = min(nombre, self._buffer_capacity - debut)
+        self._copier(tableau[:premier], debut)
+        if premier < nombre:
+            self._copier(tableau[premier:], 0)
+        self._ecrites += nombre
+        self._demarrer_timer()
+
+    def _copier(self, tableau, debut):
+        cases = self._buffer[debut:debut + len(tableau)]
+        for nom in TRAME.names:
+            cases[nom] = tableau[nom]
+
+    def _demarrer_timer(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    # Méthode qui indexe les trames ajoutées depuis la dernière fois, et oublie celles sorties du buffer. --------------
+    def _indexer(self):
+        debut = max(self._index.indexees, self._ecrites - self._buffer_capacity)
+        while debut < self._ecrites:
+            case = debut % self._buffer_capacity
+            fin = min(self._ecrites, debut + self._buffer_capacity - case)
+            self._index.ajouter_ids(self._buffer["ID"][case:case + fin - debut], np.arange(debut, fin))
+            debut = fin
+        if self._index.nombre > 2 * self._buffer_capacity:
+            self._index.purger(self._ecrites - self._buffer_capacity)
+
+    # Méthode qui retourne les numéros des trames entre "debut" et "fin" qui passent le filtre (None sans filtre). -----
+    def _chercher(self, debut, fin):
+        if self.criteres is None:
+            return None
+        return self._index.chercher(self.criteres, debut, fin)
+
+    # Méthode qui annonce à la vue les lignes retirées en haut et ajoutées en bas depuis la dernière fois. -------------
+    # La sélection et la position de défilement sont conservées, seules les nouvelles lignes sont lues par la vue.
+    def rafraichir(self):
+        nouvelles = self._ecrites - self._ecrites_affiche
+        if not nouvelles:
+            return
+        self._indexer()
+        premiere = max(0, self._ecrites - self._buffer_capacity)     # Première trame encore dans le buffer.
+
+        # Tout le buffer a été remplacé : rien à garder.
+        if nouvelles >= self._buffer_capacity:
+            self.beginResetModel()
+            self._selection = self._chercher(premiere, self._ecrites)
+            self._row_count = self._ecrites - premiere if self._selection is None else len(self._selection)
+            self._ecrites_affiche = self._ecrites
+            self._lignes.clear()
+            self.endResetModel()
+            return
+
+        # Avec un filtre, seules les trames trouvées dans l'index entrent ou sortent de la table.
+        if self._selection is None:
+            retirees = self._row_count + nouvelles - (self._ecrites - premiere)
+            trouvees = None
+            ajoutees = nouvelles
+        else:
+            retirees = int(np.searchsorted(self._selection, premiere))
+            trouvees = self._chercher(self._ecrites_affiche, self._ecrites)
+            ajoutees = len(trouvees)
+
+        # Les plus anciennes lignes sortent du buffer tournant.
+        if retirees > 0:
+            self.beginRemoveRows(QModelIndex(), 0, retirees - 1)
+            self._row_count -= retirees
+            if self._selection is not None:
+                self._selection = self._selection[retirees:]
+            self.endRemoveRows()
+
+        if not ajoutees:
+            self._ecrites_affiche = self._ecrites
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + ajoutees - 1)
+        self._row_count += ajoutees
+        if trouvees is not None:
+            self._selection = np.concatenate((self._selection, trouvees))
+        self._ecrites_affiche = self._ecrites
+        self.endInsertRows()
+
+    # Méthode qui n'affiche que les trames qui vérifient les critères ({"pgn": 129025, "source": 3}, None = toutes). ---
+    # Les trames sont cherchées dans l'index, sans parcourir le buffer.
+    def filtrer(self, criteres):
+        self._indexer()
         self.beginResetModel()
-        self._buffer = buffer
-        self._buffer_index = buffer_index
-        self._row_count = row_count
+        self.criteres = criteres or None
+        premiere = max(0, self._ecrites_affiche - self._buffer_capacity)
+        self._selection = self._chercher(premiere, self._ecrites_affiche)
+        self._row_count = self._ecrites_affiche - premiere if self._selection is None else len(self._selection)
         self.endResetModel()
 
+    # Méthode pour vider le buffer, avec une nouvelle capacité si elle est donnée. -------------------------------------
+    def vider(self, buffer_capacity=None):
+        self.beginResetModel()
+        self._timer.stop()
+        if buffer_capacity is not None:
+            self._buffer_capacity = buffer_capacity
+        self._buffer = np.zeros(self._buffer_capacity, dtype=TRAME)
+        self._ecrites = 0
+        self._row_count = 0
+        self._ecrites_affiche = 0
+        self._lignes.clear()
+        self._index = IndexTrames()
+        self._selection = None if self.criteres is None else self._index.chercher(self.criteres)
+        self.endResetModel()
+
+    # Méthode qui retourne le numéro de trame d'une ligne de la vue. ---------------------------------------------------
+    def numero(self, logical_row):
+        if self._selection is not None:
+            return int(self._selection[logical_row])
+        return self._ecrites_affiche - self._row_count + logical_row
+
     # Méthode pour récupérer l'index du buffer. ------------------------------------------------------------------------
     def get_real_index(self, logical_row):
-        return (self._buffer_index - self._buffer_count + logical_row) % self._buffer_capacity
+        return self.numero(logical_row) % self._buffer_capacity
 
-
-    # Méthode pour récupéper la ligne en cours. ------------------------------------------------------------------------
+    # Méthode pour récupéper la ligne en cours : (ID, Len, Datas) en texte. --------------------------------------------
     def get_row_data(self, row):
-        real_index = self.get_real_index(row)
-        return self._buffer[real_index]
+        numero = self.numero(row)
+        ligne = self._lignes.pop(numero, None)
+        if ligne is None:
+            if numero < self._ecrites - self._buffer_capacity:
+                # Case déjà réécrite par une trame pas encore annoncée : la ligne sort au prochain rafraîchissement.
+                return TRAME_VIDE
+            trame = self._buffer[numero % self._buffer_capacity]
+            longueur = int(trame["len"])
+            ligne = (f"{int(trame['ID']):08X}", str(longueur),
+                     trame["data"][:min(longueur, 8)].tobytes().hex(' ').upper())
+            if len(self._lignes) >= self._taille_cache:
+                del self._lignes[next(iter(self._lignes))]
+        self._lignes[numero] = ligne
+        return ligne
 
     # Méthode pour retourner le nombre de lignes. ----------------------------------------------------------------------
     def rowCount(self, parent=None):
@@ -62,20 +240,34 @@ class TableModel(QAbstractTableModel):
 
     # Méthode pour retourner le nombre de colonnes. --------------------------------------------------------------------
     def columnCount(self, parent=None):
-        return 3
+        return len(ENTETES) if self.colonnes_decodees else COLONNES_TRAME
+
+    # Méthode pour ajouter ou retirer les colonnes décodées. -----------------------------------------------------------
+    def afficher_decodage(self, actif):
+        if actif == self.colonnes_decodees:
+            return
+        if actif:
+            self.beginInsertColumns(QModelIndex(), COLONNES_TRAME, len(ENTETES) - 1)
+            self.colonnes_decodees = True
+            self.endInsertColumns()
+        else:
+            self.beginRemoveColumns(QModelIndex(), COLONNES_TRAME, len(ENTETES) - 1)
+            self.colonnes_decodees = False
+            self.endRemoveColumns()
 
     # Méthode pour retourner la donnée de la trame. --------------------------------------------------------------------
     def data(self, index: QModelIndex, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
-            # Obtenir l'indice réel dans l'ordre FIFO (en respectant l'ordre haut vers bas)
-            real_index = self.get_real_index(index.row())
-            trame = self._buffer[real_index]
+            # La ligne n'est mise en texte que lorsque la vue la demande, puis gardée en cache.
+            trame = self.get_row_data(index.row())
 
             # Vérifier si la trame est valide (ne pas afficher les valeurs vides par défaut)
-            if trame == ("", "", ""):
+            if trame == TRAME_VIDE:
                 return None
 
             # Retourner la donnée de la colonne correspondante
+            if index.column() >= COLONNES_TRAME:
+                return colonne_decodee(trame, index.column())
             return trame[index.column()]
 
         return None
@@ -84,14 +276,179 @@ class TableModel(QAbstractTableModel):
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                headers = ["ID", "Len", "Datas"]
-                return headers[section]
+                return ENTETES[section]
             elif orientation == Qt.Vertical:
                 return str(section + 1)
         return None
 # ************************************ FIN DE LA CLASSE TableModel *****************************************************
 
 
+# Fonction qui met une ligne du fichier ("TimeStamp ID Len XX XX ...") au format de la table (ID, Len, Datas). ---------
+def ligne_table(ligne):
+    t = ligne.strip().split(' ')
+    return (t[1] if len(t) > 1 else '',         # 2e élément ID
+            t[2] if len(t) > 2 else '',         # 3e élément Len
+            ' '.join(t[3:]))                    # 4e élément Data avec join.
+
+
+# Fonction qui met un tableau "TRAME" au format de la table (ID, Len, Datas). ------------------------------------------
+def lignes_tableau(tableau):
+    datas = np.ascontiguousarray(tableau["data"]).tobytes()
+    return [(f"{id_msg:08X}", str(longueur), datas[8 * i:8 * i + min(longueur, 8)].hex(' ').upper())
+            for i, (id_msg, longueur) in enumerate(zip(tableau["ID"].tolist(), tableau["len"].tolist()))]
+
+
+# ********************************** CLASSE MODELE DU FICHIER **********************************************************
+# Modèle de la table qui parcourt tout un fichier (texte ou journal binaire) sans l'importer.
+# Le journal binaire est projeté en mémoire, le fichier texte est lu grâce à l'index des lignes (un seul seek par bloc).
+# Les lignes sont lues par blocs autour des lignes affichées, les derniers blocs lus sont gardés : la mémoire utilisée
+# ne dépend pas de la taille du fichier.
+# Avec un filtre, les lignes trouvées sont dispersées dans le fichier : elles sont lues une par une.
+class ModeleFichier(QAbstractTableModel):
+    def __init__(self, chemin, index_lignes=None, taille_bloc=TABLE_FICHIER_BLOC, nombre_blocs=TABLE_FICHIER_BLOCS,
+                 taille_cache=TABLE_CACHE_LIGNES):
+        super().__init__()
+        self.chemin = chemin
+        self._taille_bloc = taille_bloc
+        self._nombre_blocs = nombre_blocs
+        self._blocs = {}            # Numéro de bloc -> lignes (ID, Len, Datas), du moins récent au plus récent.
+        self._taille_cache = taille_cache
+        self._lignes = {}           # Numéro de ligne -> (ID, Len, Datas), pour les lignes lues une par une.
+        self._tableau = None        # Journal binaire projeté en mémoire.
+        self._index_lignes = None   # Index des lignes du fichier texte.
+        if est_binaire(chemin):
+            self._tableau = lire_binaire(chemin)
+        else:
+            self._index_lignes = index_lignes if index_lignes is not None else IndexLignes(chemin)
+        self._row_count = self._compter()
+
+        # Index PGN, source et destination de tout le fichier, construit au premier filtre.
+        self._index = None
+        self.criteres = None
+        self._selection = None
+
+        # PGN, source et valeurs décodées en colonnes, pour les seules lignes affichées.
+        self.colonnes_decodees = False
+
+    # Méthode qui retourne le nombre de lignes du fichier. -------------------------------------------------------------
+    def _compter(self):
+        if self._tableau is not None:
+            return len(self._tableau)
+        return self._index_lignes.nombre_lignes
+
+    # Méthode qui relit la taille du fichier, s'il grandit pendant un enregistrement. ----------------------------------
+    # L'index des lignes et celui du filtre ne lisent que les lignes ajoutées.
+    def actualiser(self):
+        self.beginResetModel()
+        try:
+            if self._tableau is not None:
+                self._tableau = lire_binaire(self.chemin)
+            else:
+                self._index_lignes.mettre_a_jour()
+            self._blocs.clear()
+            self._lignes.clear()
+            self._row_count = self._compter()
+            # Fichier plus court qu'avant (remplacé à la rotation de l'enregistrement) : l'index est à refaire.
+            if self._index is not None and self._row_count < self._index.indexees:
+                self._index = None
+            if self._index is not None or self.criteres is not None:
+                self._index = index_fichier(self.chemin, self._index_lignes, index=self._index)
+            if self.criteres is not None:
+                self._selection = self._index.chercher(self.criteres)
+                self._row_count = len(self._selection)
+        finally:
+            self.endResetModel()
+
+    # Méthode qui n'affiche que les lignes qui vérifient les critères ({"pgn": 129025, "source": 3}, None = toutes). ---
+    # L'index de tout le fichier est construit la première fois, les filtres suivants n'en lisent que les résultats.
+    def filtrer(self, criteres):
+        if criteres and self._index is None:
+            self._index = index_fichier(self.chemin, self._index_lignes)
+        self.beginResetModel()
+        self.criteres = criteres or None
+        self._selection = None if self.criteres is None else self._index.chercher(self.criteres)
+        self._row_count = self._compter() if self._selection is None else len(self._selection)
+        self.endResetModel()
+
+    # Méthode qui lit "nombre" lignes du fichier au format de la table. ------------------------------------------------
+    def _lire(self, debut, nombre):
+        if self._tableau is not None:
+            return lignes_tableau(self._tableau[debut:debut + nombre])
+        return [ligne_table(ligne) for ligne in self._index_lignes.iterer(debut, nombre)]
+
+    # Méthode qui retourne les lignes d'un bloc, lues dans le fichier si elles ne sont pas déjà en mémoire. ------------
+    def _bloc(self, numero):
+        lignes = self._blocs.pop(numero, None)
+        if lignes is None:
+            lignes = self._lire(numero * self._taille_bloc, self._taille_bloc)
+            if len(self._blocs) >= self._nombre_blocs:
+                del self._blocs[next(iter(self._blocs))]
+        self._blocs[numero] = lignes
+        return lignes
+
+    # Méthode qui retourne une ligne trouvée par le filtre, depuis son bloc s'il est en mémoire. -----------------------
+    def _ligne(self, numero):
+        lignes = self._blocs.get(numero // self._taille_bloc)
+        if lignes is not None:
+            return lignes[numero % self._taille_bloc]
+        ligne = self._lignes.pop(numero, None)
+        if ligne is None:
+            lignes = self._lire(numero, 1)
+            ligne = lignes[0] if lignes else TRAME_VIDE
+            if len(self._lignes) >= self._taille_cache:
+                del self._lignes[next(iter(self._lignes))]
+        self._lignes[numero] = ligne
+        return ligne
+
+    # Méthode qui retourne le numéro de ligne du fichier d'une ligne de la vue. ----------------------------------------
+    def numero(self, row):
+        return row if self._selection is None else int(self._selection[row])
+
+    # Méthode pour récupéper la ligne en cours. ------------------------------------------------------------------------
+    def get_row_data(self, row):
+        if self._selection is not None:
+            return self._ligne(int(self._selection[row]))
+        lignes = self._bloc(row // self._taille_bloc)
+        position = row % self._taille_bloc
+        return lignes[position] if position < len(lignes) else TRAME_VIDE
+
+    def rowCount(self, parent=None):
+        return self._row_count
+
+    def columnCount(self, parent=None):
+        return len(ENTETES) if self.colonnes_decodees else COLONNES_TRAME
+
+    # Méthode pour ajouter ou retirer les colonnes décodées. -----------------------------------------------------------
+    def afficher_decodage(self, actif):
+        if actif == self.colonnes_decodees:
+            return
+        if actif:
+            self.beginInsertColumns(QModelIndex(), COLONNES_TRAME, len(ENTETES) - 1)
+            self.colonnes_decodees = True
+            self.endInsertColumns()
+        else:
+            self.beginRemoveColumns(QModelIndex(), COLONNES_TRAME, len(ENTETES) - 1)
+            self.colonnes_decodees = False
+            self.endRemoveColumns()
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            ligne = self.get_row_data(index.row())
+            if index.column() >= COLONNES_TRAME:
+                return colonne_decodee(ligne, index.column()) if ligne != TRAME_VIDE else None
+            return ligne[index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return ENTETES[section]
+            elif orientation == Qt.Vertical:
+                return str(self.numero(section) + 1)
+        return None
+# ************************************ FIN DE LA CLASSE ModeleFichier **************************************************
+
+
 # ***************************************** FENETRE PRINCIAPALE ********************************************************
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -103,14 +460,13 @@ class MainWindow(QMainWindow):
         uic.loadUi('Alain.ui', self)
         self._fenetre_status = None
         self._file_path = None
+        self._colonnes_decodees = False     # PGN, source et valeurs décodées en colonnes de la table.
+        self._index_lignes = None   # Index des lignes du fichier texte, construit à la première lecture.
         self._can_interface = None
         self._handle = None
         self._status = None
         self._stop_flag = False
         self._fenetre_status = None
-        self._update_counter = 0
-        self._pending_updates = 0  # Compteur pour les mises à jour en attente
-        self._batch_update_threshold = 10  # Seuil pour les mises à jour en lot
 
         # Initialisation des attributs d'instance dans le constructeur
         self.loop = None  # La boucle asyncio sera définie plus loin.
@@ -123,7 +479,6 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(QIcon("icones/ps2.png"))
         self._temps_reel = TempsReel()
         self._nmea_2000 = NMEA2000(self)
-        self._can_interface = CANDll(self._stop_flag)
 
         # Instanciez CANApplication en lui passant les paramètres nécessaires
         self.can_interface_app = CANApplication(
@@ -147,16 +502,11 @@ class MainWindow(QMainWindow):
         # table_can
         self.table_can: QTableView = self.findChild(QTableView, "table_can")
 
-        # Variables pour le buffer tournant
+        # Capacité du buffer tournant, qui est dans le modèle de la table.
         self._buffer_capacity = int(self.line_table.text())
-        self._buffer_index = 0  # Position actuelle du buffer circulaire
-        self._buffer_count = 0  # Nombre d'éléments actuellement remplis
-
-        # Buffer initialisé avec des données vides.
-        self._buffer = [("", "", "")] * self._buffer_capacity
 
         # Instanciation de notre TableModel
-        self._model = TableModel(self._buffer, self._buffer_index, self._buffer_capacity)
+        self._model = TableModel(self._buffer_capacity)
         self.table_can.setModel(self._model)  # Lien entre le modèle et la table
 
 
@@ -164,14 +514,19 @@ class MainWindow(QMainWindow):
         self.table_can.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.table_can.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
 
-        self.table_can.setModel(self._model)
+        # Barre de filtre au-dessus de la table : "pgn=129025 source=3 dest=255", validée par Entrée.
+        self.barre_filtre = QWidget(self)
+        disposition = QHBoxLayout(self.barre_filtre)
+        disposition.setContentsMargins(0, 0, 0, 0)
+        self.line_filtre = QLineEdit(self.barre_filtre)
+        self.line_filtre.setPlaceholderText("Filtre : pgn=129025 source=3 dest=255")
+        self.lab_filtre = QLabel(self.barre_filtre)
+        disposition.addWidget(self.line_filtre)
+        disposition.addWidget(self.lab_filtre)
+        self.verticalLayout.insertWidget(0, self.barre_filtre)
+        self.line_filtre.returnPressed.connect(self.on_filtre_table)
 
-        # Configurer les largeurs des colonnes
-        self.configurer_colonnes()
-
-        # Défini la méthode sur changement de ligne sur la table.
-        # noinspection PyUnresolvedReferences
-        self.table_can.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.afficher_modele(self._model)
 
         # Appel des méthodes des objets widgets.
         self.check_file.stateChanged.connect(self.on_check_file_changed)
@@ -187,11 +542,52 @@ class MainWindow(QMainWindow):
         self.actionMap.triggered.connect(self.on_click_map)
         self.actionQuitter.triggered.connect(self.close_both)
 
+        # Base SQLite alimentée par le temps réel, ajoutée au menu Fichier.
+        self._base_sqlite = None
+        self.actionBase = QAction("Base SQLite en temps réel", self)
+        self.actionBase.setCheckable(True)
+        self.menuFichier.addAction(self.actionBase)
+        self.actionBase.triggered.connect(self.on_click_base)
+
+        # Parcours de tout le fichier ouvert dans la table, sans l'importer, ajouté au menu Fichier.
+        self._modele_fichier = None
+        self.actionParcourir = QAction("Parcourir le fichier dans la table", self)
+        self.actionParcourir.setCheckable(True)
+        self.menuFichier.addAction(self.actionParcourir)
+        self.actionParcourir.triggered.connect(self.on_click_parcourir)
+        self.actionActualiser = QAction("Actualiser le fichier parcouru", self)
+        self.actionActualiser.setShortcut("F5")
+        self.menuFichier.addAction(self.actionActualiser)
+        self.actionActualiser.triggered.connect(self.on_click_actualiser)
+
+        # Colonnes décodées (PGN, source, valeurs) dans la table, ajouté au menu Fichier.
+        self.actionDecodage = QAction("Colonnes décodées dans la table", self)
+        self.actionDecodage.setCheckable(True)
+        self.menuFichier.addAction(self.actionDecodage)
+        self.actionDecodage.triggered.connect(self.on_click_decodage)
+
+        # Rejeu d'un fichier enregistré à la place de l'adaptateur, ajouté au menu Bus CAN.
+        self.actionRejeu = QAction("Rejouer un fichier...", self)
+        self.menuBus_CAN.addAction(self.actionRejeu)
+        self.actionRejeu.triggered.connect(self.on_click_rejeu)
+
+        # Choix de l'interface du bus CAN (CANUSB, SocketCAN, Simulation), ajouté au menu Bus CAN.
+        self.actionInterface = QAction("Interface du bus CAN...", self)
+        self.menuBus_CAN.addAction(self.actionInterface)
+        self.actionInterface.triggered.connect(self.on_click_interface)
+
+        # Filtre des PGN voulus ("Carte seulement", "Instruments seulement"...), ajouté au menu Bus CAN.
+        self.actionFiltre = QAction("Filtre du bus CAN...", self)
+        self.menuBus_CAN.addAction(self.actionFiltre)
+        self.actionFiltre.triggered.connect(self.on_click_filtre)
+
         # Initialse les menus innacessibles.
         self.actionClose.setEnabled(False)
         self.actionRead.setEnabled(False)
         self.actionStop.setEnabled(False)
         self.actionImporter.setEnabled(False)
+        self.actionParcourir.setEnabled(False)
+        self.actionActualiser.setEnabled(False)
         self.actionVoir.setEnabled(False)
         self.actionExport.setEnabled(False)
 
@@ -200,11 +596,107 @@ class MainWindow(QMainWindow):
         return self._nmea_2000
 
     # ==================================== DEBUT DES METHODES LIEES A LA TABLE =========================================
+    # Méthode qui met un modèle (buffer tournant ou fichier) dans la table. --------------------------------------------
+    def afficher_modele(self, modele):
+        modele.afficher_decodage(self._colonnes_decodees)
+        self.table_can.setModel(modele)
+
+        # La barre de filtre montre le filtre du modèle affiché.
+        self.line_filtre.setText(texte_criteres(modele.criteres))
+        self.lab_filtre.setText("Filtrée" if modele.criteres else "")
+
+        # Configurer les largeurs des colonnes
+        self.configurer_colonnes()
+
+        # Défini la méthode sur changement de ligne sur la table (la sélection change avec le modèle).
+        # noinspection PyUnresolvedReferences
+        self.table_can.selectionModel().selectionChanged.connect(self.on_selection_changed)
+
+    # Méthode de la barre de filtre : seules les trames du PGN, de la source et de la destination voulus restent. ------
+    # Les trames sont trouvées dans les index du modèle (buffer tournant ou fichier), sans parcourir la table.
+    def on_filtre_table(self):
+        try:
+            criteres = lire_criteres(self.line_filtre.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Filtre de la table", str(e))
+            return
+
+        modele = self.table_can.model()
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            modele.filtrer(criteres)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible de filtrer la table : {e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        self.lab_filtre.setText(f"{modele.rowCount()} lignes" if criteres else "")
+        print(f"Filtre de la table : {texte_criteres(criteres) or 'aucun'}, {modele.rowCount()} lignes.")
+
+    # Méthode du menu "Colonnes décodées dans la table" : PGN, source et valeurs sans cliquer sur chaque ligne. --------
+    def on_click_decodage(self, coche):
+        self._colonnes_decodees = coche
+        self.table_can.model().afficher_decodage(coche)
+        self.configurer_colonnes()
+
+    # Méthode qui remet le buffer tournant dans la table, si elle parcourait un fichier. -------------------------------
+    def afficher_buffer(self):
+        self.actionParcourir.setChecked(False)
+        self.actionActualiser.setEnabled(False)
+        if self._modele_fichier is not None:
+            self._modele_fichier = None
+            self.afficher_modele(self._model)
+
+    # Méthode du menu "Parcourir le fichier dans la table" : tout le fichier, lu au fil du défilement. -----------------
+    def on_click_parcourir(self, coche):
+        if not coche:
+            self.afficher_buffer()
+            return
+        if not self._file_path:
+            self.actionParcourir.setChecked(False)
+            QMessageBox.information(self, "PARCOURIR LE FICHIER",
+                                    "Veuillez ouvrir un fichier avant de le parcourir dans la table.")
+            return
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            index = None if est_binaire(self._file_path) else self.index_lignes()
+            self._modele_fichier = ModeleFichier(self._file_path, index)
+            self.afficher_modele(self._modele_fichier)
+            self.actionActualiser.setEnabled(True)
+            print(f"Parcours de {self._file_path} : {self._modele_fichier.rowCount()} lignes.")
+        except (OSError, ValueError) as e:
+            self._modele_fichier = None
+            self.actionParcourir.setChecked(False)
+            QMessageBox.critical(self, "Erreur", f"Impossible de parcourir le fichier : {e}")
+        finally:
+            QApplication.restoreOverrideCursor()
+
+    # Méthode du menu "Actualiser le fichier parcouru" : montre les lignes ajoutées pendant un enregistrement. ---------
+    def on_click_actualiser(self):
+        if self._modele_fichier is None:
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            self._modele_fichier.actualiser()
+            modele = self._modele_fichier
+            self.lab_filtre.setText(f"{modele.rowCount()} lignes" if modele.criteres else "")
+            print(f"Parcours de {self._file_path} : {modele.rowCount()} lignes.")
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible d'actualiser le fichier : {e}")
+        finally:
+            QApplication.restoreOverrideCursor()
+
     # Méthode pour configurer la taille des colonnes de la table. ------------------------------------------------------
     def configurer_colonnes(self):
         self.table_can.setColumnWidth(0, 80)  # Largeur de "ID"
         self.table_can.setColumnWidth(1, 30)  # Largeur de "Len"
         self.table_can.setColumnWidth(2, 180)  # Largeur de "Data"
+        if self._colonnes_decodees:
+            self.table_can.setColumnWidth(3, 60)  # Largeur de "PGN"
+            self.table_can.setColumnWidth(4, 50)  # Largeur de "Source"
+            self.table_can.setColumnWidth(5, 400)  # Largeur de "Valeurs"
         # Ouvre la table.
         self.show()
 
@@ -254,55 +746,29 @@ class MainWindow(QMainWindow):
         if col3:
             data = col3.split(" ")
             try:
-                # Récupère les informations des octets.
-                octetstuple = self._nmea_2000.octets(int(tout_id[0]),[int(octet,16) for octet in data])
+                # Récupère les informations des octets, les valeurs ne sont mises en texte qu'ici.
+                resultat = self._nmea_2000.octets(int(tout_id[0]),[int(octet,16) for octet in data])
+                lignes = [f" {nom}: {texte} {unite}" for (nom, texte), unite in zip(resultat.couples(),
+                                                                                    resultat.unites())]
+                if resultat.trame is not None:
+                    lignes.insert(0, f" {resultat.titre}: N° {resultat.trame}")
+
                 # Affiche toutes les informations sur le formulaire.
                 self.lab_octet.setText("                             Ligne " + str(ligne+1)       # Numéro de ligne
                                + "\n PGN : "+ " " + str(tout_id[0])                               # PGN
                                + "       Prio : " + str(tout_id[3])                               # Priorité
                                + "   Source : " +  str(tout_id[1])                                # Source
                                + "    Dest. : " + str(tout_id[2]) + "\n\n"                        # Destination
-                               + " " + str(octetstuple[0]) + ": "                                 # PGN1 :
-                               + " " + str(octetstuple[3]) + "\n"                                 # Valeur 1
-                               + " " + str(octetstuple[1]) + ": " + str(octetstuple[4]) + "\n"    # PGN2 : Valeur 2
-                               + " " + str(octetstuple[2]) + ": " + str(octetstuple[5]) + "\n"    # PGN3 : Valeur 3
-                               + " Table : " + str(octetstuple[6]) + ": " +                       # Table :
-                               str(octetstuple[7]))                                               # Définition
+                               + "\n".join(lignes) + "\n"                                         # PGN : Valeur
+                               + " Table : " + str(resultat.table) + ": " +                       # Table :
+                               str(resultat.definition))                                          # Définition
             except Exception as e:
                 print(f"Erreur dans l'appel à octets : {e}")
 
-    # Méthode pour remplir la table venant d'un fichier. ---------------------------------------------------------------
-    def affiche_trame_fichier(self, trame):
-        self.add_to_buffer(trame)
-
-    # Méthode pour ajouter une trame au buffer
-    def add_to_buffer(self, trame):
-        # Ajouter la trame dans l'ordre dans la position en cours
-        self._buffer[self._buffer_index] = trame
-
-        # Incrémenter l'index
-        self._buffer_index = (self._buffer_index + 1) % self._buffer_capacity
-
-        # S'assurer que le nombre total de trames ajoutées ne dépasse pas la capacité du buffer
-        if self._buffer_count < self._buffer_capacity:
-            self._buffer_count += 1
-
-        # Incrémentation pour compter le nombre de trames depuis la dernière mise à jour
-        self._update_counter += 1
-
-        # Met à jour la table toutes les 10 trames
-        if self._update_counter >= self._batch_update_threshold:
-            self._update_counter = 0  # Réinitialise le compteur
-            self._model.update_buffer(self._buffer, self._buffer_index, self._buffer_count)
-
-        # Ajouter au compteur d'attente pour update
-        self._pending_updates += 1
-
-        # Vérifier si un seuil est atteint pour mettre à jour la table
-        if self._pending_updates >= self._batch_update_threshold:
-            # Mise à jour en regroupant les trames
-            self._model.update_buffer(self._buffer, self._buffer_index, self._buffer_count)
-            self._pending_updates = 0  # Réinitialisation du compteur
+    # Méthode pour ajouter un tableau de trames au buffer (lot de l'acquisition, journal binaire...).
+    # La table est mise à jour par le modèle à cadence fixe.
+    def add_lot_to_buffer(self, tableau):
+        self._model.ajouter_lot(tableau)
 
     # Méthode pour changement de la valeur de la capacité du buffer. ---------------------------------------------------
     def on_change_buffer_size(self):
@@ -312,14 +778,9 @@ class MainWindow(QMainWindow):
             if new_size <= 0:
                 raise ValueError("La taille doit être supérieure à zéro.")
 
-            # Réinitialise le buffer avec la nouvelle capacité
+            # Réinitialise le buffer et la table avec la nouvelle capacité
             self._buffer_capacity = new_size
-            self._buffer = [("", "", "")] * self._buffer_capacity
-            self._buffer_index = 0
-            self._buffer_count = 0
-
-            # Réinitialisation de la table
-            self._model.update_buffer(self._buffer, self._buffer_index, self._buffer_count)
+            self._model.vider(self._buffer_capacity)
 
         except ValueError:
             # Gère les erreurs en affichant un message
@@ -341,6 +802,8 @@ class MainWindow(QMainWindow):
     def close_both(self):
         # self.on_click_stop()
         print("Fermeture des fenêtres...")
+        # Ecrire les dernières lignes de la base SQLite.
+        self.fermer_base()
         # Fermer FenetreStatus si elle est ouverte
         self.can_interface_app.fermer_fenetre_status()
         print("La fenêtre est fermée")
@@ -351,9 +814,7 @@ class MainWindow(QMainWindow):
         self.close()
 
         # Autorise de se mettre en veille.
-        ctypes.windll.kernel32.SetThreadExecutionState(
-            self.ES_CONTINUOUS
-        )
+        autoriser_veille(True)
 
     # Méthode sur la case à cocher. ------------------------------------------------------------------------------------
     def on_check_file_changed(self,state) :
@@ -386,7 +847,7 @@ class MainWindow(QMainWindow):
             "Créer un Fichier texte pour récupérer les trame du bus CAN",  # Titre de la boîte de dialogue
             self._file_path if self._file_path else ""
             ,  # Dossier initial
-            "Fichier texte (*.txt);;Tous les fichiers (*.*)")
+            "Fichier texte (*.txt);;Journal binaire (*.can);;Tous les fichiers (*.*)")
 
         if selected_file_path:
             self._file_path = selected_file_path
@@ -401,9 +862,13 @@ class MainWindow(QMainWindow):
                 self.lab_file.setText("Bus CAN     : " + str(self._file_path))
 
             self.actionImporter.setEnabled(True)
+            self.actionParcourir.setEnabled(True)
             self.actionVoir.setEnabled(True)
             self.actionExport.setEnabled(True)
 
+            # La table qui parcourait l'ancien fichier revient au buffer tournant.
+            self.afficher_buffer()
+
         else:
             self._file_path = __previous_file_path
             print("Aucun fichier sélectionné.")
@@ -411,6 +876,22 @@ class MainWindow(QMainWindow):
         self.unsetCursor()
         self.can_interface_app._file_path = self._file_path
 
+    # Méthode qui retourne l'index des lignes du fichier texte ouvert. ------------------------------------------------
+    def index_lignes(self):
+        if self._index_lignes is None or self._index_lignes.chemin != self._file_path:
+            self._index_lignes = IndexLignes(self._file_path)
+        return self._index_lignes
+
+    # Méthode qui retourne le nombre de trames du fichier ouvert (texte ou journal binaire). --------------------------
+    def nombre_lignes(self):
+        try:
+            if est_binaire(self._file_path):
+                return len(lire_binaire(self._file_path))
+            return self.index_lignes().nombre_lignes
+        except (OSError, ValueError) as e:
+            print(f"Impossible de compter les lignes de {self._file_path} : {e}")
+            return None
+
         # Méthode pour importer les données du fichier sur la table. -------------------------------------------------------
     def on_click_import(self):
         if not self._file_path:
@@ -421,6 +902,8 @@ class MainWindow(QMainWindow):
         # On défini la quantité de trames
         quantite = int(self.line_table.text())
         start_index = 0
+        # Le fichier n'est compté qu'une fois par import.
+        total = self.nombre_lignes()
 
         resultat = self.Qmessagebox_4_boutons( "Importer dans la table",
                                                   "Vous allez importer dans la table",
@@ -428,7 +911,8 @@ class MainWindow(QMainWindow):
                                                   "Précédent",
                                                   "Suivant",
                                                   "Valider",
-                                                  quantite)
+                                                  quantite,
+                                                  total)
 
         if resultat is None:
             print("La boîte de dialogue a été fermée sans action (bouton 'X').")
@@ -437,46 +921,16 @@ class MainWindow(QMainWindow):
             print(f"L'importation commence à l'index : {resultat}")
             start_index = resultat
 
+        # Les trames importées vont dans le buffer tournant.
+        self.afficher_buffer()
+
         try:
             # QApplication.setOverrideCursor(Qt.WaitCursor)
             QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            liste_tuples = []
-            with open(self._file_path, 'r', encoding='utf-8', errors='replace') as fichier:
-                for i, ligne in enumerate(fichier):
-                    # Saute les lignes avant le `start_index`
-                    if i < start_index:
-                        continue
-
-                    # Lire jusqu'à la quantité de lignes à partir de `start_index`
-                    if i >= start_index + quantite:
-                        break
-
-                    # Supprimer les espaces inutiles.
-                    ligne = ligne.strip()
-
-                    # Défini l'espace comme séparateur.
-                    valeurs = ligne.split(' ')
-
-                    # Convertit la liste des valeurs en tuple.
-                    ligne_tuple = tuple(valeurs)
-
-                    # Ajoute le tuple à la liste.
-                    liste_tuples.append(ligne_tuple)
-
-            # Transformer la liste pour afficher seulement les colonnes souhaitées.
-            # Les valeurs dans la table sont déjà en hexadécimales.
-            liste_modifiee = [
-                (
-                    t[1] if len(t) > 1 else '',  # 2e élément ID
-                    t[2] if len(t) > 2 else '',  # 3e élément Len
-                    ' '.join(t[3:]) if len(t) > 3 else ''  # 4e élément Data avec join.
-                )
-                for t in liste_tuples
-            ]
-
-            # Appeler la fonction pour afficher les trames une par une.
-            for trame in liste_modifiee:
-                self.affiche_trame_fichier(trame)
+            # Les trames sont lues par lots (texte ou journal binaire) et copiées telles quelles dans le buffer :
+            # seules les lignes affichées sont mises en texte.
+            for _, trames in lots_trames(self._file_path, start_index, quantite):
+                self._model.ajouter_lot(tableau_lot(trames))
 
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Une erreur s'est produite lors de l'importation : {str(e)}")
@@ -494,7 +948,8 @@ class MainWindow(QMainWindow):
             self._file_path_csv, _ = QFileDialog.getSaveFileName(self,
                                                   "Créer un fichier CSV pour y inclure le NMEA 2000",
                                                   "",
-                                                  "Fichier csv (*.csv);;Tous les fichiers (*.*)")
+                                                  "Fichier csv (*.csv);;Colonnes NumPy (*.npz);;Base SQLite (*.db);;"
+                                                  "Tous les fichiers (*.*)")
         else:
             self._reply = QMessageBox.question(self, "EXPORTER LE FICHIER EN NMEA 2000",
                                                f"Voulez-vous créer un autre fichier CSV ?\n\n"
@@ -504,7 +959,8 @@ class MainWindow(QMainWindow):
                 self._file_path_csv, _ = QFileDialog.getSaveFileName(self,
                                                   "Créer un nouveau fichier CSV pour y inclure le NMEA 2000",
                                                   "",
-                                                  "Fichier csv (*.csv);;Tous les fichiers (*.*)")
+                                                  "Fichier csv (*.csv);;Colonnes NumPy (*.npz);;Base SQLite (*.db);;"
+                                                  "Tous les fichiers (*.*)")
 
 
         if not self._file_path_csv:
@@ -513,6 +969,8 @@ class MainWindow(QMainWindow):
             self.lab_csv.setText("NMEA 2000 : " + str(self._file_path_csv))
 
         nombre_lignes = int(self.line_nmea.text())  # C'est ici qu'on définit la taille du fichier NMEA 2000.
+        # Le fichier n'est compté qu'une fois par export : un journal binaire est relu à chaque comptage.
+        total = self.nombre_lignes()
 
         # Récupérer le start_index à partir de la méthode de gestion des quatre boutons
         start_index = self.Qmessagebox_4_boutons("Exporter NMEA 2000",
@@ -522,104 +980,63 @@ class MainWindow(QMainWindow):
                                                  "Précédent",
                                                  "Suivant",
                                                  "Valider",
-                                                 nombre_lignes)
+                                                 nombre_lignes,
+                                                 total)
 
         if start_index is None:
             print("La boîte de dialogue a été fermée sans action (bouton 'X').")
             return
 
-        try:
-            # Ouvrir le fichier source texte.
-            with open(self._file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
-                # Lire toutes les lignes du fichier
-                lignes = f.readlines()
-
-            # Ignorer les lignes avant le `start_index` et limiter à nombre les lignes
-            lignes_restees = lignes[start_index:start_index + nombre_lignes]
-
-            # Transformer les lignes en données structurées
-            resultat = (ligne.strip().split(" ") for ligne in lignes_restees if ligne.strip())
-
-            # Ouvrir le fichier CSV pour écrire les résultats
-            with open(self._file_path_csv, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f, delimiter=';')
-
-                # Écrire l'en-tête du fichier CSV
-                writer.writerow(("PGN", "Source","Destination", "Priorité","PGN1", "Valeur", "PGN2",
-                                 "Valeur", "PGN3", "Valeur", "Table", "Définition"))
-
-                for index, ligne in enumerate(resultat):
-                    try:
-                        # Vérifier que la ligne contient suffisamment de données
-                        if len(ligne) < 1:
-                            print(f"Données insuffisantes à l'index {index} : {ligne}")
-                            continue
-
-                        nombre_octets_declare = int(ligne[2])
-                        # Extraire les octets selon le nombre déclaré
-                        data = ligne[3:3 + nombre_octets_declare]
-
-                        # Convertir les octets en valeurs numériques
-                        octets = []
-                        for octet in data:
-                            if len(octet) == 2 and all(c in '0123456789ABCDEFabcdef' for c in octet.lower()):
-                                octets.append(int(octet, 16))
-                            else:
-                                print(f"Octet invalide ignoré : {octet}")
-
-                        # Convertir et traiter les champs de la ligne avec la méthode _nmea_2000.pgn
-                        pgn = self._nmea_2000.pgn(int(ligne[1], 16))  # Conversion hexadécimal -> entier
-
-                        # Récupèrer la source
-                        source = self._nmea_2000.source(int(ligne[1], 16))
-
-                        # Récupèrer la destination
-                        destination = self._nmea_2000.destination(int(ligne[1], 16))
-
-                        # Récupèrer la priorité
-                        priorite = self._nmea_2000.priorite(int(ligne[1], 16))
-
-                        # Récupère la zone data qui est mise dans les colonnes 3 à 10
-                        # data = (ligne[i].strip() for i in range(3, 11) if i < len(ligne))
-                        # data = ligne[3:] if len(ligne) > 3 else []
-                        # print(f"Données brutes trouvées : {data}")
-
-                        # Convertir les octets avec la méthode `_nmea_2000. octets`
-                        result = ["N/A"] * 8
-                        try:
-                            result = self._nmea_2000.octets(pgn,octets)
-                        except ValueError as ve:
-                            print(f"Erreur dans le traitement NMEA 2000 à l'index {index}")
-                            print(f"PGN: {pgn}")
-                            print(f"Octets: {octets}")
-                            print(f"Erreur détaillée: {ve}")
-
-                        # Écrire les résultats dans CSV sous forme d'un tuple.
-                        writer.writerow((
-                            str(pgn),        # Affiche PGN, Source, Destination et Priorité.
-                            str(source),
-                            str(destination),
-                            str(priorite),
-                            str(result[0]),  # PGN1, Ces resultats viennent du tuple NMEA 2000.
-                            str(result[3]),  # Valeur1
-                            str(result[1]),  # PGN2
-                            str(result[4]),  # Valeur2
-                            str(result[2]),  # PGN3
-                            str(result[5]),  # Valeur3
-                            str(result[6]),  # Table
-                            str(result[7])   # Définition de la table.
-                        ))
-
-                    except ValueError as ve:
-                        print(f"Erreur de conversion à l'index {index} : {ligne}")
-                        print(f"TimeStamp: {ligne[0] if len(ligne) > 0 else 'N/A'}")
-                        print(f"ID: {ligne[1] if len(ligne) > 1 else 'N/A'}")
-                        print(f"Nombre d'octets déclaré: {ligne[2] if len(ligne) > 2 else 'N/A'}")
-                        print(f"Octets trouvés: {ligne[3:] if len(ligne) > 3 else 'N/A'}")
-                        print(f"Erreur : {ve}")
-                    except Exception as ex:
-                        print(f"Erreur inattendue à l'index {index} : {ex}")
+        # Pas d'export au-delà de la dernière ligne du fichier.
+        if total is not None:
+            nombre_lignes = max(0, min(nombre_lignes, total - start_index))
+
+        # L'export tourne dans un thread, la fenêtre reste disponible pendant ce temps.
+        # Les gros fichiers sont décodés par plusieurs processus en parallèle.
+        asyncio.ensure_future(self.exporter_nmea(start_index, nombre_lignes))
+
+    # Méthode asynchrone qui exporte en CSV NMEA 2000, avec une barre de progression et un bouton pour annuler. --------
+    async def exporter_nmea(self, start_index, nombre_lignes):
+        dialogue = QProgressDialog("Export NMEA 2000 en cours...", "Annuler", 0, max(nombre_lignes, 1), self)
+        dialogue.setWindowTitle("EXPORT CSV EN NMEA 2000")
+        dialogue.setWindowModality(Qt.WindowModal)
+        dialogue.setMinimumDuration(0)
+        annulation = threading.Event()
+        dialogue.canceled.connect(annulation.set)
+
+        # La progression est envoyée depuis le thread de l'export vers la boucle de la fenêtre.
+        loop = asyncio.get_running_loop()
+
+        def progression(lignes):
+            loop.call_soon_threadsafe(dialogue.setValue, lignes)
+
+        # Un fichier ".npz" reçoit les colonnes typées de chaque signal, pour l'analyse avec NumPy ou polars.
+        # Un fichier ".db" reçoit une table par PGN dans une base SQLite.
+        if self._file_path_csv.lower().endswith(".npz"):
+            exporter = exporter_npz
+        elif self._file_path_csv.lower().endswith((".db", ".sqlite")):
+            exporter = exporter_sqlite
+        else:
+            exporter = exporter_csv_parallele
 
+        self.actionExport.setEnabled(False)
+        try:
+            bilan = await asyncio.to_thread(exporter, self._file_path, self._file_path_csv,
+                                            start_index, nombre_lignes, progression, annulation)
+            dialogue.close()
+
+            if bilan.annule:
+                QMessageBox.information(self, "EXPORT CSV EN NMEA 2000",
+                                        f"Export annulé après {bilan.lignes} lignes.")
+                return
+
+            # Les colonnes NumPy et la base SQLite ne s'ouvrent pas dans Excel.
+            if exporter is not exporter_csv_parallele:
+                QMessageBox.information(self, "EXPORT NMEA 2000",
+                                        f"Exportation NMEA 2000 dans le fichier\n"
+                                        f"{os.path.basename(self._file_path_csv)}\n"
+                                        f"est terminée avec succès !")
+                return
 
             reponse = QMessageBox.question(self, "EXPORT CSV EN NMEA 2000", f"Exportation NMEA 2000 dans le fichier\n"
                                                         f"{os.path.basename(self._file_path_csv)} \n"
@@ -638,17 +1055,144 @@ class MainWindow(QMainWindow):
             except Exception as e :
                 QMessageBox.warning(self, "Erreur", f"Impossible d'ouvrir le fichier : {str(e)}")
 
+        except FileNotFoundError:
+            QMessageBox.critical(self, "EXPORT CSV EN NMEA 2000", "Fichier source introuvable ou non spécifié.")
+        except Exception as e :
+            print(f"Erreur inattendue : {e}")
+            QMessageBox.critical(self, "EXPORT CSV", "Le fichier est dèjà ouvert!")
+        finally:
+            dialogue.close()
+            self.actionExport.setEnabled(True)
+
+    # Méthode du menu "Rejouer un fichier" : les trames du fichier passent par le temps réel. -------------------------
+    def on_click_rejeu(self):
+        chemin, _ = QFileDialog.getOpenFileName(self,
+                                                "Fichier du bus CAN à rejouer",
+                                                self._file_path if self._file_path else "",
+                                                "Fichier texte (*.txt);;Journal binaire (*.can);;"
+                                                "Tous les fichiers (*.*)")
+        if not chemin:
+            return
+
+        vitesses = {"Temps d'origine": 1.0, "10 fois plus vite": 10.0, "100 fois plus vite": 100.0,
+                    "Le plus vite possible": 0}
+        choix, ok = QInputDialog.getItem(self, "REJOUER UN FICHIER", "Vitesse du rejeu :", list(vitesses), 0, False)
+        if not ok:
+            return
 
+        # L'enregistrement ne doit pas réécrire le fichier rejoué.
+        if chemin == self._file_path:
+            self.check_file.setChecked(False)
+        self.can_interface_app.rejouer(chemin, vitesses[choix])
+
+    # Méthode du menu "Interface du bus CAN" : choix de l'interface utilisée à la prochaine ouverture. -----------------
+    def on_click_interface(self):
+        noms = list(INTERFACES)
+        actuelle = noms.index(self.can_interface_app.nom_interface)
+        nom, ok = QInputDialog.getItem(self, "INTERFACE DU BUS CAN", "Interface :", noms, actuelle, False)
+        if not ok:
+            return
 
+        options = {}
+        if nom == "SocketCAN":
+            canal, ok = QInputDialog.getText(self, "INTERFACE SOCKETCAN", "Canal (can0, vcan0...) :",
+                                             text=SOCKETCAN_CANAL)
+            if not ok or not canal:
+                return
+            options["canal"] = canal
+        elif nom == "Simulation":
+            debit, ok = QInputDialog.getInt(self, "SIMULATION", "Trames par seconde (0 = le plus vite possible) :",
+                                            SIMULATION_TRAMES_S, 0, 1000000)
+            if not ok:
+                return
+            options["trames_par_seconde"] = debit
+
+        self.can_interface_app.choisir_interface(nom, **options)
+        self.actionOpen.setEnabled(True)
+        print(f"Interface du bus CAN : {nom} {options}")
+
+    # Méthode du menu "Filtre du bus CAN" : seuls les PGN voulus passent l'adaptateur puis le filtre logiciel. ---------
+    def on_click_filtre(self):
+        choix_libre = "PGN au choix..."
+        noms = list(MODES_FILTRE) + [choix_libre]
+        nom, ok = QInputDialog.getItem(self, "FILTRE DU BUS CAN", "Trames à recevoir :", noms, 0, False)
+        if not ok:
+            return
 
+        try:
+            if nom == choix_libre:
+                texte, ok = QInputDialog.getText(self, "FILTRE DU BUS CAN", "PGN voulus (séparés par des virgules) :")
+                if not ok:
+                    return
+                pgns = [int(pgn) for pgn in texte.replace(";", ",").split(",") if pgn.strip()]
+                texte, ok = QInputDialog.getText(self, "FILTRE DU BUS CAN",
+                                                 "Sources voulues (séparées par des virgules, vide = toutes) :")
+                if not ok:
+                    return
+                sources = [int(source) for source in texte.replace(";", ",").split(",") if source.strip()]
+                plan = PlanFiltre(pgns, sources or None)
+            else:
+                plan = plan_mode(nom)
+        except ValueError as e:
+            QMessageBox.critical(self, "FILTRE DU BUS CAN", f"Filtre impossible : {e}")
+            return
+
+        self.can_interface_app.choisir_filtre(plan)
+        self.actionOpen.setEnabled(True)
+        if plan is None:
+            print("Filtre du bus CAN : toutes les trames.")
+            return
 
+        # Estimation du rejet sur le début du fichier ouvert, s'il y en a un.
+        message = (f"Code d'acceptation : 0x{plan.acceptance_code:08X}\n"
+                   f"Masque d'acceptation : 0x{plan.acceptance_mask:08X}\n"
+                   f"Identifiants acceptés par l'adaptateur : {plan.part_acceptee():.4%}")
+        if self._file_path and os.path.exists(self._file_path):
+            try:
+                nombre = self.nombre_lignes()
+                if nombre is None:
+                    raise ValueError(f"{self._file_path} n'est pas un journal lisible")
+                taux = plan.taux_rejet_fichier(self._file_path, min(nombre, FILTRE_ECHANTILLON))
+                message += (f"\n\nSur les {taux['trames']} premières trames du fichier ouvert :\n"
+                            f"Rejetées par l'adaptateur : {taux['rejet_materiel']:.1%}\n"
+                            f"Rejetées par le filtre logiciel : {taux['filtre_logiciel']:.1%}\n"
+                            f"Rejetées en tout : {taux['rejet_total']:.1%}")
+            except (OSError, ValueError) as e:
+                print(f"Estimation du filtre impossible : {e}")
+                message += f"\n\nEstimation sur le fichier ouvert impossible : {e}"
+        print(f"Filtre du bus CAN : {plan}")
+        QMessageBox.information(self, "FILTRE DU BUS CAN", message)
+
+    # Méthode du menu "Base SQLite en temps réel" : les messages décodés sont enregistrés dans la base. ---------------
+    def on_click_base(self, coche):
+        if not coche:
+            self.fermer_base()
+            return
 
+        chemin, _ = QFileDialog.getSaveFileName(self,
+                                                "Base SQLite pour enregistrer le NMEA 2000 en temps réel",
+                                                "",
+                                                "Base SQLite (*.db);;Tous les fichiers (*.*)")
+        if not chemin:
+            self.actionBase.setChecked(False)
+            return
 
-        except FileNotFoundError:
-            QMessageBox.critical(self, "EXPORT CSV EN NMEA 2000", "Fichier source introuvable ou non spécifié.")
-        except Exception as e :
-            print(f"Erreur inattendue : {e}")
-            QMessageBox.critical(self, "EXPORT CSV", "Le fichier est dèjà ouvert!")
+        try:
+            self._base_sqlite = BaseSQLite(chemin)
+            self._base_sqlite.abonner(self._nmea_2000)
+            print(f"Base SQLite ouverte : {chemin}")
+        except Exception as e:
+            self._base_sqlite = None
+            self.actionBase.setChecked(False)
+            QMessageBox.critical(self, "BASE SQLITE", f"Impossible d'ouvrir la base : {str(e)}")
+
+    # Méthode qui désabonne et ferme la base SQLite du temps réel. -----------------------------------------------------
+    def fermer_base(self):
+        if self._base_sqlite is not None:
+            self._base_sqlite.desabonner()
+            print(f"Base SQLite fermée : {self._base_sqlite.statistiques()}")
+            self._base_sqlite.fermer()
+            self._base_sqlite = None
 
     # Méthode qui lance la "quart_app" ---------------------------------------------------------------------------------
     @staticmethod
@@ -709,7 +1253,8 @@ class MainWindow(QMainWindow):
                               premier="Précedent",
                               deuxieme="Suivant",
                               troisieme = "Valider",
-                              quantite = 5000):
+                              quantite = 5000,
+                              total = None):
 
         # Ce bouton n'a pas besoin d'être instancié.
         quatrieme = "Annuler"
@@ -731,7 +1276,14 @@ class MainWindow(QMainWindow):
 
             continuer = True
             while continuer:
-                msg_box.setText(f"{info}, les numéros des lignes de: {start_index + 1} à {start_index + quantite}")
+                fin = start_index + quantite if total is None else min(start_index + quantite, total)
+                texte = f"{info}, les numéros des lignes de: {start_index + 1} à {fin}"
+                if total is not None:
+                    texte += f" sur {total}"
+                msg_box.setText(texte)
+                # Pas de page suivante après la dernière ligne du fichier.
+                bouton_non.setEnabled(total is None or start_index + quantite < total)
+                bouton_oui.setEnabled(start_index > 0)
                 # Affichage de la boîte de dialogue.
                 msg_box.exec_()
 
@@ -742,11 +1294,12 @@ class MainWindow(QMainWindow):
 
                 # Détection du bouton cliqué
                 if msg_box.clickedButton() == bouton_non:
-                    start_index += quantite
+                    if total is None or start_index + quantite < total:
+                        start_index += quantite
                 elif msg_box.clickedButton() == bouton_oui:
                     start_index = max(0, start_index - quantite)
                 elif msg_box.clickedButton() == bouton_valider:
-                    print(f"Vous avez validé l'importation des lignes {start_index + 1} à {start_index + quantite}.")
+                    print(f"Vous avez validé l'importation des lignes {start_index + 1} à {fin}.")
                     continuer = False
 
             return start_index
@@ -0,0 +1,192 @@
+import asyncio
+import ctypes
+import threading
+
+import numpy as np
+
+from Package.constante import *
+from Package.CAN_dll import CanMsg
+
+# **********************************************************************************************************************
+#       Acquisition du bus CAN par un thread de lecture, qui remplit un anneau de CanMsg vidé par lots par asyncio
+# **********************************************************************************************************************
+# L'anneau est un tableau ctypes de CanMsg alloué une seule fois : l'interface lit directement dans ses cases,
+# sans créer d'objet par trame. Le même espace mémoire est vu par NumPy comme un tableau structuré
+# (ID, TimeStamp, flags, len, data), pour traiter un lot d'un coup sans copie.
+# La boucle asyncio n'est réveillée que lorsqu'elle attend, et reprend toutes les trames en attente d'un coup.
+# Un lot reste valable jusqu'à l'appel suivant de "lire_lot" : ses cases ne sont réutilisées qu'après.
+# Si l'anneau est plein, les nouvelles trames sont lues dans une case de rebut et comptées dans "perdues".
+# Une erreur de l'interface (fin d'un rejeu, adaptateur débranché) arrête le thread, et elle est relevée par
+# "lire_lot" une fois l'anneau vidé.
+
+
+# Le CanMsg vu par NumPy, avec les positions et la taille de la structure ctypes (ID sur 4 octets sous Windows, 8 sous
+# Linux).
+DTYPE_CANMSG = np.dtype({"names": ("ID", "TimeStamp", "flags", "len", "data"),
+                         "formats": (f"i{ctypes.sizeof(ctypes.c_long)}", f"i{ctypes.sizeof(ctypes.c_long)}",
+                                     "u1", "u1", ("u1", 8)),
+                         "offsets": tuple(getattr(CanMsg, nom).offset
+                                          for nom in ("ID", "TimeStamp", "flags", "len", "data")),
+                         "itemsize": ctypes.sizeof(CanMsg)})
+
+
+# Un lot de trames : les CanMsg de l'anneau et leur vue NumPy. Les deux partagent la mémoire de l'anneau.
+class LotTrames:
+    __slots__ = ("trames", "tableau")
+
+    def __init__(self, trames, tableau):
+        self.trames = trames        # Liste des CanMsg (cases de l'anneau)
+        self.tableau = tableau      # Tableau structuré NumPy sur les mêmes cases
+
+    def __len__(self):
+        return len(self.trames)
+
+    def __iter__(self):
+        return iter(self.trames)
+
+
+# ================================================= Classe AnneauTrames ================================================
+# Anneau d'un seul écrivain (le thread de lecture) et d'un seul lecteur (asyncio).
+# "ecrites" et "liberees" ne font qu'augmenter : la case d'une trame est son numéro modulo la capacité.
+class AnneauTrames:
+    def __init__(self, capacite=ACQUISITION_FILE_MAX):
+        self.capacite = capacite
+        self.memoire = (CanMsg * capacite)()
+        self.tableau = np.frombuffer(self.memoire, dtype=DTYPE_CANMSG)
+        self.cases = [self.memoire[i] for i in range(capacite)]     # Un objet CanMsg par case, créé une fois.
+        self.ecrites = 0
+        self.liberees = 0
+
+    def __len__(self):
+        return self.ecrites - self.liberees
+
+    # Méthode qui retourne (début, fin) des cases libres contiguës, au plus "maximum". ---------------------------------
+    def libres(self, maximum):
+        debut = self.ecrites % self.capacite
+        return debut, debut + min(maximum, self.capacite - len(self), self.capacite - debut)
+
+    # Méthode qui retourne (début, fin) des trames en attente contiguës, au plus "maximum". ----------------------------
+    def en_attente(self, maximum):
+        debut = self.liberees % self.capacite
+        return debut, debut + min(maximum, len(self), self.capacite - debut)
+# ============================================= FIN DE LA CLASSE AnneauTrames ==========================================
+
+
+# ================================================== Classe Acquisition ================================================
+class Acquisition:
+    def __init__(self, interface, taille_file=ACQUISITION_FILE_MAX, taille_lot=LECTURE_LOT):
+        self._interface = interface
+        self._taille_lot = taille_lot
+        self._anneau = AnneauTrames(taille_file)
+        self._rebut = [CanMsg()]    # Case où sont lues les trames perdues quand l'anneau est plein.
+        self._rendues = 0           # Trames du dernier lot rendu, libérées au "lire_lot" suivant.
+        self._thread = None
+        self._actif = False         # Faux dès que le thread de lecture a fini, avant son dernier réveil.
+        self._en_attente = False    # Vrai quand asyncio attend des trames : le thread doit la réveiller.
+        self._arret = threading.Event()
+        self._boucle = None
+        self._signal = None
+        self.erreur = None
+
+        # Compteurs.
+        self.recues = 0
+        self.perdues = 0
+        self.lots = 0
+        self.profondeur_max = 0
+
+    @property
+    def en_cours(self):
+        return self._actif
+
+    @property
+    def profondeur(self):
+        return len(self._anneau)
+
+    # Méthode qui démarre le thread de lecture, à appeler depuis la boucle asyncio. ------------------------------------
+    def demarrer(self):
+        if self.en_cours:
+            return
+        self._boucle = asyncio.get_running_loop()
+        self._signal = asyncio.Event()
+        self._arret.clear()
+        self.erreur = None
+        self._actif = True
+        self._thread = threading.Thread(target=self._lire, name="Acquisition CAN", daemon=True)
+        self._thread.start()
+
+    # Méthode qui arrête le thread de lecture, les trames encore dans l'anneau restent lisibles. -----------------------
+    # Le jeton d'arrêt est passé à l'interface : une attente en cours s'interrompt aussitôt.
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2 * LECTURE_DELAI_S + 1)
+            self._thread = None
+
+    # Méthode du thread de lecture. ------------------------------------------------------------------------------------
+    def _lire(self):
+        anneau = self._anneau
+        interface = self._interface
+        try:
+            while not self._arret.is_set():
+                debut, fin = anneau.libres(self._taille_lot)
+                if debut == fin:
+                    # Anneau plein : la trame est lue pour vider l'interface, puis perdue.
+                    self.perdues += interface.read_into(self._rebut, 0, 1, LECTURE_DELAI_S, self._arret)
+                    continue
+                lues = interface.read_into(anneau.cases, debut, fin, LECTURE_DELAI_S, self._arret)
+                if not lues:
+                    continue
+                anneau.ecrites += lues
+                self.recues += lues
+                self.lots += 1
+                if len(anneau) > self.profondeur_max:
+                    self.profondeur_max = len(anneau)
+                if self._en_attente:
+                    self._en_attente = False
+                    self._reveiller()
+        except Exception as e:
+            self.erreur = e
+        finally:
+            self._actif = False
+            self._reveiller()
+
+    # Méthode qui réveille la boucle asyncio depuis le thread de lecture. ----------------------------------------------
+    def _reveiller(self):
+        try:
+            self._boucle.call_soon_threadsafe(self._signal.set)
+        except RuntimeError:
+            pass        # La boucle asyncio est déjà fermée.
+
+    # Méthode asynchrone qui retourne les trames en attente (au plus "maximum"), en attendant au plus "delai". ---------
+    # Le lot précédent est libéré : ses cases peuvent être réécrites par le thread de lecture.
+    # Lève asyncio.TimeoutError si aucune trame n'est arrivée, ou l'erreur qui a arrêté le thread de lecture.
+    async def lire_lot(self, delai=ACQUISITION_DELAI_S, maximum=ACQUISITION_LOT_MAX):
+        anneau = self._anneau
+        anneau.liberees += self._rendues
+        self._rendues = 0
+
+        if not len(anneau):
+            if self.erreur is not None and not self.en_cours:
+                erreur, self.erreur = self.erreur, None
+                raise erreur
+            self._signal.clear()
+            self._en_attente = True
+            try:
+                if not len(anneau) and self.en_cours:
+                    await asyncio.wait_for(self._signal.wait(), timeout=delai)
+            finally:
+                self._en_attente = False
+
+        debut, fin = anneau.en_attente(maximum)
+        self._rendues = fin - debut
+        return LotTrames(anneau.cases[debut:fin], anneau.tableau[debut:fin])
+
+    # Méthode qui retourne les compteurs de l'anneau. ------------------------------------------------------------------
+    def statistiques(self):
+        return {"recues": self.recues,
+                "perdues": self.perdues,
+                "lots": self.lots,
+                "profondeur": len(self._anneau),
+                "profondeur_max": self.profondeur_max,
+                "capacite": self._anneau.capacite}
+# ============================================= FIN DE LA CLASSE Acquisition ===========================================
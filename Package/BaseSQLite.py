@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from Package.constante import *
+from Package.DecodageLot import decoder_lot, DEFINITIONS_LOT
+from Package.DefinitionsPGN import PGN_DEFINITIONS, DECODEURS_MESSAGES
+from Package.ExportNMEA import lots_trames, supprimer, BilanExport
+from Package.ExportColonnes import valeurs_nommees
+from Package.NMEA_2000 import ContexteDecodage
+
+# **********************************************************************************************************************
+#       Base SQLite des trames NMEA 2000 décodées, alimentée par le temps réel ou par l'export d'un fichier
+# **********************************************************************************************************************
+# Une table par PGN ("pgn_130306"), avec les colonnes horodatage, date, source, puis une colonne par champ.
+# "horodatage" est le TimeStamp de la trame, "date" l'heure du PC en secondes (seulement en temps réel).
+# La table "messages" donne le titre et le nom de la table de chaque PGN.
+# Les lignes sont gardées en attente puis écrites par "executemany" dans une seule transaction.
+# L'export d'un fichier remplace une base existante : il écrit dans une base temporaire à côté ("base.db.partiel")
+# qui ne prend la place de la base qu'à la fin. Un export annulé ou en erreur ne laisse rien.
+
+
+# Fonction qui met un nom de table ou de colonne entre guillemets pour SQLite. -----------------------------------------
+def identifiant(nom):
+    return '"' + str(nom).replace('"', '""') + '"'
+
+
+# Fonction qui rend une valeur décodée acceptable par SQLite : les listes (PGN 126464...) sont mises en texte. ---------
+def valeur_sqlite(valeur):
+    if valeur is None or isinstance(valeur, (int, float, str, bytes)):
+        return valeur
+    if isinstance(valeur, (list, tuple)):
+        return ", ".join(str(element) for element in valeur)
+    return str(valeur)
+
+
+# ================================================== Classe BaseSQLite =================================================
+class BaseSQLite:
+    def __init__(self, chemin, taille_lot=SQLITE_TAILLE_LOT, delai=SQLITE_DELAI_S):
+        self.chemin = chemin
+        self._taille_lot = taille_lot
+        self._delai = delai
+
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA synchronous=NORMAL")
+        self._connexion.execute("CREATE TABLE IF NOT EXISTS messages "
+                                "(pgn INTEGER PRIMARY KEY, nom_table TEXT, titre TEXT)")
+        self._connexion.commit()
+
+        self._colonnes = {}     # PGN -> colonnes déjà créées dans sa table
+        self._attente = {}      # (PGN, colonnes) -> lignes en attente
+        self._nombre_attente = 0
+        self._derniere_ecriture = time.monotonic()
+        self._abonnements = []
+
+        # Compteurs.
+        self.inserees = 0
+        self.rejetees = 0
+        self.transactions = 0
+
+    # Méthode qui crée la table d'un PGN, ou lui ajoute les colonnes qui manquent. -------------------------------------
+    def _table(self, pgn, noms, titre=None):
+        colonnes = self._colonnes.get(pgn)
+        table = identifiant(f"pgn_{pgn}")
+        if colonnes is None:
+            self._connexion.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                                    f"(horodatage INTEGER, date REAL, source INTEGER)")
+            for colonne in ("horodatage", "date", "source"):
+                self._connexion.execute(f"CREATE INDEX IF NOT EXISTS {identifiant(f'pgn_{pgn}_{colonne}')} "
+                                        f"ON {table} ({colonne})")
+            if titre is None and pgn in PGN_DEFINITIONS:
+                titre = PGN_DEFINITIONS[pgn].titre
+            self._connexion.execute("INSERT OR IGNORE INTO messages VALUES (?, ?, ?)", (pgn, f"pgn_{pgn}", titre))
+            colonnes = [ligne[1] for ligne in self._connexion.execute(f"PRAGMA table_info({table})")]
+            self._colonnes[pgn] = colonnes
+
+        for nom in noms:
+            if nom not in colonnes:
+                self._connexion.execute(f"ALTER TABLE {table} ADD COLUMN {identifiant(nom)}")
+                colonnes.append(nom)
+
+    # Méthode qui ajoute un message décodé (un "Decodage"). ------------------------------------------------------------
+    def ajouter(self, decodage, source, horodatage=None, date=None):
+        if decodage.trame is not None or not decodage.valeurs:
+            return
+        valeurs = valeurs_nommees(decodage)
+        noms = tuple(valeurs)
+        self._table(decodage.pgn, noms, decodage.titre)
+        self._attente.setdefault((decodage.pgn, noms), []).append((horodatage, date, source,
+                                                                   *map(valeur_sqlite, valeurs.values())))
+        self._nombre_attente += 1
+        if self._nombre_attente >= self._taille_lot or time.monotonic() - self._derniere_ecriture >= self._delai:
+            self.vider()
+
+    # Méthode qui ajoute des colonnes décodées par lots pour un PGN. ---------------------------------------------------
+    def ajouter_lot(self, pgn, noms, colonnes, horodatage, source, date=None):
+        self._table(pgn, noms)
+        lignes = zip(np.asarray(horodatage).tolist(), [date] * len(source), np.asarray(source).tolist(),
+                     *(np.asarray(colonne).tolist() for colonne in colonnes))
+        self._attente.setdefault((pgn, tuple(noms)), []).extend(lignes)
+        self._nombre_attente += len(source)
+        if self._nombre_attente >= self._taille_lot:
+            self.vider()
+
+    # Méthode qui écrit toutes les lignes en attente dans une seule transaction. ---------------------------------------
+    # Si la transaction échoue, le lot est abandonné (et compté) : le garder ferait échouer toutes les écritures
+    # suivantes.
+    def vider(self):
+        if not self._attente:
+            return
+        attente, nombre = self._attente, self._nombre_attente
+        self._attente = {}
+        self._nombre_attente = 0
+        self._derniere_ecriture = time.monotonic()
+        try:
+            with self._connexion:
+                for (pgn, noms), lignes in attente.items():
+                    colonnes = ", ".join(identifiant(nom) for nom in ("horodatage", "date", "source", *noms))
+                    marques = ", ".join("?" * (len(noms) + 3))
+                    self._connexion.executemany(f"INSERT INTO {identifiant(f'pgn_{pgn}')} ({colonnes}) "
+                                                f"VALUES ({marques})", lignes)
+        except sqlite3.Error as e:
+            self.rejetees += nombre
+            print(f"Base SQLite : {nombre} lignes abandonnées ({e}).")
+            return
+        self.inserees += nombre
+        self.transactions += 1
+
+    # Méthode qui écrit ce qui reste et ferme la base. -----------------------------------------------------------------
+    def fermer(self):
+        try:
+            self.vider()
+        finally:
+            self._connexion.close()
+
+    # Méthode pour exécuter une requête de lecture. --------------------------------------------------------------------
+    def requete(self, sql, parametres=()):
+        self.vider()
+        return self._connexion.execute(sql, parametres).fetchall()
+
+    # ================================== Temps réel ====================================================================
+    # Méthode qui abonne la base aux PGN voulus du décodeur temps réel (tous les PGN connus par défaut). ---------------
+    def abonner(self, nmea_2000, pgns=None):
+        for pgn in (PGN_DEFINITIONS if pgns is None else pgns):
+            nmea_2000.abonner(pgn, self._recevoir)
+            self._abonnements.append((nmea_2000, pgn))
+
+    # Méthode qui désabonne la base du décodeur temps réel. ------------------------------------------------------------
+    def desabonner(self):
+        for nmea_2000, pgn in self._abonnements:
+            nmea_2000.desabonner(pgn, self._recevoir)
+        self._abonnements = []
+        self.vider()
+
+    # Méthode appelée par le décodeur temps réel pour chaque message décodé. -------------------------------------------
+    def _recevoir(self, decodage, source, horodatage):
+        self.ajouter(decodage, source, horodatage, time.time())
+
+    # Méthode qui retourne les compteurs. ------------------------------------------------------------------------------
+    def statistiques(self):
+        return {"tables": len(self._colonnes),
+                "inserees": self.inserees,
+                "rejetees": self.rejetees,
+                "en_attente": self._nombre_attente,
+                "transactions": self.transactions}
+# ============================================= FIN DE LA CLASSE BaseSQLite ============================================
+
+
+# Fonction qui supprime une base SQLite avec ses fichiers du mode WAL. -------------------------------------------------
+def supprimer_base(chemin_base):
+    for suffixe in ("", "-wal", "-shm"):
+        supprimer(chemin_base + suffixe)
+
+
+# Fonction qui exporte les lignes "debut" à "debut + nombre" du fichier dans une base SQLite. --------------------------
+# La base obtenue remplace "chemin_base" s'il existe : les lignes ne s'ajoutent pas à celles d'un export précédent.
+def exporter_sqlite(chemin, chemin_base, debut, nombre, progression=None, annulation=None,
+                    taille_lot=EXPORT_TAILLE_LOT):
+    chemin_partiel = chemin_base + ".partiel"
+    supprimer_base(chemin_partiel)      # Reste d'un export interrompu
+    try:
+        bilan = _exporter_sqlite(chemin, chemin_partiel, debut, nombre, progression, annulation, taille_lot)
+    except BaseException:
+        supprimer_base(chemin_partiel)
+        raise
+    if bilan.annule:
+        supprimer_base(chemin_partiel)
+        return bilan
+
+    # Les fichiers WAL de l'ancienne base ne doivent pas être appliqués à la nouvelle.
+    supprimer(chemin_base + "-wal")
+    supprimer(chemin_base + "-shm")
+    os.replace(chemin_partiel, chemin_base)
+    return bilan
+
+
+def _exporter_sqlite(chemin, chemin_base, debut, nombre, progression, annulation, taille_lot):
+    base = BaseSQLite(chemin_base, taille_lot=taille_lot)
+    contexte = ContexteDecodage()
+    messages = np.array(sorted(DECODEURS_MESSAGES))
+    lignes = 0
+    erreurs = 0
+
+    try:
+        for lues, trames in lots_trames(chemin, debut, nombre, taille_lot):
+            if annulation is not None and annulation.is_set():
+                print(f"Export annulé après {lignes} lignes.")
+                return BilanExport(lignes, erreurs, True)
+
+            resultat = decoder_lot(trames.ids, trames.octets, trames.longueurs)
+
+            # PGN sur une seule trame : les colonnes sont prises directement dans le résultat du lot.
+            for numero, definition in DEFINITIONS_LOT.items():
+                trouvees = resultat.pgn == numero
+                choix = np.flatnonzero(trouvees & resultat.decode)
+                erreurs += int(np.count_nonzero(trouvees)) - len(choix)    # Trames trop courtes
+                if not len(choix):
+                    continue
+                noms = []
+                colonnes = []
+                colonne = 0
+                for c in definition.champs:
+                    if c.table is not None:
+                        noms.append(c.nom)
+                        colonnes.append(resultat.table[choix])
+                    elif colonne < 3:
+                        noms.append(c.nom)
+                        colonnes.append(resultat.valeurs[choix, colonne])
+                        colonne += 1
+                base.ajouter_lot(numero, noms, colonnes, trames.horodatage[choix], resultat.source[choix])
+
+            # PGN sur plusieurs trames : réassemblés, puis une ligne par message complet.
+            for i in np.flatnonzero(np.isin(resultat.pgn, messages)):
+                try:
+                    decodage = contexte.trame(int(resultat.pgn[i]), int(resultat.source[i]),
+                                              trames.octets[i, :trames.longueurs[i]].tolist(),
+                                              int(trames.horodatage[i]))
+                except (ValueError, IndexError):
+                    erreurs += 1
+                    continue
+                base.ajouter(decodage, int(resultat.source[i]), int(trames.horodatage[i]))
+
+            lignes += lues
+            if progression is not None:
+                progression(lignes)
+    finally:
+        base.fermer()
+
+    if erreurs:
+        print(f"Export terminé : {erreurs} trames n'ont pas pu être décodées.")
+    return BilanExport(lignes, erreurs, False)
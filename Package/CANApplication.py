@@ -1,5 +1,6 @@
 import asyncio
 import os
+import sys
 import ctypes
 
 from PyQt5 import uic
@@ -8,7 +9,20 @@ from PyQt5.QtWidgets import QMessageBox, QMainWindow, QTreeWidget, QTreeWidgetIt
 from PyQt5.QtGui import QIcon
 
 from Package.constante import *
-from Package.CAN_dll import CANDll
+from Package.CAN_dll import CanError
+from Package.InterfacesCAN import creer_interface, INTERFACE_DEFAUT
+from Package.Acquisition import Acquisition
+from Package.Rejeu import Rejeu, FinRejeu
+
+# Fonction qui autorise ou interdit la mise en veille du PC pendant la lecture (seulement sous Windows). ---------------
+def autoriser_veille(autorisee):
+    if sys.platform != "win32":
+        return
+    if autorisee:
+        ctypes.windll.kernel32.SetThreadExecutionState(ES_CONTINUOUS)
+    else:
+        ctypes.windll.kernel32.SetThreadExecutionState(ES_CONTINUOUS | ES_SYSTEM_REQUIRED | ES_DISPLAY_REQUIRED)
+
 
 # ****************************************** CLASSE POUR LA LECTURE DU BUS CAN *****************************************
 class CANApplication(QMainWindow):
@@ -36,7 +50,11 @@ class CANApplication(QMainWindow):
         # Charger le fichier .ui
         uic.loadUi(ui_path, self)
 
-        self._can_interface = CANDll(self._stop_flag)
+        # Interface du bus CAN choisie (CANUSB, SocketCAN, Simulation), créée à l'ouverture.
+        self.nom_interface = INTERFACE_DEFAUT
+        self._options_interface = {}
+        self._acquisition = None    # Thread de lecture du bus et sa file, pendant la lecture.
+        self.filtre = None          # PlanFiltre des PGN voulus (None = toutes les trames), appliqué à l'ouverture.
 
         # Gestion des tâches asynchrones et état
         self._handle = handle  # Handle CAN
@@ -76,34 +94,49 @@ class CANApplication(QMainWindow):
                                   stop_enabled=True)
 
         # Interdit de se mettre en veille
-        ctypes.windll.kernel32.SetThreadExecutionState(
-            self.ES_CONTINUOUS | self.ES_SYSTEM_REQUIRED | self.ES_DISPLAY_REQUIRED
-        )
+        autoriser_veille(False)
 
         self._stop_flag = False
+        # Un seul thread lit le bus pendant toute la lecture, les trames arrivent ici par lots.
+        self._acquisition = Acquisition(self._can_interface)
+        self._acquisition.demarrer()
         while not self._stop_flag:
             try:
-                # Lecture bloquante déplacée dans un thread, avec un timeout
-                msg = await asyncio.wait_for(
-                    asyncio.to_thread(self._can_interface.read_dll, self._stop_flag),
-                    timeout=2.0
-                )
-
-                if msg:  # Si une trame est reçue
-                    n += 1
-                    self.lab_connection.setText(str(n))  # Mise à jour du nombre de trames reçues.
-
-                    # Appeler la méthode du traitement en TempsReel.
-                    await self._temps_reel.TempsReel(
-                        msg,
+                lot = await self._acquisition.lire_lot()
+
+                # Le filtre de l'adaptateur laisse passer un peu trop de trames : on garde les PGN voulus exactement.
+                if self.filtre is not None:
+                    lot = self.filtre.filtrer_lot(lot)
+
+                if lot:  # Si des trames sont reçues
+                    # Appeler la méthode du traitement en TempsReel, pour tout le lot.
+                    self._temps_reel.traiter_lot(
+                        lot,
                         self._file_path,
                         self.check_file.isChecked(),
                         self.check_buffer.isChecked(),
                         self.check_nmea.isChecked(),
                         self._main_window)  # On lui fait passer le MainWindow().
 
+                    n += len(lot)
+                    # Mise à jour du nombre de trames reçues, et des trames perdues si la file a débordé.
+                    if self._acquisition.perdues:
+                        self.lab_connection.setText(f"{n} (perdues : {self._acquisition.perdues})")
+                    else:
+                        self.lab_connection.setText(str(n))
+
+            except FinRejeu as e:
+                # Toutes les trames du fichier ont été rejouées.
+                print(e)
+                self._stop_flag = True
+                self.lab_connection.setText(f"Rejeu terminé : {n} trames, "
+                                            f"{self._can_interface.statistiques()['trames_par_seconde']:.0f} trames/s.")
+                self.update_action_states(open_enabled=False,
+                                          read_enabled=False,
+                                          close_enabled=True,
+                                          stop_enabled=False)
             except asyncio.TimeoutError:
-                print("Aucune trame reçue depuis 1 seconde... Arrêt en cours.")
+                print(f"Aucune trame reçue depuis {ACQUISITION_DELAI_S} secondes... Arrêt en cours.")
                 self._stop_flag = True  # Arrêter la boucle si dépassement de temps
                 self.lab_connection.setText("Il n'y a pas de trames arrivées.\nVérifiez que vous êtes bien raccordé. ")
                 # Défini les boutons actifs ou desactifs.
@@ -114,12 +147,16 @@ class CANApplication(QMainWindow):
             except Exception as e:
                 print(f"Erreur pendant la lecture CAN : {e}")
                 print(f"actionOpen attachée à : {self.actionOpen.associatedWidgets()}")
-
-        print("Tâche read() terminée.")
+                if not self._acquisition.en_cours:
+                    self._stop_flag = True  # Le thread de lecture s'est arrêté sur cette erreur.
+
+        self._acquisition.arreter()
+        print(f"Tâche read() terminée : {self._acquisition.statistiques()}")
+        self._acquisition = None
+        # Ecrit sur le disque les trames encore en attente et ferme le fichier.
+        self._temps_reel.arreter_enregistrement()
         # Réautorise la mise en veille
-        ctypes.windll.kernel32.SetThreadExecutionState(
-            self.ES_CONTINUOUS
-        )
+        autoriser_veille(True)
 
     # Méthode pour lancer le Read de manière asynchrone ----------------------------------------------------------------
     async def main(self):
@@ -181,16 +218,47 @@ class CANApplication(QMainWindow):
                                   stop_enabled=False)
 
         self._stop_flag = True
+        self.arreter_acquisition()
+
+    # Méthode qui arrête le thread de lecture du bus, la boucle de lecture se termine aussitôt. ------------------------
+    def arreter_acquisition(self):
+        if self._acquisition is not None:
+            self._acquisition.arreter()
+
+    # Méthode qui choisit l'interface du bus CAN utilisée à la prochaine ouverture. ------------------------------------
+    def choisir_interface(self, nom, **options):
+        if self._handle == 256:
+            self.on_click_close()
+        self.nom_interface = nom
+        self._options_interface = options
+        self._can_interface = None
+
+    # Méthode qui choisit le filtre des PGN voulus (None = toutes les trames), appliqué à la prochaine ouverture. ------
+    def choisir_filtre(self, plan):
+        if self._handle == 256:
+            self.on_click_close()
+        self.filtre = plan
 
     # Méthode pour ouvrir l'adaptateur CANUSB. -------------------------------------------------------------------------
     def on_click_open(self) -> int:
-        print("C'est en cours de l'ouverture de l'adaptateur CANUSB.")
+        print(f"C'est en cours de l'ouverture de l'interface {self.nom_interface}.")
         self.setCursor(Qt.CursorShape.WaitCursor)
         # Appelle cette fonction de manière explicite et la fait passer sur "interface".
-        self._handle = self._can_interface.open(CAN_BAUD_250K,
-                                                CANUSB_ACCEPTANCE_CODE_ALL,
-                                                CANUSB_ACCEPTANCE_MASK_ALL,
-                                                CANUSB_FLAG_TIMESTAMP)
+        try:
+            if self._can_interface is None:
+                self._can_interface = creer_interface(self.nom_interface, **self._options_interface)
+            if self.filtre is None:
+                code, masque = CANUSB_ACCEPTANCE_CODE_ALL, CANUSB_ACCEPTANCE_MASK_ALL
+            else:
+                code, masque = self.filtre.acceptance_code, self.filtre.acceptance_mask
+                print(f"Filtre d'acceptation : {self.filtre}")
+            self._handle = self._can_interface.open(CAN_BAUD_250K,
+                                                    code,
+                                                    masque,
+                                                    CANUSB_FLAG_TIMESTAMP)
+        except CanError as e:
+            print(f"Erreur ouverture de l'interface {self.nom_interface} : {e}")
+            self._handle = None
         print(f"Résultat de l'appel : {self._handle}")
         if self._handle:  # Si l'adaptateur est ouvert.
             self.update_action_states(open_enabled=False,
@@ -209,7 +277,11 @@ class CANApplication(QMainWindow):
     def on_click_close(self) -> None:
         self.setCursor(Qt.CursorShape.WaitCursor)
         self._stop_flag = True
+        # Le thread de lecture est arrêté avant de fermer l'interface qu'il utilise.
+        self.arreter_acquisition()
+        self._temps_reel.arreter_enregistrement()
         if self._handle == 256:
+            print(f"Débit de l'interface : {self._can_interface.debit()}")
             self._can_interface.close()  # Ferme l'adaptateur
             print("C'est complétemet arrêté, sur le bouton de fermeture")
             # Met les boutons dans l'état voulu
@@ -219,10 +291,25 @@ class CANApplication(QMainWindow):
                                       stop_enabled=False)
             self._handle = None
 
+        # Après un rejeu, on revient sur l'interface choisie.
+        if isinstance(self._can_interface, Rejeu):
+            self._can_interface = None
         self.lab_connection.setText("")
         self.unsetCursor()
         return None
 
+    # Méthode qui rejoue un fichier enregistré à la place de l'adaptateur, puis lance la lecture. ---------------------
+    def rejouer(self, chemin, vitesse=1.0):
+        if self._handle == 256:
+            self.on_click_close()
+        self._can_interface = Rejeu(chemin, vitesse)
+        self._handle = self._can_interface.open()
+        self.update_action_states(open_enabled=False,
+                                  read_enabled=True,
+                                  close_enabled=True,
+                                  stop_enabled=False)
+        self.on_click_read()
+
     def on_click_status(self):
         try:
             self._status = self._can_interface.status()
@@ -1,6 +1,9 @@
 import ctypes
+import time
 from ctypes import Structure, c_ubyte,c_long, c_int, POINTER, Array
 
+from Package.constante import ATTENTE_ACTIVE_S, ATTENTE_MIN_S, ATTENTE_MAX_S
+
 class CanData(Array):
     _type_ = c_ubyte
     _length_ = 8
@@ -19,6 +22,52 @@ class CanMsg(Structure):
 class CanError(Exception):
     pass
 
+
+# Fonction qui indique si l'arrêt est demandé : "stop_flag" est un threading.Event (ou un booléen, comme avant). -------
+def arret_demande(stop_flag):
+    return stop_flag.is_set() if hasattr(stop_flag, "is_set") else bool(stop_flag)
+
+
+# ================================================= Classe Temporisation ===============================================
+# Attente entre deux lectures sans trame : relectures immédiates pendant "active" secondes après la dernière trame,
+# puis des pauses de plus en plus longues (doublées à chaque fois, jusqu'à "maximum").
+# Dès qu'une trame arrive, on revient aux relectures immédiates.
+# Bus chargé : pas de pause, pas de latence. Bus calme : le processeur dort presque tout le temps.
+class Temporisation:
+    __slots__ = ("active", "minimum", "maximum", "_derniere", "_pause", "pauses")
+
+    def __init__(self, active=ATTENTE_ACTIVE_S, minimum=ATTENTE_MIN_S, maximum=ATTENTE_MAX_S):
+        self.active = active
+        self.minimum = minimum
+        self.maximum = maximum
+        self._derniere = time.perf_counter()
+        self._pause = minimum
+        self.pauses = 0         # Nombre de pauses faites, pour les statistiques.
+
+    # Méthode appelée quand une trame est reçue. -----------------------------------------------------------------------
+    def reinitialiser(self):
+        self._derniere = time.perf_counter()
+        self._pause = self.minimum
+
+    # Méthode appelée après une lecture sans trame. "arret" (threading.Event) interrompt la pause aussitôt. ------------
+    # "limite" (time.perf_counter) est l'heure à ne pas dépasser.
+    def attendre(self, arret=None, limite=None):
+        maintenant = time.perf_counter()
+        if maintenant - self._derniere < self.active:
+            return
+        pause = self._pause
+        if limite is not None:
+            pause = min(pause, limite - maintenant)
+            if pause <= 0:
+                return
+        if hasattr(arret, "wait"):
+            arret.wait(pause)
+        else:
+            time.sleep(pause)
+        self.pauses += 1
+        self._pause = min(self._pause * 2, self.maximum)
+# ============================================= FIN DE LA CLASSE Temporisation =========================================
+
 # ================================================== Classe Interface dll ==============================================
 class CANDll:
     def __init__(self, stop_flag):
@@ -47,6 +96,7 @@ class CANDll:
         # Il y en a d'autres, mais pour l'instant ne sont pas utiles
 
         self._handle = None
+        self._temporisation = Temporisation()
 
     # Méthode d'ouverture de l'adaptateur. Cette fonction est appelé par le bouton "OPEN".------------------------------
     def open(self, bitrate, acceptance_code, acceptance_mask, flags):
@@ -57,37 +107,23 @@ class CANDll:
         else:
             return self._handle     # Retourne le handle dont on a besoin pour savoir si c'est ouvert
 
-    # Méthode de lecture des trames du bus CAN en asychrone.------------------------------------------------------------
-    def read_dll(self, stop_flag) -> CanMsg:       # Retourne un pointeur sur le CanMsg
+    # Méthode qui lit une seule fois l'adaptateur dans un CanMsg déjà alloué : True si une trame a été reçue. ----------
+    def read_dans(self, msg):
         if self._handle is None:
-           raise CanError("Channel not open")
-
-        self._msg = CanMsg()     # Défini le format
-
-        # Boucle pour attendre les trames CAN.
-        while not stop_flag:
-            if self._handle is None:
-                self._handle = 0    # Marquer le handle en entier comme inactif
-
-            if stop_flag:
-                return self._msg
-
-            result = self._dll.canusb_Read( self._handle,ctypes.byref(self._msg))
-
-            # Résultat du CAN : on sort si une trame a été reçue : result == 1.
-            # Sinon il a des valeurs négatives qui représente différent défaut,
-            # dont le -7 qui indtque qu'il n'a pas reçu de tramrs.
-            if result <= -2 and result != -7:
-                # On ne traite pas les défauts, mais on le signale.
-                print("Défaut CAN : ", str(result))
-                # Affiche la fenêtre Status
-                # main_window.on_click_status()
-
-            if result == 1: # C'est qu'on a reçu un msg.
-                break
-
-        # Une fois une trame reçue, on la retourne
-        return self._msg  # Retourne le CanMsg dont on aura besoin pour l'enregistrer
+            raise CanError("Channel not open")
+
+        result = self._dll.canusb_Read(self._handle, ctypes.byref(msg))
+        if result == 1:
+            self._temporisation.reinitialiser()
+            return True
+        # Les valeurs négatives sont des défauts, sauf le -7 qui indique qu'il n'y a pas de trame reçue.
+        if result <= -2 and result != -7:
+            print("Défaut CAN : ", str(result))
+        return False
+
+    # Méthode qui attend avant la prochaine lecture, suivant le temps passé sans trame. --------------------------------
+    def attendre(self, arret=None, limite=None):
+        self._temporisation.attendre(arret, limite)
 
     # Méthode de fermeture de l'adaptateur. ----------------------------------------------------------------------------
     def close(self):
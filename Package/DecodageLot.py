@@ -0,0 +1,215 @@
+from collections import namedtuple
+
+import numpy as np
+
+from Package.DefinitionsPGN import PGN_DEFINITIONS
+from Package.NMEA_2000 import CACHE_ID
+
+# **********************************************************************************************************************
+#       Décodage NMEA 2000 par lots avec NumPy : les trames d'un fichier sont traitées en tableaux, pas ligne à ligne
+# **********************************************************************************************************************
+
+# Trames lues dans un fichier texte, sous forme de tableaux.
+TramesLot = namedtuple("TramesLot", ("horodatage",   # TimeStamp de chaque trame
+                                     "ids",          # Identifiant CAN 29 bits
+                                     "longueurs",    # Nombre d'octets déclarés
+                                     "octets",       # Matrice N x 8 des octets (uint8)
+                                     "invalides"))   # Nombre de lignes ignorées
+
+# Résultat du décodage d'un lot de trames.
+ResultatLot = namedtuple("ResultatLot", ("pgn", "source", "destination", "priorite",
+                                         "valeurs",     # Matrice N x 3 des valeurs (NaN si non disponible)
+                                         "table",       # Valeur brute de la colonne "Table" (-1 si absente)
+                                         "decode"))     # True pour les lignes décodées par le lot
+
+# Seuls les PGN sur une seule trame sont décodés par lots, les autres passent par NMEA2000.octets.
+DEFINITIONS_LOT = {pgn: definition for pgn, definition in PGN_DEFINITIONS.items() if definition.trames is None}
+
+
+# Fonction qui retourne le nombre d'octets lus par le décodeur d'une trame (voir DefinitionsPGN.compiler_champs). ------
+# Les champs de texte sont lus par tranche : ils ne comptent pas.
+def longueur_lue(definition):
+    tables = [c for c in definition.champs if c.table is not None]
+    champs = [c for c in definition.champs if c.table is None and not c.texte] + tables[:1]
+    return max((c.octet + (c.decalage + c.bits + 7) // 8 for c in champs), default=0)
+
+
+# Nombre d'octets que doit avoir une trame pour être décodée par lots.
+LONGUEURS_LOT = {pgn: longueur_lue(definition) for pgn, definition in DEFINITIONS_LOT.items()}
+
+
+# ===================================== LECTURE DES TRAMES EN TABLEAUX =================================================
+# Fonction qui transforme les lignes "TimeStamp ID Len XX XX ..." en tableaux. -----------------------------------------
+def lire_lignes(lignes):
+    lire_id = CACHE_ID.texte    # Les identifiants en hexadécimal ne sont convertis qu'une fois.
+    n = len(lignes)
+    horodatage = np.zeros(n, dtype=np.int64)
+    ids = np.zeros(n, dtype=np.uint32)
+    longueurs = np.zeros(n, dtype=np.uint8)
+    tampon = bytearray(8 * n)
+    valides = np.ones(n, dtype=bool)
+
+    for i, ligne in enumerate(lignes):
+        champs = ligne.split()
+        try:
+            longueur = int(champs[2])
+            brut = bytes.fromhex("".join(champs[3:3 + longueur]))
+            horodatage[i] = int(champs[0])
+            ids[i] = lire_id(champs[1])[0]
+        except (ValueError, IndexError):
+            valides[i] = False
+            continue
+        longueurs[i] = min(len(brut), 8)
+        tampon[8 * i:8 * i + len(brut[:8])] = brut[:8]
+
+    octets = np.frombuffer(tampon, dtype=np.uint8).reshape(n, 8)
+    invalides = n - int(valides.sum())
+    if invalides:
+        print(f"Lignes invalides ignorées : {invalides}")
+        return TramesLot(horodatage[valides], ids[valides], longueurs[valides], octets[valides], invalides)
+    return TramesLot(horodatage, ids, longueurs, octets, 0)
+
+
+# Fonction qui lit seulement l'identifiant des lignes, sans retirer les lignes invalides : retourne (ids, valides). ----
+def lire_ids(lignes):
+    lire_id = CACHE_ID.texte
+    ids = np.zeros(len(lignes), dtype=np.uint32)
+    valides = np.ones(len(lignes), dtype=bool)
+    for i, ligne in enumerate(lignes):
+        try:
+            ids[i] = lire_id(ligne.split(None, 2)[1])[0]
+        except (ValueError, IndexError):
+            valides[i] = False
+    return ids, valides
+
+
+# ========================================= DECODAGE DES IDENTIFIANTS ==================================================
+# Fonction qui retourne PGN, source, destination et priorité d'un tableau d'identifiants. -----------------------------
+def decoder_id_lot(ids):
+    ids = np.asarray(ids, dtype=np.uint32)
+    pf = (ids >> 16) & 0xFF
+    ps = (ids >> 8) & 0xFF
+    dp = (ids >> 24) & 0x03
+    point_a_point = pf < 240    # Si PF < 240, c'est un message point à point
+
+    pgn = (dp << 16) | (pf << 8) | np.where(point_a_point, 0, ps)
+    source = ids & 0xFF
+    destination = np.where(point_a_point, ps, pf)
+    priorite = (ids >> 26) & 0x07
+    return pgn.astype(np.int64), source, destination, priorite
+
+
+# ============================================ DECODAGE DES OCTETS =====================================================
+# Fonction qui extrait la valeur brute d'un champ sur toutes les lignes. -----------------------------------------------
+def brut_lot(octets, c):
+    nombre_octets = (c.decalage + c.bits + 7) // 8
+    brut = np.zeros(len(octets), dtype=np.int64)
+    for i in range(nombre_octets):
+        brut |= octets[:, c.octet + i].astype(np.int64) << (8 * i)
+    if c.decalage:
+        brut >>= c.decalage
+    return brut & ((1 << c.bits) - 1)
+
+
+# Fonction qui calcule la valeur d'un champ sur toutes les lignes (NaN si non disponible). ----------------------------
+def valeur_lot(octets, c):
+    brut = brut_lot(octets, c)
+    indisponible = brut == c.indisponible if c.indisponible is not None else None
+    if c.signe:
+        brut = np.where(brut & (1 << (c.bits - 1)), brut - (1 << c.bits), brut)
+    valeur = brut * float(c.echelle) + c.ajout
+    if indisponible is not None:
+        valeur[indisponible] = np.nan
+    return valeur
+
+
+# Fonction qui décode un lot de trames : identifiants et PGN sur une seule trame. --------------------------------------
+# Une trame plus courte que les champs de son PGN n'est pas décodée par le lot ("decode" à False) : comme avec le
+# décodeur trame par trame, elle finit en erreur au lieu d'être lue avec des octets à zéro.
+def decoder_lot(ids, octets, longueurs=None):
+    octets = np.asarray(octets, dtype=np.uint8)
+    pgn, source, destination, priorite = decoder_id_lot(ids)
+    n = len(pgn)
+    valeurs = np.full((n, 3), np.nan)
+    table = np.full(n, -1, dtype=np.int64)
+    decode = np.zeros(n, dtype=bool)
+
+    for numero, definition in DEFINITIONS_LOT.items():
+        lignes = np.flatnonzero(pgn == numero)
+        if longueurs is not None:
+            lignes = lignes[longueurs[lignes] >= LONGUEURS_LOT[numero]]
+        if not len(lignes):
+            continue
+        selection = octets[lignes]
+        colonne = 0
+        for c in definition.champs:
+            if c.table is not None:
+                table[lignes] = brut_lot(selection, c)
+            elif colonne < 3:
+                valeurs[lignes, colonne] = valeur_lot(selection, c)
+                colonne += 1
+        decode[lignes] = True
+
+    return ResultatLot(pgn, source, destination, priorite, valeurs, table, decode)
+
+
+# ======================================= MISE EN FORME POUR LE CSV ====================================================
+# Fonction qui met en texte une colonne de valeurs suivant le format du champ. -----------------------------------------
+def textes_lot(valeurs, c):
+    forme = "%d" if c.decimales is None else "%%.%df" % c.decimales
+    absentes = np.isnan(valeurs)
+    textes = np.char.mod(forme, np.where(absentes, 0, valeurs)).astype(object)
+    textes[absentes] = "None"
+    return textes
+
+
+# Fonction qui retourne les lignes du CSV NMEA 2000 pour un lot de trames. ---------------------------------------------
+# Les lignes non décodées par le lot (plusieurs trames, PGN inconnus) sont confiées, dans l'ordre du fichier,
+# à "decodeur(pgn, source, octets, horodatage)" qui retourne un "Decodage".
+# Les erreurs de décodage sont passées à "sur_erreur(index, pgn, erreur)", ou affichées par défaut.
+def lignes_csv(trames, resultat, decodeur, sur_erreur=None):
+    n = len(resultat.pgn)
+    # Colonnes dans l'ordre du CSV : PGN1, Valeur, PGN2, Valeur, PGN3, Valeur, Table, Définition.
+    colonnes = np.full((n, 8), "None", dtype=object)
+
+    for numero, definition in DEFINITIONS_LOT.items():
+        lignes = np.flatnonzero((resultat.pgn == numero) & resultat.decode)
+        if not len(lignes):
+            continue
+        colonne = 0
+        for c in definition.champs:
+            if c.table is not None:
+                valeurs_table = resultat.table[lignes]
+                colonnes[lignes, 6] = valeurs_table.astype(str).astype(object)
+                for valeur in np.unique(valeurs_table):
+                    colonnes[lignes[valeurs_table == valeur], 7] = str(c.table.get(int(valeur)))
+            elif colonne < 3:
+                colonnes[lignes, 2 * colonne] = c.nom
+                colonnes[lignes, 2 * colonne + 1] = textes_lot(resultat.valeurs[lignes, colonne], c)
+                colonne += 1
+
+    # Les autres lignes sont décodées une par une, dans l'ordre du fichier.
+    # Un message complet peut avoir plus de colonnes que l'en-tête, elles sont ajoutées au bout de la ligne.
+    longues = {}
+    for i in np.flatnonzero(~resultat.decode):
+        try:
+            octets = trames.octets[i, :trames.longueurs[i]].tolist()
+            valeurs = decodeur(int(resultat.pgn[i]), int(resultat.source[i]),
+                               octets, int(trames.horodatage[i])).colonnes()
+        except (ValueError, IndexError) as e:
+            if sur_erreur is None:
+                print(f"Erreur dans le traitement NMEA 2000 à l'index {i}, PGN: {resultat.pgn[i]} : {e}")
+            else:
+                sur_erreur(i, int(resultat.pgn[i]), e)
+            continue
+        colonnes[i, :min(len(valeurs), 8)] = valeurs[:8]
+        if len(valeurs) > 8:
+            longues[i] = valeurs[8:]
+
+    ids = zip(resultat.pgn.astype(str), resultat.source.astype(str), resultat.destination.astype(str),
+              resultat.priorite.astype(str))
+    for i, (pgn, source, destination, priorite) in enumerate(ids):
+        ligne = (pgn, source, destination, priorite, *colonnes[i])
+        if i in longues:
+            ligne += tuple(longues[i])
+        yield ligne
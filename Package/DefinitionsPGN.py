@@ -0,0 +1,470 @@
+import math
+from collections import namedtuple
+
+from Package.constante import *
+
+# **********************************************************************************************************************
+#       Définitions déclaratives des PGN NMEA 2000, compilées une seule fois au démarrage en fonctions de décodage
+# **********************************************************************************************************************
+
+# Conversions utilisées dans les définitions.
+NOEUDS = 0.01 * 1.94384449          # Vitesse en 0,01 m/s vers les noeuds.
+DEGRES = 0.0001 * 180 / math.pi     # Angle en 0,0001 rad vers les degrés.
+KELVIN = -273.15                    # Température en Kelvin vers les degrés Celsius.
+
+# Valeur par défaut de "indisponible" : calculée suivant la taille et le signe du champ.
+AUTO = object()
+
+# Un champ est défini par sa position dans les octets de la trame.
+Champ = namedtuple("Champ", ("nom",             # Libellé affiché (PGN1, PGN2, PGN3)
+                             "octet",           # Premier octet du champ dans la trame
+                             "bits",            # Nombre de bits du champ
+                             "decalage",        # Décalage en bits dans le premier octet
+                             "signe",           # True si le champ est signé (complément à deux)
+                             "echelle",         # Multiplicateur appliqué à la valeur brute
+                             "ajout",           # Valeur ajoutée après l'échelle (ex. Kelvin -> °C)
+                             "unite",           # Unité de la valeur
+                             "table",           # Dictionnaire des significations (colonne "Table")
+                             "indisponible",    # Valeur brute signifiant "non disponible", ou None
+                             "decimales",       # Nombre de décimales, None pour un entier brut
+                             "texte"))          # True si les octets sont des caractères
+
+# Un PGN est défini par ses champs, ou par ses champs trame par trame pour les PGN sur plusieurs trames.
+DefinitionPGN = namedtuple("DefinitionPGN", ("titre", "champs", "trames", "masque_trame"))
+
+
+# Résultat du décodage d'une trame ou d'un message : les valeurs restent numériques,
+# elles ne sont mises en texte que pour l'affichage ou le CSV.
+class Decodage:
+    __slots__ = ("pgn", "titre", "champs", "valeurs", "table", "definition", "trame")
+
+    def __init__(self, pgn, titre, champs, valeurs, table=None, definition=None, trame=None):
+        self.pgn = pgn
+        self.titre = titre              # Titre du PGN pour les PGN sur plusieurs trames, sinon None
+        self.champs = champs            # Définitions des champs (partagées, non copiées)
+        self.valeurs = valeurs          # Valeurs numériques (ou texte), None si non disponible
+        self.table = table              # Valeur brute de la colonne "Table"
+        self.definition = definition    # Signification de la valeur de la table
+        self.trame = trame              # Numéro de trame, pour une trame seule d'un PGN sur plusieurs trames
+
+    def __repr__(self):
+        return f"Decodage({self.pgn}, {dict(zip(self.noms(), self.valeurs))}, table={self.table})"
+
+    # Méthode qui retourne les libellés des valeurs. -------------------------------------------------------------------
+    def noms(self):
+        return tuple(c.nom for c in self.champs)
+
+    # Méthode qui retourne les unités des valeurs. ---------------------------------------------------------------------
+    def unites(self):
+        return tuple(c.unite for c in self.champs)
+
+    # Méthode qui retourne la valeur d'un champ par son libellé. -------------------------------------------------------
+    def valeur(self, nom, defaut=None):
+        for c, valeur in zip(self.champs, self.valeurs):
+            if c.nom == nom:
+                return valeur
+        return defaut
+
+    # Méthode qui met en texte la valeur numéro i, suivant le nombre de décimales du champ. ----------------------------
+    def texte(self, i):
+        return formater(self.champs[i], self.valeurs[i])
+
+    # Méthode qui retourne les couples (libellé, texte) des valeurs. ---------------------------------------------------
+    def couples(self):
+        return tuple((c.nom, formater(c, valeur)) for c, valeur in zip(self.champs, self.valeurs))
+
+    # Méthode qui retourne les colonnes du CSV : PGN1, Valeur, PGN2, Valeur, PGN3, Valeur, Table, Définition. ----------
+    # Les valeurs au-delà de la troisième sont ajoutées au bout de la ligne.
+    def colonnes(self):
+        couples = self.couples()
+        if self.trame is not None:
+            couples = ((self.titre, "N° " + str(self.trame)),) + couples
+        premiers = couples[:3] + ((None, None),) * (3 - len(couples[:3]))
+        colonnes = [element for couple in premiers for element in couple]
+        colonnes.extend((self.table, self.definition))
+        colonnes.extend(element for couple in couples[3:] for element in couple)
+        return [str(element) for element in colonnes]
+
+
+# Fonction qui met en texte une valeur suivant la définition de son champ. ---------------------------------------------
+def formater(c, valeur):
+    if valeur is None or c.decimales is None or isinstance(valeur, str):
+        return str(valeur)
+    return format(valeur, ".%df" % c.decimales)
+
+
+# Fonction pour créer un champ avec les valeurs par défaut. ------------------------------------------------------------
+def champ(nom, octet, bits=16, decalage=0, signe=False, echelle=1, ajout=0, unite="", table=None,
+          indisponible=AUTO, decimales=2, texte=False):
+    if indisponible is AUTO:
+        if table is not None or bits < 8:
+            indisponible = None
+        elif signe:
+            indisponible = (1 << (bits - 1)) - 1    # Ex. 0x7FFF sur 16 bits signés
+        else:
+            indisponible = (1 << bits) - 1          # Ex. 0xFFFF sur 16 bits
+    return Champ(nom, octet, bits, decalage, signe, echelle, ajout, unite, table, indisponible, decimales, texte)
+
+
+# Fonction pour définir un PGN sur une seule trame. --------------------------------------------------------------------
+def pgn_simple(*champs):
+    return DefinitionPGN(None, champs, None, None)
+
+
+# Fonction pour définir un PGN sur plusieurs trames (fast packet), les champs sont donnés par numéro de trame. ---------
+def pgn_trames(titre, trames=None, masque_trame=0x1F):
+    return DefinitionPGN(titre, (), trames or {}, masque_trame)
+
+
+# Fonctions abrégées pour les champs les plus courants. ----------------------------------------------------------------
+def entier(nom, octet, bits=8, **kwargs):
+    return champ(nom, octet, bits, decimales=None, **kwargs)
+
+
+def texte(nom, octet, nombre_octets):
+    return champ(nom, octet, 8 * nombre_octets, texte=True, decimales=None)
+
+
+def table(octet, dictionnaire, bits=8, decalage=0, nom="Table"):
+    return champ(nom, octet, bits, decalage, table=dictionnaire, decimales=None)
+
+
+# Fonction pour définir un message complet, après réassemblage des trames. ---------------------------------------------
+def pgn_message(titre, *champs):
+    return DefinitionPGN(titre, champs, None, None)
+
+
+# ============================================= REGISTRE DES PGN =======================================================
+# Pour ajouter un PGN, il suffit d'ajouter sa définition ici.
+PGN_DEFINITIONS = {
+    # ----------------------------------------- PGN sur une seule trame -----------------------------------------------
+    129025: pgn_simple(champ("Lattitude", 0, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                       champ("Longitude", 4, 32, signe=True, echelle=1e-7, unite="°", decimales=6)),
+    130306: pgn_simple(champ("Noeuds du Vent", 1, echelle=NOEUDS, unite="Nds"),
+                       champ("Direction du vent", 3, echelle=DEGRES, unite="°"),
+                       table(5, VENT, bits=3)),
+    129026: pgn_simple(champ("COG", 2, echelle=DEGRES, unite="°"),
+                       champ("SOG", 4, echelle=NOEUDS, unite="Nds")),
+    127250: pgn_simple(champ("Heading", 1, echelle=DEGRES, unite="°"),
+                       champ("Déviation", 3, signe=True, echelle=DEGRES, unite="°"),
+                       champ("Variation", 5, signe=True, echelle=DEGRES, unite="°")),
+    128267: pgn_simple(champ("Profondeur", 1, 32, echelle=0.01, unite="m")),
+    130312: pgn_simple(champ("Température", 3, echelle=0.01, ajout=KELVIN, unite="°C"),
+                       table(2, TEMPERATURE)),
+    130316: pgn_simple(champ("Température étendue", 3, 24, echelle=0.001, ajout=KELVIN, unite="°C"),
+                       table(2, TEMPERATURE)),
+    130310: pgn_simple(champ("Température Mer", 1, echelle=0.01, ajout=KELVIN, unite="°C"),
+                       champ("Température de l'air", 3, echelle=0.01, ajout=KELVIN, unite="°C"),
+                       champ("Pression atmosphérique", 5, unite="mBar")),
+    128259: pgn_simple(champ("Vitesse surface", 1, echelle=NOEUDS, unite="Nds"),
+                       champ("Vitesse fond", 3, echelle=NOEUDS, unite="Nds"),
+                       table(5, WATER_SPEED)),
+    127508: pgn_simple(champ("Volts Batterie", 1, signe=True, echelle=0.01, unite="V"),
+                       champ("Ampères Batterie", 3, signe=True, echelle=0.1, unite="A"),
+                       champ("Température Batterie", 5, echelle=0.01, ajout=KELVIN, unite="°C")),
+    127245: pgn_simple(champ("Ordre de barre", 4, signe=True, echelle=DEGRES, unite="°")),
+    127251: pgn_simple(champ("Vitesse de rotation", 1, 32, signe=True, echelle=3.125e-8 * 180 / math.pi,
+                             unite="°/s")),
+    126993: pgn_simple(champ("Heart beat", 1, echelle=0.001, unite="s")),
+    127505: pgn_simple(champ("Niveau Réservoir", 1, signe=True, echelle=0.004, unite="%"),
+                       champ("Capacité du reservoir", 3, 32, echelle=0.1, unite="L"),
+                       table(0, RESERVOIR, bits=4, decalage=4)),
+    127258: pgn_simple(champ("Variation magnétique", 4, signe=True, echelle=DEGRES, unite="°")),
+    130314: pgn_simple(champ("Prssion atmosphérique", 3, 32, signe=True, echelle=0.001, unite="mBar"),
+                       table(2, PRESSION)),
+    129283: pgn_simple(champ("XTE", 2, 32, signe=True, echelle=0.00001, unite="km"),
+                       table(1, MODE_XTE, bits=4)),
+    59392: pgn_simple(entier("Aquittement ISO", 5, 24)),
+    59904: pgn_simple(entier("Réclame le PGN ISO", 0, 24)),
+    60160: pgn_simple(entier("Protocole de transfert ISO", 0)),
+    61184: pgn_simple(entier("Propriétaire Numeéro", 0)),
+    60416: pgn_simple(entier("Protocole de transfert ISO", 0, 4)),
+    60928: pgn_simple(entier("Code fabriquant", 2, 11, decalage=5)),
+
+    # ------------------------------- PGN sur plusieurs trames, définis trame par trame -------------------------------
+    129038: pgn_trames("AIS Posittion Class A", {
+        0: (entier("MMSI", 3, 32),),
+        1: (champ("AIS_A Latitude", 4, 32, signe=True, echelle=1e-7, unite="°", decimales=6),),
+        2: (champ("AIS_A COG", 2, echelle=DEGRES, unite="°"),
+            champ("AIS_A SOG", 4, echelle=NOEUDS, unite="Nds")),
+        3: (champ("AIS_A Heading", 2, echelle=DEGRES, unite="°"),)}),
+    129039: pgn_trames("AIS Position classe B", {
+        0: (entier("MMSI", 3, 32),),
+        1: (champ("AIS_B Latitude", 4, 32, signe=True, echelle=1e-7, unite="°", decimales=6),),
+        2: (champ("AIS_B COG", 2, echelle=DEGRES, unite="°"),
+            champ("AIS_B SOG", 4, echelle=NOEUDS, unite="Nds")),
+        3: (champ("AIS_B Heading", 2, echelle=DEGRES, unite="°"),)}),
+    129794: pgn_trames("AIS Données classe A", {
+        0: (entier("MMSI", 3, 32),),
+        1: (texte("Indicatif", 4, 4),),
+        2: (texte("Indicatif", 1, 3), texte("Nom du navire", 4, 4)),
+        3: (texte("Nom du navire", 1, 7),),
+        4: (texte("Nom du navire", 1, 7),),
+        5: (champ("Longueur", 4, echelle=0.1, unite="m"), champ("Largeur", 6, echelle=0.1, unite="m")),
+        6: (champ("Longueur", 2, echelle=0.0001 / 1.85), champ("Largeur", 4, echelle=0.0001 / 1.85)),
+        7: (texte("Destinaion", 6, 2),),
+        8: (texte("Destinaion", 1, 7),),
+        9: (texte("Destinaion", 1, 7),)}),
+    129809: pgn_trames("AIS Données classe B", {
+        0: (entier("MMSI", 3, 32), texte("Nom du navire", 7, 1)),
+        1: (texte("Nom du navire", 1, 7),),
+        2: (texte("Nom du navire", 1, 5),)}),
+    129810: pgn_trames("AIS Données classe A Part B", {
+        0: (entier("MMSI", 3, 32),),
+        2: (texte("Indicatif", 1, 7),),
+        3: (texte("Indicatif", 1, 7),)}),
+    129029: pgn_trames("Info. de positioon GNSS", {
+        4: (entier("Nombre de satélites", 7),)}),
+    129539: pgn_trames("Précision GNSS"),
+    130577: pgn_trames("Données de direction", {
+        1: (champ("COG", 1, echelle=DEGRES, unite="°"),
+            champ("SOG", 3, echelle=NOEUDS, unite="Nds"))}, masque_trame=0x0F),
+    127506: pgn_trames("Batteries détaillées", {
+        0: (entier("Etat de charge", 5), entier("Etat de santé", 6), table(4, ENERGIE_DC)),
+        1: (entier("Ah", 4, 16),)}),
+    126720: pgn_trames("Info propriétaire", {
+        0: (entier("Code propriétaire", 2),)}),
+    126464: pgn_trames("Liste des PGN", {
+        0: (entier("Num PGN", 3, 24),)}),
+    128275: pgn_trames("Journal", {
+        1: (entier("Distance parcourrue", 3, 32),)}),
+    129540: pgn_trames("Satélites en vues", {
+        0: (entier("Nombre de satélites", 5),)}),
+    129284: pgn_trames("Données Navigation"),
+    126996: pgn_trames("Information prodruit", {
+        0: (texte("Configuration", 6, 2),),
+        1: (texte("Configuration", 1, 7),),
+        2: (texte("Configuration", 1, 7),),
+        3: (texte("Configuration", 1, 7),),
+        4: (texte("Configuration", 1, 7),),
+        5: (texte("Version", 3, 5),)}),
+    126998: pgn_trames("Info Configuration", {
+        0: (texte("Configuration", 1, 6),)}),
+}
+# -------------------------- Messages complets des PGN sur plusieurs trames (après réassemblage) ----------------------
+# Les positions sont données dans les octets du message complet, sans les octets de numéro de trame et de longueur.
+
+# Fonction de décodage de la liste des PGN (126464) : une suite de numéros de PGN sur trois octets. --------------------
+CHAMPS_LISTE_PGN = (entier("Fonction", 0), entier("Liste des PGN", 1, 24))
+
+
+def liste_pgn(d):
+    fonction = "Reçus" if d[0] == 0 else "Transmis"
+    numeros = [d[i] | d[i + 1] << 8 | d[i + 2] << 16 for i in range(1, len(d) - 2, 3)]
+    return Decodage(126464, "Liste des PGN", CHAMPS_LISTE_PGN,
+                    (fonction, [numero for numero in numeros if numero != 0xFFFFFF]))
+
+
+# Fonction de décodage des informations de configuration (126998) : trois chaînes de longueur variable. ---------------
+CHAMPS_CONFIGURATION = (texte("Installation 1", 0, 1), texte("Installation 2", 0, 1), texte("Fabricant", 0, 1))
+
+
+def chaines_configuration(d):
+    chaines = []
+    i = 0
+    for _ in CHAMPS_CONFIGURATION:
+        if i + 2 > len(d):
+            break
+        longueur = max(d[i], 2)     # La longueur comprend les deux octets d'en-tête.
+        encodage = "utf-16-le" if d[i + 1] == 0 else "latin-1"
+        texte_chaine = bytes(d[i + 2:i + longueur]).decode(encodage, errors="replace")
+        chaines.append(texte_chaine or None)
+        i += longueur
+    return Decodage(126998, "Info Configuration", CHAMPS_CONFIGURATION[:len(chaines)], tuple(chaines))
+
+
+PGN_MESSAGES = {
+    129038: pgn_message("AIS Posittion Class A",
+                        entier("MMSI", 1, 32),
+                        champ("AIS_A Longitude", 5, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("AIS_A Latitude", 9, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("AIS_A COG", 14, echelle=DEGRES, unite="°"),
+                        champ("AIS_A SOG", 16, echelle=NOEUDS, unite="Nds"),
+                        champ("AIS_A Heading", 21, echelle=DEGRES, unite="°")),
+    129039: pgn_message("AIS Position classe B",
+                        entier("MMSI", 1, 32),
+                        champ("AIS_B Longitude", 5, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("AIS_B Latitude", 9, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("AIS_B COG", 14, echelle=DEGRES, unite="°"),
+                        champ("AIS_B SOG", 16, echelle=NOEUDS, unite="Nds"),
+                        champ("AIS_B Heading", 21, echelle=DEGRES, unite="°")),
+    129794: pgn_message("AIS Données classe A",
+                        entier("MMSI", 1, 32),
+                        texte("Indicatif", 9, 7),
+                        texte("Nom du navire", 16, 20),
+                        champ("Longueur", 37, echelle=0.1, unite="m"),
+                        champ("Largeur", 39, echelle=0.1, unite="m"),
+                        champ("Tirant d'eau", 51, echelle=0.01, unite="m"),
+                        texte("Destinaion", 53, 20)),
+    129809: pgn_message("AIS Données classe B",
+                        entier("MMSI", 1, 32),
+                        texte("Nom du navire", 5, 20)),
+    129810: pgn_message("AIS Données classe A Part B",
+                        entier("MMSI", 1, 32),
+                        texte("Indicatif", 13, 7),
+                        champ("Longueur", 20, echelle=0.1, unite="m"),
+                        champ("Largeur", 22, echelle=0.1, unite="m")),
+    129029: pgn_message("Info. de positioon GNSS",
+                        champ("Latitude", 7, 64, signe=True, echelle=1e-16, unite="°", decimales=6),
+                        champ("Longitude", 15, 64, signe=True, echelle=1e-16, unite="°", decimales=6),
+                        champ("Altitude", 23, 64, signe=True, echelle=1e-6, unite="m"),
+                        entier("Nombre de satélites", 33),
+                        champ("HDOP", 34, signe=True, echelle=0.01)),
+    130577: pgn_message("Données de direction",
+                        champ("COG", 2, echelle=DEGRES, unite="°"),
+                        champ("SOG", 4, echelle=NOEUDS, unite="Nds"),
+                        champ("Heading", 6, echelle=DEGRES, unite="°"),
+                        champ("Vitesse surface", 8, echelle=NOEUDS, unite="Nds"),
+                        champ("Direction du courant", 10, echelle=DEGRES, unite="°"),
+                        champ("Vitesse du courant", 12, echelle=NOEUDS, unite="Nds")),
+    127506: pgn_message("Batteries détaillées",
+                        table(2, ENERGIE_DC, nom="Source"),
+                        entier("Etat de charge", 3, unite="%"),
+                        entier("Etat de santé", 4, unite="%"),
+                        entier("Temps restant", 5, 16, unite="min"),
+                        champ("Ondulation", 7, echelle=0.001, unite="V"),
+                        entier("Ah", 9, 16, unite="Ah")),
+    126720: pgn_message("Info propriétaire",
+                        entier("Code propriétaire", 0, 11)),
+    126464: liste_pgn,
+    128275: pgn_message("Journal",
+                        entier("Distance parcourrue", 6, 32, unite="m"),
+                        entier("Distance du trajet", 10, 32, unite="m")),
+    129540: pgn_message("Satélites en vues",
+                        entier("Nombre de satélites", 2)),
+    129284: pgn_message("Données Navigation",
+                        champ("Distance Waypoint", 1, 32, echelle=0.01, unite="m"),
+                        champ("Cap Waypoint", 14, echelle=DEGRES, unite="°"),
+                        champ("Latitude Waypoint", 24, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("Longitude Waypoint", 28, 32, signe=True, echelle=1e-7, unite="°", decimales=6),
+                        champ("VMG Waypoint", 32, signe=True, echelle=NOEUDS, unite="Nds")),
+    126996: pgn_message("Information prodruit",
+                        texte("Modèle", 4, 32),
+                        texte("Version logiciel", 36, 32),
+                        texte("Version", 68, 32),
+                        texte("Numéro de série", 100, 32)),
+    126998: chaines_configuration,
+}
+# ========================================== FIN DU REGISTRE DES PGN ===================================================
+
+
+# ====================================== COMPILATION DES DEFINITIONS ===================================================
+# Chaque définition est traduite une seule fois en code Python à plat (décalages et masques écrits en dur),
+# puis compilée : le décodage d'une trame ne fait plus ni recherche dans une liste de "case", ni boucle sur les champs.
+
+# Fonction qui retourne l'expression de la valeur brute d'un champ. ----------------------------------------------------
+def expression_brute(c):
+    nombre_octets = (c.decalage + c.bits + 7) // 8
+    termes = []
+    for i in range(nombre_octets):
+        terme = f"d[{c.octet + i}]"
+        if i:
+            terme += f" << {8 * i}"
+        termes.append(terme)
+    expression = " | ".join(termes)
+    if c.decalage:
+        expression = f"(({expression}) >> {c.decalage})"
+    if c.decalage or c.bits % 8:
+        expression = f"(({expression}) & {(1 << c.bits) - 1:#x})"
+    return expression
+
+
+# Fonction qui retourne les lignes de code pour extraire la valeur d'un champ dans la variable "nom". ------------------
+# La valeur reste numérique : la mise en texte n'est faite qu'à l'affichage (voir "formater").
+def code_champ(c, nom):
+    if c.texte:
+        fin = c.octet + c.bits // 8
+        vide = f"b'\\xff' * {fin - c.octet}"
+        return [f"{nom} = bytes(d[{c.octet}:{fin}])",
+                f"{nom} = None if {nom} == {vide} else {nom}.decode('latin-1')"]
+
+    lignes = [f"{nom} = {expression_brute(c)}"]
+    calcul = []
+    if c.signe:
+        calcul.append(f"{nom} = {nom} - {1 << c.bits} if {nom} & {1 << (c.bits - 1):#x} else {nom}")
+    if c.table is None and not (c.echelle == 1 and c.ajout == 0):
+        valeur = f"{nom} * {c.echelle!r}"
+        if c.ajout:
+            valeur += f" + {c.ajout!r}"
+        calcul.append(f"{nom} = {valeur}")
+
+    if c.indisponible is None:
+        lignes.extend(calcul)
+    elif calcul:
+        lignes.append(f"if {nom} == {c.indisponible:#x}:")
+        lignes.append(f"    {nom} = None")
+        lignes.append("else:")
+        lignes.extend("    " + ligne for ligne in calcul)
+    else:
+        lignes.append(f"if {nom} == {c.indisponible:#x}:")
+        lignes.append(f"    {nom} = None")
+    return lignes
+
+
+# Fonction qui compile une liste de champs en fonction retournant un "Decodage". ---------------------------------------
+def compiler_champs(pgn, champs, titre=None, numero=None):
+    valeurs = tuple(c for c in champs if c.table is None)
+    tables = [c for c in champs if c.table is not None]
+
+    constantes = {"_Decodage": Decodage, "_champs": valeurs}
+    corps = []
+    for i, c in enumerate(valeurs):
+        corps.extend(code_champ(c, f"v{i}"))
+    resultats = "".join(f"v{i}, " for i in range(len(valeurs)))
+
+    if tables:
+        corps.extend(code_champ(tables[0], "t"))
+        constantes["_table"] = tables[0].table
+        corps.append("definition = _table.get(t)")
+        table_resultat = "t, definition"
+    else:
+        table_resultat = "None, None"
+
+    source = "def decoder(d):\n"
+    source += "".join("    " + ligne + "\n" for ligne in corps)
+    source += f"    return _Decodage({pgn}, {titre!r}, _champs, ({resultats}), {table_resultat}, {numero!r})\n"
+
+    espace = constantes
+    exec(source, espace)
+    decoder = espace["decoder"]
+    decoder.source = source     # Gardé pour le débogage.
+    return decoder
+
+
+# Fonction qui compile la définition d'un PGN en une fonction de décodage datas -> Decodage. ---------------------------
+def compiler_pgn(pgn, definition):
+    if definition.trames is None:
+        return compiler_champs(pgn, definition.champs)
+
+    titre = definition.titre
+    masque = definition.masque_trame
+    trames = {z: compiler_champs(pgn, champs, titre, z) for z, champs in definition.trames.items()}
+
+    def decoder_trame(datas):
+        z = datas[0] & masque
+        decodeur = trames.get(z)
+        if decodeur is None:
+            return Decodage(pgn, titre, (), (), trame=z)
+        return decodeur(datas)
+
+    return decoder_trame
+
+
+# Fonction qui compile un message complet, après réassemblage. ---------------------------------------------------------
+def compiler_message(pgn, definition):
+    # Les messages à la structure particulière sont décodés par leur propre fonction.
+    if callable(definition):
+        return definition
+    return compiler_champs(pgn, definition.champs, definition.titre)
+
+
+# Fonction qui compile tout le registre. -------------------------------------------------------------------------------
+def compiler(definitions):
+    return {pgn: compiler_pgn(pgn, definition) for pgn, definition in definitions.items()}
+
+
+# Les décodeurs sont compilés une seule fois, au chargement du module.
+DECODEURS = compiler(PGN_DEFINITIONS)
+DECODEURS_MESSAGES = {pgn: compiler_message(pgn, definition) for pgn, definition in PGN_MESSAGES.items()}
+
+# ==================================== FIN DE LA COMPILATION DES DEFINITIONS ===========================================
@@ -0,0 +1,204 @@
+import os
+import queue
+import threading
+import time
+
+from Package.constante import *
+from Package.JournalBinaire import EXTENSION_BINAIRE, entete, copie_trames, lignes_texte
+
+# **********************************************************************************************************************
+#       Enregistrement du bus CAN dans un fichier texte, par un thread d'écriture en arrière-plan
+# **********************************************************************************************************************
+# La lecture du bus ne fait que déposer les trames dans une file bornée : la mise en texte, l'écriture, le fsync et la
+# rotation des fichiers se font dans le thread d'écriture. Si la file est pleine, les trames sont perdues et comptées.
+# Format d'une ligne : "TimeStamp ID Len XX XX ...", comme l'attendent l'import et l'export.
+# Avec l'extension ".can", les trames sont écrites en journal binaire (voir JournalBinaire.py).
+# Un lot de l'acquisition est copié d'un seul coup en tableau "TRAME". La file est bornée en trames : un lot compte
+# pour toutes ses trames, et il est perdu en entier s'il ne tient pas dans la place qui reste.
+
+# ================================================== Classe Enregistreur ===============================================
+class Enregistreur:
+    def __init__(self, chemin,
+                 taille_file=ENREGISTREUR_FILE_MAX,
+                 taille_tampon=ENREGISTREUR_TAMPON,
+                 periode_fsync=ENREGISTREUR_FSYNC_S,
+                 taille_max=ENREGISTREUR_TAILLE_MAX,
+                 duree_max=ENREGISTREUR_DUREE_MAX_S):
+        self.chemin = chemin
+        self._binaire = os.path.splitext(chemin)[1].lower() == EXTENSION_BINAIRE
+        self._taille_tampon = taille_tampon
+        self._periode_fsync = periode_fsync
+        self._taille_max = taille_max      # Rotation sur la taille en octets (0 = jamais)
+        self._duree_max = duree_max        # Rotation sur la durée en secondes (0 = jamais)
+
+        self._file = queue.Queue()
+        self._taille_file = taille_file     # Nombre maximum de trames en attente
+        self._en_attente = 0                # Trames déposées et pas encore prises par le thread d'écriture
+        self._verrou = threading.Lock()
+        self._thread = None
+        self._actif = False
+        self._fichier = None
+        self._ouverture = 0.0
+        self._dernier_fsync = 0.0
+
+        # Compteurs.
+        self.recues = 0
+        self.ecrites = 0
+        self.perdues = 0
+        self.rotations = 0
+        self.erreurs = 0
+
+    # Méthode qui démarre le thread d'écriture. ------------------------------------------------------------------------
+    def demarrer(self):
+        if self._actif:
+            return
+        self._ouvrir()
+        self._actif = True
+        self._thread = threading.Thread(target=self._ecrire, name="Enregistreur CAN", daemon=True)
+        self._thread.start()
+        print(f"Enregistrement démarré dans : {self.chemin}")
+
+    # Méthode appelée pour un lot de trames (tableau de CanMsg), elle ne bloque jamais. --------------------------------
+    def ajouter_lot(self, tableau):
+        self.recues += len(tableau)
+        if self._reserver(len(tableau)):
+            self._file.put_nowait(copie_trames(tableau))
+
+    # Méthode qui réserve la place de "nombre" trames dans la file, ou les compte perdues si elle est pleine. ----------
+    def _reserver(self, nombre):
+        with self._verrou:
+            if self._en_attente + nombre > self._taille_file:
+                self.perdues += nombre
+                return False
+            self._en_attente += nombre
+            return True
+
+    # Méthode qui vide la file, ferme le fichier et arrête le thread. --------------------------------------------------
+    def arreter(self):
+        if not self._actif:
+            return
+        self._actif = False
+        self._file.put(None)        # Réveille le thread, qui écrit tout ce qui reste avant de s'arrêter.
+        self._thread.join()
+        self._thread = None
+        print(f"Enregistrement arrêté : {self.statistiques()}")
+
+    # Méthode du thread d'écriture. ------------------------------------------------------------------------------------
+    def _ecrire(self):
+        fin = False
+        while not fin:
+            try:
+                trames = [self._file.get(timeout=self._periode_fsync)]
+            except queue.Empty:
+                trames = []
+
+            # On prend d'un coup tout ce qui est déjà dans la file.
+            while True:
+                try:
+                    trames.append(self._file.get_nowait())
+                except queue.Empty:
+                    break
+            if any(trame is None for trame in trames):
+                fin = True
+                trames = [trame for trame in trames if trame is not None]
+            nombre = sum(len(tableau) for tableau in trames)
+            with self._verrou:
+                self._en_attente -= nombre
+
+            # Après une rotation ratée, le fichier est rouvert avant d'écrire : sinon ces trames sont perdues.
+            if self._fichier is None:
+                try:
+                    self._ouvrir()
+                except OSError as e:
+                    self.erreurs += 1
+                    self.perdues += nombre
+                    print(f"Erreur d'écriture dans {self.chemin} : {e}")
+                    continue
+
+            try:
+                for tableau in trames:
+                    self._ecrire_tableau(tableau)
+
+                maintenant = time.monotonic()
+                if maintenant - self._dernier_fsync >= self._periode_fsync:
+                    self._synchroniser()
+                if self._rotation_necessaire(maintenant):
+                    self._tourner()
+            except OSError as e:
+                self.erreurs += 1
+                print(f"Erreur d'écriture dans {self.chemin} : {e}")
+
+        self._fermer()
+
+    # Méthode qui écrit un tableau "TRAME". ----------------------------------------------------------------------------
+    def _ecrire_tableau(self, tableau):
+        if self._binaire:
+            self._fichier.write(tableau.tobytes())
+        else:
+            self._fichier.write("".join(lignes_texte(tableau)))
+        self.ecrites += len(tableau)
+
+    # Méthode qui ouvre le fichier en ajout, avec un grand tampon d'écriture. ------------------------------------------
+    def _ouvrir(self):
+        if self._binaire:
+            self._fichier = open(self.chemin, "ab", buffering=self._taille_tampon)
+            if self._fichier.tell() == 0:   # Nouveau journal : on commence par l'en-tête.
+                self._fichier.write(entete())
+        else:
+            self._fichier = open(self.chemin, "a", buffering=self._taille_tampon, encoding="utf-8")
+        self._ouverture = time.monotonic()
+        self._dernier_fsync = self._ouverture
+
+    # Méthode qui écrit le tampon sur le disque. -----------------------------------------------------------------------
+    def _synchroniser(self):
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+        self._dernier_fsync = time.monotonic()
+
+    # Méthode qui ferme le fichier après l'avoir écrit sur le disque. --------------------------------------------------
+    def _fermer(self):
+        if self._fichier is None:
+            return
+        try:
+            self._synchroniser()
+        except OSError as e:
+            self.erreurs += 1
+            print(f"Erreur d'écriture dans {self.chemin} : {e}")
+        self._fichier.close()
+        self._fichier = None
+
+    # Méthode qui indique si le fichier doit être changé (taille ou durée). --------------------------------------------
+    def _rotation_necessaire(self, maintenant):
+        if self._duree_max and maintenant - self._ouverture >= self._duree_max:
+            return True
+        return bool(self._taille_max) and self._fichier.tell() >= self._taille_max
+
+    # Méthode qui renomme le fichier plein avec sa date, puis repart sur un fichier vide au même chemin. ---------------
+    # Si le renommage échoue, l'écriture continue dans le même fichier. Si le fichier ne peut pas être rouvert,
+    # l'erreur remonte à "_ecrire", qui le rouvrira au tour suivant.
+    def _tourner(self):
+        self._fermer()
+        base, extension = os.path.splitext(self.chemin)
+        archive = f"{base}_{time.strftime('%Y%m%d_%H%M%S')}{extension}"
+        indice = 1
+        while os.path.exists(archive):     # Plusieurs rotations dans la même seconde.
+            archive = f"{base}_{time.strftime('%Y%m%d_%H%M%S')}_{indice}{extension}"
+            indice += 1
+        try:
+            os.replace(self.chemin, archive)
+            self.rotations += 1
+            print(f"Fichier archivé : {archive}")
+        except OSError as e:
+            self.erreurs += 1
+            print(f"Rotation impossible de {self.chemin} : {e}")
+        self._ouvrir()
+
+    # Méthode qui retourne les compteurs. ------------------------------------------------------------------------------
+    def statistiques(self):
+        return {"recues": self.recues,
+                "ecrites": self.ecrites,
+                "perdues": self.perdues,
+                "en_attente": self._en_attente,
+                "rotations": self.rotations,
+                "erreurs": self.erreurs}
+# ============================================ FIN DE LA CLASSE Enregistreur ===========================================
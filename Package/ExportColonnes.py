@@ -0,0 +1,278 @@
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from Package.constante import *
+from Package.DecodageLot import decoder_lot, DEFINITIONS_LOT
+from Package.DefinitionsPGN import DECODEURS_MESSAGES
+from Package.ExportNMEA import lots_trames, supprimer, BilanExport
+from Package.NMEA_2000 import ContexteDecodage
+
+# **********************************************************************************************************************
+#       Export NMEA 2000 en colonnes typées dans un fichier NumPy compressé (.npz)
+# **********************************************************************************************************************
+# Chaque PGN décodé a ses colonnes : "130306/horodatage", "130306/source", puis une colonne par champ,
+# par exemple "130306/Noeuds du Vent". Les valeurs non disponibles sont des NaN, les textes (noms AIS...) des chaînes,
+# vides quand la valeur manque.
+# Chaque colonne est un tableau .npy de l'archive : np.load(chemin)["130306/Noeuds du Vent"] la lit directement.
+# Pendant l'export, seules les lignes de la partie en cours de chaque PGN sont en mémoire : les parties pleines sont
+# déposées dans un dossier temporaire, puis chaque colonne est écrite en une fois à la fin, partie après partie.
+
+HORODATAGE = "horodatage"
+SOURCE = "source"
+
+
+# Colonnes d'un PGN en cours d'export.
+class ColonnesPGN:
+    __slots__ = ("morceaux", "lignes", "fichiers", "longueurs")
+
+    def __init__(self):
+        self.morceaux = {}      # Nom de colonne -> tableaux déjà décodés par lots
+        self.lignes = []        # Valeurs décodées une par une ({nom: valeur} pour chaque ligne)
+        self.fichiers = {}      # Nom de colonne -> {numéro de partie: fichier déposé}
+        self.longueurs = []     # Nombre de lignes de chaque partie déposée
+
+    # Nombre de lignes de la partie en cours.
+    @property
+    def nombre(self):
+        return len(self.lignes) + sum(len(tableau) for tableau in self.morceaux.get(HORODATAGE, ()))
+
+    # Méthode qui ajoute un tableau à une colonne décodée par lots. ----------------------------------------------------
+    def ajouter_lot(self, nom, tableau):
+        self.morceaux.setdefault(nom, []).append(tableau)
+
+    # Méthode qui ajoute une ligne décodée une par une : les colonnes absentes recevront None. -------------------------
+    def ajouter_ligne(self, valeurs):
+        self.lignes.append(valeurs)
+
+    # Méthode qui retourne les colonnes de la partie en cours sous forme de tableaux NumPy. ----------------------------
+    def tableaux(self):
+        resultat = {nom: np.concatenate(morceaux) for nom, morceaux in self.morceaux.items()}
+        for nom in dict.fromkeys(nom for ligne in self.lignes for nom in ligne):
+            valeurs = [ligne.get(nom) for ligne in self.lignes]
+            if nom == HORODATAGE:
+                resultat[nom] = np.array(valeurs, dtype=np.int64)
+            elif nom == SOURCE:
+                resultat[nom] = np.array(valeurs, dtype=np.uint8)
+            else:
+                resultat[nom] = tableau_valeurs(valeurs)
+        return resultat
+
+    # Méthode qui dépose la partie en cours dans le dossier temporaire, puis l'oublie. ---------------------------------
+    def deposer(self, dossier, pgn):
+        if not self.nombre:
+            return
+        partie = len(self.longueurs)
+        self.longueurs.append(self.nombre)
+        for nom, tableau in self.tableaux().items():
+            fichiers = self.fichiers.setdefault(nom, {})
+            # Les noms de colonnes ne sont pas tous des noms de fichiers valides : la colonne prend un numéro.
+            fichier = os.path.join(dossier, f"{pgn}-{list(self.fichiers).index(nom)}-{partie}.npy")
+            np.save(fichier, tableau, allow_pickle=False)
+            fichiers[partie] = fichier
+        self.morceaux = {}
+        self.lignes = []
+
+    # Méthode qui écrit chaque colonne dans l'archive, en recollant ses parties déposées. ------------------------------
+    def ecrire(self, archive, pgn):
+        for nom, fichiers in self.fichiers.items():
+            with archive.open(f"{pgn}/{nom}.npy", "w", force_zip64=True) as membre:
+                recoller(membre, fichiers, self.longueurs)
+
+
+# Fonction qui transforme une liste de valeurs en tableau typé : entiers, nombres (None -> NaN) ou chaînes. ------------
+def tableau_valeurs(valeurs):
+    if all(isinstance(valeur, int) for valeur in valeurs):
+        return np.array(valeurs, dtype=np.int64)
+    if all(valeur is None or isinstance(valeur, (int, float)) for valeur in valeurs):
+        return np.array([np.nan if valeur is None else valeur for valeur in valeurs], dtype=np.float64)
+    return np.array(["" if valeur is None else str(valeur) for valeur in valeurs], dtype=np.str_)
+
+
+# Fonction qui donne des noms uniques aux champs d'un décodage (un même libellé peut revenir). -------------------------
+def valeurs_nommees(decodage):
+    valeurs = {}
+    for c, valeur in zip(decodage.champs, decodage.valeurs):
+        nom = c.nom
+        numero = 2
+        while nom in valeurs:
+            nom = f"{c.nom} {numero}"
+            numero += 1
+        valeurs[nom] = valeur
+    if decodage.table is not None:
+        valeurs["Table"] = decodage.table
+    return valeurs
+
+
+# Fonction qui indique si une colonne fait partie de la sélection. -----------------------------------------------------
+# La sélection contient des clés "pgn/nom", ou un numéro de PGN pour toutes ses colonnes.
+def selectionnee(selection, pgn, nom):
+    return selection is None or str(pgn) in selection or f"{pgn}/{nom}" in selection
+
+
+# Fonction qui exporte les lignes "debut" à "debut + nombre" du fichier en colonnes NumPy compressées. -----------------
+# "colonnes" limite l'export à certaines clés ("130306/Noeuds du Vent", ou "130306" pour tout le PGN).
+def exporter_npz(chemin, chemin_npz, debut, nombre, progression=None, annulation=None, colonnes=None,
+                 taille_lot=EXPORT_TAILLE_LOT, taille_partie=EXPORT_NPZ_PARTIE):
+    selection = None if colonnes is None else {str(colonne) for colonne in colonnes}
+    pgn_voulus = None if selection is None else {int(colonne.split("/")[0]) for colonne in selection}
+    contexte = ContexteDecodage()
+    tables = {}
+    lignes = 0
+    erreurs = 0
+
+    # Les parties sont déposées à côté du fichier final, et l'archive n'est écrite qu'à la fin de l'export :
+    # un export annulé ne laisse rien.
+    dossier = tempfile.mkdtemp(prefix=os.path.basename(chemin_npz) + ".",
+                               dir=os.path.dirname(os.path.abspath(chemin_npz)))
+    chemin_partiel = chemin_npz + ".partiel"
+    try:
+        for lues, trames in lots_trames(chemin, debut, nombre, taille_lot):
+            if annulation is not None and annulation.is_set():
+                print(f"Export annulé après {lignes} lignes.")
+                return BilanExport(lignes, erreurs, True)
+            erreurs += _decoder_npz(trames, contexte, tables, selection, pgn_voulus)
+
+            # Les PGN qui ont assez de lignes sont déposés tout de suite.
+            for pgn, table in tables.items():
+                if table.nombre >= taille_partie:
+                    table.deposer(dossier, pgn)
+
+            lignes += lues
+            if progression is not None:
+                progression(lignes)
+
+        try:
+            with zipfile.ZipFile(chemin_partiel, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                for pgn, table in sorted(tables.items()):
+                    table.deposer(dossier, pgn)
+                    table.ecrire(archive, pgn)
+            os.replace(chemin_partiel, chemin_npz)
+        except BaseException:
+            supprimer(chemin_partiel)
+            raise
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    if erreurs:
+        print(f"Export terminé : {erreurs} trames n'ont pas pu être décodées.")
+    return BilanExport(lignes, erreurs, False)
+
+
+# Fonction qui décode un lot de trames dans les colonnes de chaque PGN, et retourne le nombre de trames ratées. --------
+def _decoder_npz(trames, contexte, tables, selection, pgn_voulus):
+    erreurs = 0
+    resultat = decoder_lot(trames.ids, trames.octets, trames.longueurs)
+
+    # PGN sur une seule trame : les colonnes sont prises directement dans le résultat du lot.
+    for numero, definition in DEFINITIONS_LOT.items():
+        if pgn_voulus is not None and numero not in pgn_voulus:
+            continue
+        trouvees = resultat.pgn == numero
+        choix = np.flatnonzero(trouvees & resultat.decode)
+        erreurs += int(np.count_nonzero(trouvees)) - len(choix)    # Trames trop courtes
+        if not len(choix):
+            continue
+        table = tables.setdefault(numero, ColonnesPGN())
+        table.ajouter_lot(HORODATAGE, np.asarray(trames.horodatage[choix], dtype=np.int64))
+        table.ajouter_lot(SOURCE, resultat.source[choix].astype(np.uint8))
+        colonne = 0
+        for c in definition.champs:
+            if c.table is not None:
+                if selectionnee(selection, numero, c.nom):
+                    table.ajouter_lot(c.nom, resultat.table[choix])
+            elif colonne < 3:
+                if selectionnee(selection, numero, c.nom):
+                    table.ajouter_lot(c.nom, resultat.valeurs[choix, colonne])
+                colonne += 1
+
+    # PGN sur plusieurs trames : réassemblés, puis une ligne par message complet.
+    for i in np.flatnonzero(np.isin(resultat.pgn, list(DECODEURS_MESSAGES))):
+        pgn = int(resultat.pgn[i])
+        if pgn_voulus is not None and pgn not in pgn_voulus:
+            continue
+        try:
+            decodage = contexte.trame(pgn, int(resultat.source[i]), trames.octets[i, :trames.longueurs[i]].tolist(),
+                                      int(trames.horodatage[i]))
+        except (ValueError, IndexError):
+            erreurs += 1
+            continue
+        if decodage.trame is not None or not decodage.valeurs:
+            continue
+        valeurs = {HORODATAGE: int(trames.horodatage[i]), SOURCE: int(resultat.source[i])}
+        valeurs.update((nom, valeur) for nom, valeur in valeurs_nommees(decodage).items()
+                       if selectionnee(selection, pgn, nom))
+        tables.setdefault(pgn, ColonnesPGN()).ajouter_ligne(valeurs)
+
+    return erreurs
+
+
+# Fonction qui lit le type d'un tableau déposé, sans lire ses valeurs. -------------------------------------------------
+def type_depose(fichier):
+    with open(fichier, "rb") as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            return np.lib.format.read_array_header_1_0(f)[2]
+        return np.lib.format.read_array_header_2_0(f)[2]
+
+
+# Fonction qui choisit le type d'une colonne recollée et sa valeur absente. --------------------------------------------
+# C'est le type que tableau_valeurs() donnerait à la colonne entière, quelle que soit la taille des parties :
+# une colonne de textes a "" pour valeur absente, une colonne de nombres NaN. Une colonne d'entiers reste entière
+# si elle est dans toutes les parties ; sinon ses lignes absentes sont des NaN et elle devient une colonne de nombres.
+def type_colonne(types, complete):
+    if any(t.kind == "U" for t in types):
+        return np.dtype(np.str_), ""
+    if complete:
+        return np.result_type(*types), None
+    return np.result_type(np.float64, *types), np.nan
+
+
+# Fonction qui convertit une partie au type de sa colonne. -------------------------------------------------------------
+def convertir(tableau, type_final):
+    if type_final.kind == "U" and tableau.dtype.kind == "f":
+        # Les NaN d'une partie de nombres sont des valeurs absentes : "" dans une colonne de textes, pas "nan".
+        textes = tableau.astype(np.str_)
+        textes[np.isnan(tableau)] = ""
+        return textes.astype(type_final)
+    return tableau.astype(type_final)
+
+
+# Fonction qui écrit une colonne dans un membre .npy, en recollant ses parties déposées. -------------------------------
+# Une colonne apparue en cours d'export n'a pas de fichier dans les premières parties : "longueurs" donne leur taille,
+# elles sont remplies avec la valeur absente de la colonne. Une seule partie est en mémoire à la fois.
+def recoller(membre, fichiers, longueurs):
+    types = [type_depose(fichier) for fichier in fichiers.values()]
+    type_final, absente = type_colonne(types, len(fichiers) == len(longueurs))
+    if type_final.kind == "U":
+        # La largeur des textes n'est connue qu'une fois chaque partie convertie.
+        largeur = max(int(np.char.str_len(convertir(np.load(fichier), type_final)).max(initial=1))
+                      for fichier in fichiers.values())
+        type_final = np.dtype((np.str_, largeur))
+
+    np.lib.format.write_array_header_1_0(membre, {"descr": np.lib.format.dtype_to_descr(type_final),
+                                                  "fortran_order": False,
+                                                  "shape": (sum(longueurs),)})
+    for partie, longueur in enumerate(longueurs):
+        if partie in fichiers:
+            tableau = convertir(np.load(fichiers[partie]), type_final)
+        else:
+            tableau = np.full(longueur, absente, dtype=type_final)
+        membre.write(tableau.tobytes())
+
+
+# Fonction qui retourne la liste des colonnes d'un export .npz, sans rien décompresser. --------------------------------
+def colonnes_npz(chemin_npz):
+    with np.load(chemin_npz) as npz:
+        return list(npz.files)
+
+
+# Fonction qui lit certaines colonnes d'un export .npz (toutes si "colonnes" est None). --------------------------------
+# Comme pour l'export, "130306" sélectionne toutes les colonnes du PGN 130306.
+def lire_npz(chemin_npz, colonnes=None):
+    selection = None if colonnes is None else {str(colonne) for colonne in colonnes}
+    with np.load(chemin_npz) as npz:
+        return {colonne: npz[colonne] for colonne in npz.files
+                if selection is None or colonne in selection or colonne.split("/")[0] in selection}
@@ -0,0 +1,231 @@
+import csv
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from Package.constante import *
+from Package.DecodageLot import lire_lignes, decoder_lot, lignes_csv, decoder_id_lot
+from Package.DefinitionsPGN import DECODEURS_MESSAGES
+from Package.IndexLignes import IndexLignes
+from Package.JournalBinaire import est_binaire, lire_binaire, trames_binaire
+from Package.NMEA_2000 import ContexteDecodage
+
+# **********************************************************************************************************************
+#       Export NMEA 2000 en CSV, en flux : lecture par lots -> tableaux -> décodage -> écriture par lots
+# **********************************************************************************************************************
+# Un seul lot de trames est en mémoire à la fois, quelle que soit la taille du fichier.
+# Ces fonctions n'utilisent pas Qt : elles peuvent tourner dans un thread, la fenêtre reste disponible.
+# Les gros fichiers sont découpés en morceaux décodés en parallèle par plusieurs processus, puis remis dans l'ordre.
+
+# PGN réassemblés sur plusieurs trames.
+LISTE_PGN_MESSAGES = np.array(sorted(DECODEURS_MESSAGES))
+
+ENTETE_CSV = ("PGN", "Source", "Destination", "Priorité", "PGN1", "Valeur", "PGN2",
+              "Valeur", "PGN3", "Valeur", "Table", "Définition")
+
+# Bilan d'un export.
+BilanExport = namedtuple("BilanExport", ("lignes",     # Nombre de lignes du fichier source traitées
+                                         "erreurs",    # Nombre de trames qui n'ont pas pu être décodées
+                                         "annule"))    # True si l'export a été interrompu
+
+
+# Fonction qui supprime un fichier s'il existe encore (export annulé, morceaux temporaires). ---------------------------
+def supprimer(chemin):
+    try:
+        os.remove(chemin)
+    except OSError:
+        pass
+
+
+# Générateur des lots de trames "debut" à "debut + nombre" d'un fichier texte ou d'un journal binaire. -----------------
+# Retourne à chaque lot (nombre de lignes lues, TramesLot).
+def lots_trames(chemin, debut, nombre, taille_lot=EXPORT_TAILLE_LOT):
+    if est_binaire(chemin):
+        tableau = lire_binaire(chemin)[debut:debut + nombre]
+        for i in range(0, len(tableau), taille_lot):
+            morceau = tableau[i:i + taille_lot]
+            yield len(morceau), trames_binaire(morceau)
+        return
+
+    lot = []
+    lues = 0
+    for ligne in IndexLignes(chemin).iterer(debut, nombre):
+        lues += 1
+        if ligne.strip():
+            lot.append(ligne)
+        if lues == taille_lot:
+            yield lues, lire_lignes(lot)
+            lot = []
+            lues = 0
+    if lues:
+        yield lues, lire_lignes(lot)
+
+
+# Fonction qui exporte les lignes "debut" à "debut + nombre" du fichier en CSV NMEA 2000. -----------------------------
+# "progression(lignes)" est appelée après chaque lot, "annulation" est un threading.Event qui arrête l'export.
+# Un export annulé ne laisse pas de fichier CSV incomplet.
+def exporter_csv(chemin, chemin_csv, debut, nombre, progression=None, annulation=None,
+                 taille_lot=EXPORT_TAILLE_LOT):
+    # Un contexte propre à l'export : les PGN sur plusieurs trames sont réassemblés d'un lot à l'autre,
+    # sans se mélanger avec le temps réel.
+    contexte = ContexteDecodage()
+    erreurs = 0
+    lignes = 0
+
+    def sur_erreur(_index, _pgn, _erreur):
+        nonlocal erreurs
+        erreurs += 1
+
+    with open(chemin_csv, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(ENTETE_CSV)
+
+        annule = False
+        for lues, trames in lots_trames(chemin, debut, nombre, taille_lot):
+            if annulation is not None and annulation.is_set():
+                annule = True
+                break
+
+            resultat = decoder_lot(trames.ids, trames.octets, trames.longueurs)
+            writer.writerows(lignes_csv(trames, resultat, contexte.trame, sur_erreur))
+            lignes += lues
+            if progression is not None:
+                progression(lignes)
+
+    if annule:
+        supprimer(chemin_csv)
+        print(f"Export annulé après {lignes} lignes.")
+        return BilanExport(lignes, erreurs, True)
+    if erreurs:
+        print(f"Export terminé : {erreurs} trames n'ont pas pu être décodées.")
+    return BilanExport(lignes, erreurs, False)
+
+
+# ========================================== EXPORT PARALLELE ==========================================================
+# Chaque morceau commence sur une ligne connue de l'index : le processus y va directement avec un seul seek.
+# Les PGN sur plusieurs trames qui commencent avant le morceau sont réassemblés grâce à un prélude :
+# les lignes qui précèdent le morceau sont relues, seules leurs trames "fast packet" passent dans le contexte,
+# sans rien écrire. Les trames de fin du morceau restent en attente, comme dans l'export ligne à ligne.
+
+# Fonction qui prépare le contexte d'un morceau avec les trames "fast packet" du prélude. -----------------------------
+# Une trame du prélude qui ne peut pas être réassemblée (trame vide, tronquée) est comptée dans les erreurs du
+# réassembleur, pas dans celles de l'export : c'est le morceau précédent, qui l'écrit, qui la compte.
+def _preparer_contexte(chemin, debut, nombre, taille_lot):
+    contexte = ContexteDecodage()
+    reassembleur = contexte.reassembleur
+    for _, trames in lots_trames(chemin, debut, nombre, taille_lot):
+        pgn, source, _, _ = decoder_id_lot(trames.ids)
+        for i in np.flatnonzero(np.isin(pgn, LISTE_PGN_MESSAGES)):
+            try:
+                reassembleur.ajouter(int(source[i]), int(pgn[i]), trames.octets[i, :trames.longueurs[i]].tolist(),
+                                     int(trames.horodatage[i]))
+            except (ValueError, IndexError):
+                reassembleur.erreurs += 1
+    return contexte
+
+
+# Fonction exécutée par un processus : décode les lignes "debut" à "fin" dans un fichier CSV temporaire. --------------
+def exporter_morceau(chemin, debut, fin, prelude, chemin_tmp, taille_lot=EXPORT_TAILLE_LOT):
+    contexte = _preparer_contexte(chemin, debut - prelude, prelude, taille_lot)
+    erreurs = 0
+    lignes = 0
+
+    def sur_erreur(_index, _pgn, _erreur):
+        nonlocal erreurs
+        erreurs += 1
+
+    with open(chemin_tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        for lues, trames in lots_trames(chemin, debut, fin - debut, taille_lot):
+            resultat = decoder_lot(trames.ids, trames.octets, trames.longueurs)
+            writer.writerows(lignes_csv(trames, resultat, contexte.trame, sur_erreur))
+            lignes += lues
+    return lignes, erreurs
+
+
+# Fonction qui découpe les lignes "debut" à "debut + nombre" en morceaux alignés sur le pas de l'index. ---------------
+def decouper(debut, nombre, taille_morceau, pas=INDEX_PAS):
+    taille_morceau = max(pas, taille_morceau // pas * pas)
+    fin = debut + nombre
+    bornes = [debut]
+    suivante = (debut // taille_morceau + 1) * taille_morceau
+    while suivante < fin:
+        bornes.append(suivante)
+        suivante += taille_morceau
+    bornes.append(fin)
+    return list(zip(bornes[:-1], bornes[1:]))
+
+
+# Fonction qui exporte en CSV NMEA 2000 avec plusieurs processus, dans l'ordre du fichier source. ---------------------
+# Les petits exports passent par "exporter_csv", le démarrage des processus coûterait plus qu'il ne rapporte.
+def exporter_csv_parallele(chemin, chemin_csv, debut, nombre, progression=None, annulation=None,
+                           processus=None, taille_morceau=EXPORT_TAILLE_MORCEAU, taille_lot=EXPORT_TAILLE_LOT):
+    processus = processus or os.cpu_count() or 1
+    if processus < 2 or nombre < 2 * taille_morceau:
+        return exporter_csv(chemin, chemin_csv, debut, nombre, progression, annulation, taille_lot)
+
+    # L'index est construit une fois ici, les processus le relisent à côté du fichier.
+    if not est_binaire(chemin):
+        IndexLignes(chemin).mettre_a_jour()
+
+    morceaux = decouper(debut, nombre, taille_morceau)
+    dossier = os.path.dirname(os.path.abspath(chemin_csv))
+    temporaires = []
+    for _ in morceaux:
+        descripteur, chemin_tmp = tempfile.mkstemp(suffix=".csv", dir=dossier)
+        os.close(descripteur)
+        temporaires.append(chemin_tmp)
+
+    lignes = 0
+    erreurs = 0
+    annule = False
+    executeur = ProcessPoolExecutor(max_workers=processus)
+    try:
+        # Le prélude ne remonte pas avant "debut", comme l'export ligne à ligne.
+        fichiers = {executeur.submit(exporter_morceau, chemin, a, b, min(EXPORT_PRELUDE, a - debut),
+                                     chemin_tmp, taille_lot): chemin_tmp
+                    for (a, b), chemin_tmp in zip(morceaux, temporaires)}
+        en_cours = set(fichiers)
+        while en_cours:
+            faits, en_cours = wait(en_cours, timeout=0.2, return_when=FIRST_COMPLETED)
+            if annulation is not None and annulation.is_set():
+                # Un morceau en cours ne peut pas être interrompu : son fichier temporaire sera supprimé à sa fin.
+                for futur in en_cours:
+                    futur.add_done_callback(lambda _futur, chemin_tmp=fichiers[futur]: supprimer(chemin_tmp))
+                annule = True
+                break
+            for futur in faits:
+                lues, ratees = futur.result()
+                lignes += lues
+                erreurs += ratees
+            if faits and progression is not None:
+                progression(lignes)
+
+        # Les morceaux sont recollés dans l'ordre du fichier source, derrière l'en-tête.
+        if not annule:
+            with open(chemin_csv, 'w', newline='', encoding='utf-8-sig') as f:
+                csv.writer(f, delimiter=';').writerow(ENTETE_CSV)
+            with open(chemin_csv, 'ab') as f:
+                for chemin_tmp in temporaires:
+                    if annulation is not None and annulation.is_set():
+                        annule = True
+                        break
+                    with open(chemin_tmp, 'rb') as morceau:
+                        shutil.copyfileobj(morceau, f, 1 << 20)
+    finally:
+        # Après une annulation, les morceaux pas encore commencés sont abandonnés et on n'attend pas ceux en cours.
+        executeur.shutdown(wait=not annule, cancel_futures=True)
+        for chemin_tmp in temporaires:
+            supprimer(chemin_tmp)
+
+    if annule:
+        supprimer(chemin_csv)
+        print(f"Export annulé après {lignes} lignes.")
+        return BilanExport(lignes, erreurs, True)
+    if erreurs:
+        print(f"Export terminé : {erreurs} trames n'ont pas pu être décodées.")
+    return BilanExport(lignes, erreurs, False)
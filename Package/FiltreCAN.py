@@ -0,0 +1,134 @@
+import numpy as np
+
+from Package.constante import *
+from Package.Acquisition import LotTrames
+from Package.DecodageLot import decoder_id_lot
+from Package.ExportNMEA import lots_trames
+
+# **********************************************************************************************************************
+#       Filtre d'acceptation du bus CAN calculé à partir des PGN (et des sources) voulus
+# **********************************************************************************************************************
+# Le contrôleur SJA1000 de l'adaptateur n'a qu'un code et un masque d'acceptation (filtre unique) : une trame est
+# acceptée si ses bits sont égaux à ceux du code partout où le masque est à 0 (bit à 1 = indifférent).
+# En trame étendue, l'identifiant 29 bits occupe les bits 31 à 3 des registres (ACR0 = octet de poids fort),
+# le bit 2 est le RTR, les bits 1 et 0 ne sont pas utilisés.
+# Le filtre le plus serré qui laisse passer tous les PGN voulus garde les bits communs à tous ; les trames de trop
+# qui passent quand même sont retirées ensuite par le filtre logiciel, sur le PGN et la source exacts.
+#
+# Identifiant NMEA 2000 : priorité (28-26), réservé + DP (25-24), PF (23-16), PS (15-8), source (7-0).
+# Si PF < 240 (point à point), PS est la destination : elle n'entre pas dans le PGN et reste indifférente.
+
+BITS_ID = 29
+MASQUE_ID = CAN_MASQUE_ID
+DECALAGE_SJA1000 = 3        # L'identifiant étendu commence au bit 3 des registres d'acceptation.
+
+# Filtres prêts à l'emploi, par nom. None = toutes les trames.
+MODES_FILTRE = {"Toutes les trames": None,
+                "Carte seulement": (129025, 129026, 129029),
+                "Instruments seulement": (130306, 128259, 128267, 127250, 130312, 130310, 127245, 127508)}
+
+
+# Fonction qui retourne (valeur, bits utiles) de l'identifiant pour un PGN et une source (None = toutes). --------------
+def bits_pgn(pgn, source=None):
+    pf = (pgn >> 8) & 0xFF
+    valeur = (pgn & 0x3FF00) << 8                   # Réservé, DP et PF.
+    utiles = 0x3FF0000
+    if pf >= 240:                                   # Message global : PS fait partie du PGN.
+        valeur |= (pgn & 0xFF) << 8
+        utiles |= 0xFF00
+    if source is not None:
+        valeur |= source & 0xFF
+        utiles |= 0xFF
+    return valeur, utiles
+
+
+# ================================================== Classe PlanFiltre =================================================
+class PlanFiltre:
+    def __init__(self, pgns, sources=None):
+        self.pgns = tuple(sorted(set(int(pgn) for pgn in pgns)))
+        self.sources = None if sources is None else tuple(sorted(set(int(source) for source in sources)))
+        if not self.pgns:
+            raise ValueError("Il faut au moins un PGN pour calculer un filtre.")
+
+        # Bits communs à tous les couples (PGN, source) voulus : ce sont les seuls que le filtre peut vérifier.
+        utiles_communs = MASQUE_ID
+        reference = None
+        for pgn in self.pgns:
+            for source in (self.sources or (None,)):
+                valeur, utiles = bits_pgn(pgn, source)
+                if reference is None:
+                    reference = valeur
+                utiles_communs &= utiles & ~(valeur ^ reference)
+
+        self.code_id = reference & utiles_communs               # Code sur l'identifiant 29 bits
+        self.masque_id = MASQUE_ID & ~utiles_communs            # Bits indifférents de l'identifiant
+
+        self._pgns = np.array(self.pgns, dtype=np.int64)
+        self._sources = None if self.sources is None else np.array(self.sources, dtype=np.uint32)
+
+    # Code et masque pour les registres du SJA1000 (adaptateur CANUSB), en trame étendue. ------------------------------
+    @property
+    def acceptance_code(self):
+        return self.code_id << DECALAGE_SJA1000
+
+    @property
+    def acceptance_mask(self):
+        # Le RTR et les deux bits inutilisés restent indifférents.
+        return (self.masque_id << DECALAGE_SJA1000) | 0x7
+
+    # Méthode qui indique les identifiants qui passent le filtre de l'adaptateur. --------------------------------------
+    def accepte_materiel(self, ids):
+        ids = np.asarray(ids, dtype=np.uint32)
+        return (ids & ~np.uint32(self.masque_id) & np.uint32(MASQUE_ID)) == self.code_id
+
+    # Méthode qui indique les identifiants voulus exactement (PGN et source), pour le filtre logiciel. -----------------
+    def accepte(self, ids):
+        pgn, source, _, _ = decoder_id_lot(ids)
+        choix = np.isin(pgn, self._pgns)
+        if self._sources is not None:
+            choix &= np.isin(source, self._sources)
+        return choix
+
+    # Méthode qui garde d'un lot de l'acquisition les trames voulues (le même lot si rien n'est retiré). ---------------
+    def filtrer_lot(self, lot):
+        if not len(lot):
+            return lot
+        choix = self.accepte(lot.tableau["ID"])
+        if choix.all():
+            return lot
+        indices = np.flatnonzero(choix)
+        trames = lot.trames
+        return LotTrames([trames[i] for i in indices.tolist()], lot.tableau[indices])
+
+    # Méthode qui retourne la part de l'espace des identifiants qui passe le filtre de l'adaptateur. -------------------
+    def part_acceptee(self):
+        return 2.0 ** bin(self.masque_id).count("1") / 2.0 ** BITS_ID
+
+    # Méthode qui estime les taux de rejet sur un échantillon de trafic (identifiants d'un enregistrement). ------------
+    def taux_rejet(self, ids):
+        ids = np.asarray(ids, dtype=np.uint32)
+        total = len(ids)
+        if not total:
+            return {"trames": 0, "rejet_materiel": 0.0, "rejet_total": 0.0, "filtre_logiciel": 0.0}
+        materiel = int(self.accepte_materiel(ids).sum())
+        voulues = int(self.accepte(ids).sum())
+        return {"trames": total,
+                "rejet_materiel": 1 - materiel / total,            # Retirées par l'adaptateur
+                "rejet_total": 1 - voulues / total,                # Retirées en tout
+                "filtre_logiciel": (materiel - voulues) / total}   # Passées par l'USB puis retirées en Python
+
+    # Méthode qui estime les taux de rejet sur les "nombre" premières trames d'un enregistrement. ----------------------
+    def taux_rejet_fichier(self, chemin, nombre):
+        ids = [trames.ids for _, trames in lots_trames(chemin, 0, nombre)]
+        return self.taux_rejet(np.concatenate(ids) if ids else [])
+
+    def __repr__(self):
+        return (f"PlanFiltre(pgns={self.pgns}, sources={self.sources}, "
+                f"code=0x{self.acceptance_code:08X}, masque=0x{self.acceptance_mask:08X})")
+# ============================================== FIN DE LA CLASSE PlanFiltre ===========================================
+
+
+# Fonction qui crée le plan d'un mode de MODES_FILTRE (None pour toutes les trames). -----------------------------------
+def plan_mode(nom, sources=None):
+    pgns = MODES_FILTRE[nom]
+    return None if pgns is None else PlanFiltre(pgns, sources)
@@ -0,0 +1,152 @@
+import os
+import struct
+
+import numpy as np
+
+from Package.constante import *
+
+# **********************************************************************************************************************
+#       Index des lignes d'un fichier texte du bus CAN, pour lire n'importe quelle fenêtre de lignes avec un seul seek
+# **********************************************************************************************************************
+# L'index garde la position en octets d'une ligne sur "pas", et le nombre total de lignes.
+# Il est enregistré à côté du fichier ("fichier.txt.idx") et reconstruit si la taille ou la date du fichier changent.
+# Un fichier qui n'a fait que grandir (enregistrement en cours) n'est relu qu'à partir de l'ancienne fin.
+
+EXTENSION_INDEX = ".idx"
+SIGNATURE_INDEX = b"HUAIDX01"
+ENTETE_INDEX = struct.Struct("<8sQQQQ")     # Signature, taille, date (ns), pas, nombre de lignes.
+
+
+# ================================================== Classe IndexLignes ================================================
+class IndexLignes:
+    def __init__(self, chemin, pas=INDEX_PAS):
+        self.chemin = chemin
+        self.pas = pas
+        self._taille = -1
+        self._date = -1
+        self._positions = np.zeros(0, dtype=np.uint64)
+        self._nombre = 0
+        self._inode = None
+
+    # Nombre total de lignes du fichier. -------------------------------------------------------------------------------
+    @property
+    def nombre_lignes(self):
+        self.mettre_a_jour()
+        return self._nombre
+
+    # Méthode qui recharge ou reconstruit l'index si le fichier a changé. ----------------------------------------------
+    def mettre_a_jour(self):
+        etat = os.stat(self.chemin)
+        if etat.st_size == self._taille and etat.st_mtime_ns == self._date:
+            return
+        if self._charger(etat):
+            return
+        if self._a_grandi(etat):
+            # La dernière ligne connue est relue : elle pouvait être incomplète, ou finir sur une position à garder.
+            self._construire(etat, self._taille - 1, self._nombre - 1, self._positions)
+        else:
+            self._construire(etat)
+        self._enregistrer()
+
+    # Méthode qui indique si le fichier est l'ancien, avec seulement des lignes ajoutées à la fin. ---------------------
+    def _a_grandi(self, etat):
+        if self._taille <= 0 or etat.st_size <= self._taille or not self._nombre:
+            return False
+        if self._inode is not None and etat.st_ino != self._inode:
+            return False
+        # La dernière position gardée doit toujours suivre une fin de ligne.
+        position = int(self._positions[-1])
+        if not position:
+            return True
+        with open(self.chemin, "rb") as fichier:
+            fichier.seek(position - 1)
+            return fichier.read(1) == b"\n"
+
+    # Méthode qui retourne les lignes "debut" à "debut + nombre" (sans les fins de ligne). -----------------------------
+    def lignes(self, debut, nombre):
+        return list(self.iterer(debut, nombre))
+
+    # Générateur des lignes "debut" à "debut + nombre", lues au fil du fichier sans tout charger. ----------------------
+    def iterer(self, debut, nombre):
+        self.mettre_a_jour()
+        if debut >= self._nombre or nombre <= 0:
+            return
+
+        with open(self.chemin, "rb") as fichier:
+            fichier.seek(int(self._positions[debut // self.pas]))
+            for _ in range(debut % self.pas):
+                fichier.readline()
+            for i in range(min(nombre, self._nombre - debut)):
+                ligne = fichier.readline().decode("utf-8", errors="replace").rstrip("\r\n")
+                # Marque d'ordre des octets en tête de fichier (utf-8-sig).
+                if debut + i == 0:
+                    ligne = ligne.lstrip("\ufeff")
+                yield ligne
+
+    # Méthode qui parcourt le fichier par blocs et note la position d'une ligne sur "pas". -----------------------------
+    # Pour compléter un index, le parcours reprend à l'octet "decalage", après "nombre" fins de ligne.
+    def _construire(self, etat, decalage=0, nombre=0, positions=None):
+        if positions is None:
+            positions = np.zeros(1, dtype=np.uint64)     # La ligne 0 commence à l'octet 0.
+        positions = [positions]
+        depart = decalage
+        with open(self.chemin, "rb") as fichier:
+            fichier.seek(decalage)
+            while True:
+                bloc = fichier.read(INDEX_BLOC)
+                if not bloc:
+                    break
+                fins = np.flatnonzero(np.frombuffer(bloc, dtype=np.uint8) == 0x0A)
+                # La ligne numéro "nombre + k + 1" commence juste après la fin de ligne k du bloc.
+                numeros = nombre + 1 + np.arange(len(fins))
+                gardees = fins[numeros % self.pas == 0]
+                positions.append((gardees + decalage + 1).astype(np.uint64))
+                nombre += len(fins)
+                decalage += len(bloc)
+
+        # Une dernière ligne sans fin de ligne compte aussi.
+        if decalage and not self._finit_par_fin_de_ligne():
+            nombre += 1
+
+        self._positions = np.concatenate(positions)
+        # Une position au-delà de la dernière ligne n'est pas utile.
+        self._positions = self._positions[self._positions < max(decalage, 1)]
+        self._nombre = nombre
+        self._taille = etat.st_size
+        self._date = etat.st_mtime_ns
+        self._inode = etat.st_ino
+        if depart:
+            print(f"Index complété pour {self.chemin} : {nombre} lignes.")
+        else:
+            print(f"Index construit pour {self.chemin} : {nombre} lignes.")
+
+    def _finit_par_fin_de_ligne(self):
+        with open(self.chemin, "rb") as fichier:
+            fichier.seek(-1, os.SEEK_END)
+            return fichier.read(1) == b"\n"
+
+    # Méthode qui charge l'index enregistré, s'il correspond encore au fichier. ----------------------------------------
+    def _charger(self, etat):
+        try:
+            with open(self.chemin + EXTENSION_INDEX, "rb") as fichier:
+                signature, taille, date, pas, nombre = ENTETE_INDEX.unpack(fichier.read(ENTETE_INDEX.size))
+                if (signature, taille, date, pas) != (SIGNATURE_INDEX, etat.st_size, etat.st_mtime_ns, self.pas):
+                    return False
+                self._positions = np.frombuffer(fichier.read(), dtype="<u8").astype(np.uint64)
+        except (OSError, struct.error):
+            return False
+        self._nombre = nombre
+        self._taille = taille
+        self._date = date
+        self._inode = etat.st_ino
+        return True
+
+    # Méthode qui enregistre l'index à côté du fichier. ----------------------------------------------------------------
+    def _enregistrer(self):
+        try:
+            with open(self.chemin + EXTENSION_INDEX, "wb") as fichier:
+                fichier.write(ENTETE_INDEX.pack(SIGNATURE_INDEX, self._taille, self._date, self.pas, self._nombre))
+                fichier.write(self._positions.astype("<u8").tobytes())
+        except OSError as e:
+            print(f"Impossible d'enregistrer l'index de {self.chemin} : {e}")
+# ============================================= FIN DE LA CLASSE IndexLignes ===========================================
@@ -0,0 +1,153 @@
+import numpy as np
+
+from Package.constante import *
+from Package.DecodageLot import decoder_id_lot, lire_ids
+from Package.IndexLignes import IndexLignes
+from Package.JournalBinaire import est_binaire, lire_binaire
+
+# **********************************************************************************************************************
+#       Index inversés des trames de la table (PGN, source, destination -> numéros de trame), pour filtrer sans parcours
+# **********************************************************************************************************************
+# Chaque colonne garde, pour chaque valeur, les numéros des trames qui l'ont, dans l'ordre croissant.
+# Un filtre "PGN 129025 et source 3" est l'intersection de deux listes déjà triées : seules les trames trouvées
+# sont lues, quel que soit le nombre de trames du buffer ou du fichier.
+# Les numéros sont ajoutés par lots (toujours croissants) : les morceaux d'une valeur ne sont réunis qu'à la recherche.
+# Les trames sorties du buffer tournant restent dans l'index jusqu'à la prochaine purge, la recherche les ignore.
+
+COLONNES_INDEX = ("pgn", "source", "destination")
+
+# Noms acceptés dans la barre de filtre.
+NOMS_CRITERES = {"pgn": "pgn", "source": "source", "src": "source", "destination": "destination", "dest": "destination"}
+
+
+# Fonction qui retourne les éléments communs de deux tableaux triés sans doublons. -------------------------------------
+# Chaque élément du plus petit est cherché par dichotomie dans le plus grand.
+def intersection(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    positions = np.searchsorted(b, a)
+    positions[positions == len(b)] = 0
+    return a[b[positions] == a]
+
+
+# Fonction qui lit les critères de la barre de filtre : "pgn=129025 source=3 dest=255" -> {"pgn": 129025, ...}. --------
+# Les valeurs sont en décimal, ou en hexadécimal avec "0x". Lève ValueError si le texte n'est pas compris.
+def lire_criteres(texte):
+    criteres = {}
+    for mot in texte.replace(",", " ").split():
+        nom, egal, valeur = mot.partition("=")
+        if not egal or nom.lower() not in NOMS_CRITERES:
+            raise ValueError(f"Critère non compris : {mot} (pgn=..., source=..., dest=...)")
+        criteres[NOMS_CRITERES[nom.lower()]] = int(valeur, 0)
+    return criteres
+
+
+# Fonction qui remet des critères en texte, pour la barre de filtre. ---------------------------------------------------
+def texte_criteres(criteres):
+    return " ".join(f"{nom}={valeur}" for nom, valeur in (criteres or {}).items())
+
+
+# ================================================= Classe IndexInverse ================================================
+class IndexInverse:
+    def __init__(self):
+        self._morceaux = {}     # valeur -> liste de tableaux de numéros croissants
+        self.nombre = 0         # Numéros gardés, y compris ceux qui ne sont plus dans le buffer.
+
+    # Méthode qui ajoute un lot : la valeur de chaque trame et son numéro (croissants, supérieurs aux précédents). -----
+    def ajouter(self, valeurs, numeros):
+        if not len(valeurs):
+            return
+        ordre = np.argsort(valeurs, kind="stable")     # L'ordre des numéros est gardé pour chaque valeur.
+        uniques, debuts = np.unique(valeurs[ordre], return_index=True)
+        fins = np.append(debuts[1:], len(ordre))
+        for valeur, debut, fin in zip(uniques.tolist(), debuts.tolist(), fins.tolist()):
+            self._morceaux.setdefault(valeur, []).append(numeros[ordre[debut:fin]])
+        self.nombre += len(valeurs)
+
+    # Méthode qui retourne les numéros des trames d'une valeur, entre "minimum" (compris) et "maximum" (exclu). --------
+    def positions(self, valeur, minimum=0, maximum=None):
+        morceaux = self._morceaux.get(valeur)
+        if not morceaux:
+            return np.zeros(0, dtype=np.int64)
+        if len(morceaux) > 1:
+            morceaux[:] = [np.concatenate(morceaux)]
+        numeros = morceaux[0]
+        debut = np.searchsorted(numeros, minimum)
+        fin = len(numeros) if maximum is None else np.searchsorted(numeros, maximum)
+        return numeros[debut:fin]
+
+    # Méthode qui retire les numéros inférieurs à "minimum" (trames sorties du buffer tournant). -----------------------
+    def purger(self, minimum):
+        self.nombre = 0
+        for valeur in list(self._morceaux):
+            numeros = self.positions(valeur, minimum)
+            if len(numeros):
+                self._morceaux[valeur] = [numeros.copy()]
+                self.nombre += len(numeros)
+            else:
+                del self._morceaux[valeur]
+
+    # Méthode qui retourne les valeurs présentes dans l'index. ---------------------------------------------------------
+    def valeurs(self):
+        return sorted(self._morceaux)
+# ============================================= FIN DE LA CLASSE IndexInverse ==========================================
+
+
+# ================================================= Classe IndexTrames =================================================
+# Les index des trois colonnes d'un buffer ou d'un fichier. "indexees" est le numéro de la prochaine trame à indexer.
+class IndexTrames:
+    def __init__(self, type_numeros=np.int64):
+        self.colonnes = {nom: IndexInverse() for nom in COLONNES_INDEX}
+        self.type_numeros = type_numeros
+        self.indexees = 0
+
+    @property
+    def nombre(self):
+        return self.colonnes["pgn"].nombre
+
+    # Méthode qui ajoute des trames à partir de leurs identifiants et de leurs numéros. --------------------------------
+    def ajouter_ids(self, ids, numeros):
+        numeros = np.asarray(numeros, dtype=self.type_numeros)
+        if not len(numeros):
+            return
+        pgn, source, destination, _ = decoder_id_lot(ids)
+        for nom, valeurs in zip(COLONNES_INDEX, (pgn, source, destination)):
+            self.colonnes[nom].ajouter(valeurs, numeros)
+        self.indexees = int(numeros[-1]) + 1
+
+    # Méthode qui retourne les numéros triés des trames qui vérifient tous les critères ({"pgn": 129025, ...}). --------
+    def chercher(self, criteres, minimum=0, maximum=None):
+        listes = sorted((self.colonnes[nom].positions(valeur, minimum, maximum) for nom, valeur in criteres.items()),
+                        key=len)
+        resultat = listes[0]
+        for numeros in listes[1:]:
+            resultat = intersection(resultat, numeros)
+        return resultat
+
+    # Méthode qui retire les trames de numéro inférieur à "minimum". ---------------------------------------------------
+    def purger(self, minimum):
+        for index in self.colonnes.values():
+            index.purger(minimum)
+# ============================================= FIN DE LA CLASSE IndexTrames ===========================================
+
+
+# Fonction qui indexe toutes les lignes d'un fichier (texte ou journal binaire), le numéro est celui de la ligne. ------
+# Avec "index", seules les lignes ajoutées au fichier depuis sa construction sont indexées (fichier qui grandit).
+def index_fichier(chemin, index_lignes=None, taille_lot=EXPORT_TAILLE_LOT, index=None):
+    index = index if index is not None else IndexTrames(np.uint32)
+    if est_binaire(chemin):
+        tableau = lire_binaire(chemin)
+        for debut in range(index.indexees, len(tableau), taille_lot):
+            ids = tableau["ID"][debut:debut + taille_lot]
+            index.ajouter_ids(ids, np.arange(debut, debut + len(ids)))
+        return index
+
+    # Fichier texte : les lignes invalides ou vides gardent leur numéro, mais ne sont pas indexées.
+    index_lignes = index_lignes if index_lignes is not None else IndexLignes(chemin)
+    nombre = index_lignes.nombre_lignes
+    for debut in range(index.indexees, nombre, taille_lot):
+        ids, valides = lire_ids(index_lignes.lignes(debut, taille_lot))
+        index.ajouter_ids(ids[valides], debut + np.flatnonzero(valides))
+    return index
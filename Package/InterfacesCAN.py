@@ -0,0 +1,297 @@
+import ctypes
+import math
+import socket
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+
+from Package.constante import *
+from Package.CAN_dll import CANDll, CanError, arret_demande
+
+# **********************************************************************************************************************
+#       Interfaces du bus CAN : adaptateur CANUSB (Windows), SocketCAN (Linux) et générateur de trames simulées
+# **********************************************************************************************************************
+# Toutes les interfaces ont les mêmes méthodes : open, read_into, close, status, et debit pour le débit obtenu.
+# "arret" est un threading.Event (jeton d'arrêt) : son "set" interrompt aussitôt une attente en cours.
+# "read_into" lit dans des CanMsg déjà alloués (l'anneau de l'acquisition) : aucune allocation par trame.
+# Une interface n'a que "open" et "lire_dans" à écrire, InterfaceCAN fait le reste.
+
+
+# Fonction qui estime le nombre maximum de trames par seconde d'un bus. ------------------------------------------------
+# Une trame étendue de 8 octets fait environ 135 bits avec les bits de bourrage.
+def debit_bus(bitrate):
+    try:
+        kbits = int(bitrate.decode() if isinstance(bitrate, bytes) else bitrate)
+    except (TypeError, ValueError):
+        return None
+    return kbits * 1000 / BITS_PAR_TRAME
+
+
+# Fonction qui attend "duree" secondes, ou moins si l'arrêt est demandé. -----------------------------------------------
+def dormir(duree, arret=None):
+    if arret is not None:
+        arret.wait(duree)
+    else:
+        time.sleep(duree)
+
+
+# ================================================== Classe InterfaceCAN ===============================================
+class InterfaceCAN(ABC):
+    nom = "Interface"
+
+    def __init__(self):
+        self._handle = None
+        self.debit_max = None       # Trames par seconde au maximum pour cette interface
+        self.recues = 0
+        self._depart = None
+
+    # Méthode d'ouverture, retourne le handle (256 si ouvert, comme l'adaptateur CANUSB). ------------------------------
+    @abstractmethod
+    def open(self, bitrate=CAN_BAUD_250K, acceptance_code=CANUSB_ACCEPTANCE_CODE_ALL,
+             acceptance_mask=CANUSB_ACCEPTANCE_MASK_ALL, flags=CANUSB_FLAG_TIMESTAMP):
+        pass
+
+    # Méthode qui lit une trame dans "msg", en attendant au plus "delai" secondes. Retourne False sans trame. ----------
+    @abstractmethod
+    def lire_dans(self, msg, delai, arret=None):
+        pass
+
+    # Méthode qui lit les trames disponibles dans cases[debut:fin], en attendant au plus "delai" la première. ----------
+    # Retourne le nombre de trames lues.
+    def read_into(self, cases, debut, fin, delai=LECTURE_DELAI_S, arret=None):
+        if self._handle is None:
+            raise CanError("Channel not open")
+        n = debut
+        if n < fin and self.lire_dans(cases[n], delai, arret):
+            n += 1
+            while n < fin and self.lire_dans(cases[n], 0, arret):
+                n += 1
+        self._compter(n - debut)
+        return n - debut
+
+    def close(self):
+        self._handle = None
+
+    @staticmethod
+    def status():
+        return CANSTATUS_NO_ERROR
+
+    def _compter(self, nombre):
+        if self._depart is None:
+            self._depart = time.perf_counter()
+        self.recues += nombre
+
+    # Méthode qui retourne le débit obtenu depuis la première trame, et le débit maximum de l'interface. ---------------
+    def debit(self):
+        duree = time.perf_counter() - self._depart if self._depart is not None else 0.0
+        return {"interface": self.nom,
+                "recues": self.recues,
+                "trames_par_seconde": self.recues / duree if duree > 0 else 0.0,
+                "debit_max": self.debit_max}
+# ============================================ FIN DE LA CLASSE InterfaceCAN ===========================================
+
+
+# ================================================ Classe InterfaceCANUSB ==============================================
+# L'adaptateur CANUSB par sa DLL (Windows).
+class InterfaceCANUSB(InterfaceCAN):
+    nom = "CANUSB"
+
+    def __init__(self):
+        super().__init__()
+        if sys.platform != "win32":
+            raise CanError("L'adaptateur CANUSB n'existe que sous Windows.")
+        self._dll = CANDll(False)
+
+    def open(self, bitrate=CAN_BAUD_250K, acceptance_code=CANUSB_ACCEPTANCE_CODE_ALL,
+             acceptance_mask=CANUSB_ACCEPTANCE_MASK_ALL, flags=CANUSB_FLAG_TIMESTAMP):
+        self._handle = self._dll.open(bitrate, acceptance_code, acceptance_mask, flags)
+        self.debit_max = debit_bus(bitrate)
+        return self._handle
+
+    # La DLL ne sait pas attendre une trame : on la relit, avec des pauses de plus en plus longues si le bus est calme.
+    def lire_dans(self, msg, delai, arret=None):
+        fin = time.perf_counter() + delai
+        while True:
+            if self._dll.read_dans(msg):
+                return True
+            if time.perf_counter() >= fin or arret_demande(arret):
+                return False
+            self._dll.attendre(arret, fin)
+
+    def close(self):
+        self._dll.close()
+        self._handle = None
+
+    def status(self):
+        return self._dll.status()
+# ============================================ FIN DE LA CLASSE InterfaceCANUSB ========================================
+
+
+# ============================================== Classe InterfaceSocketCAN =============================================
+# Une interface SocketCAN de Linux ("can0", ou "vcan0" pour les essais). Le débit du bus se règle avec "ip link".
+class InterfaceSocketCAN(InterfaceCAN):
+    nom = "SocketCAN"
+
+    def __init__(self, canal=SOCKETCAN_CANAL):
+        super().__init__()
+        self.canal = canal
+        self._socket = None
+        self._trame = TrameSocketCAN()      # Reçoit chaque trame du noyau, sans allocation.
+
+    def open(self, bitrate=CAN_BAUD_250K, acceptance_code=CANUSB_ACCEPTANCE_CODE_ALL,
+             acceptance_mask=CANUSB_ACCEPTANCE_MASK_ALL, flags=CANUSB_FLAG_TIMESTAMP):
+        if not hasattr(socket, "AF_CAN"):
+            raise CanError("SocketCAN n'existe que sous Linux.")
+        try:
+            self._socket = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+            self._socket.bind((self.canal,))
+        except OSError as e:
+            raise CanError(f"Erreur ouverture de {self.canal} : {e}")
+        self.filtrer(acceptance_code, acceptance_mask)
+        self.debit_max = debit_bus(bitrate)
+        self._handle = 256
+        return self._handle
+
+    # Méthode qui traduit un code et un masque d'acceptation SJA1000 en filtre SocketCAN. ------------------------------
+    # L'identifiant étendu commence au bit 3 des registres, les bits du masque à 1 sont indifférents.
+    def filtrer(self, acceptance_code, acceptance_mask):
+        if acceptance_mask == CANUSB_ACCEPTANCE_MASK_ALL:
+            return
+        masque = ~(acceptance_mask >> 3) & socket.CAN_EFF_MASK
+        self._socket.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER,
+                                struct.pack("=II", ((acceptance_code >> 3) & masque) | socket.CAN_EFF_FLAG,
+                                            masque | socket.CAN_EFF_FLAG))
+
+    # Le noyau réveille le thread à l'arrivée d'une trame : il n'y a rien à relire en boucle.
+    # NMEA 2000 n'utilise que des trames étendues de données : les trames standard, RTR ou d'erreur sont sautées.
+    def lire_dans(self, msg, delai, arret=None):
+        fin = time.perf_counter() + delai
+        self._socket.settimeout(delai if delai > 0 else 0.0)
+        trame = self._trame
+        while True:
+            try:
+                self._socket.recv_into(trame)
+            except (socket.timeout, BlockingIOError):
+                return False
+            if trame.can_id & (socket.CAN_EFF_FLAG | socket.CAN_RTR_FLAG | socket.CAN_ERR_FLAG) == socket.CAN_EFF_FLAG:
+                break
+            self._socket.settimeout(max(0.0, fin - time.perf_counter()))
+        msg.ID = trame.can_id & socket.CAN_EFF_MASK
+        msg.TimeStamp = int(time.monotonic() * 1000) & 0x7FFFFFFF
+        msg.flags = 0
+        msg.len = trame.can_dlc
+        ctypes.memmove(msg.data, trame.data, 8)
+        return True
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._handle = None
+# =========================================== FIN DE LA CLASSE InterfaceSocketCAN ======================================
+
+
+# La "struct can_frame" de SocketCAN : can_id, can_dlc, 3 octets de bourrage, data.
+class TrameSocketCAN(ctypes.Structure):
+    _fields_ = (
+        ("can_id", ctypes.c_uint32),
+        ("can_dlc", ctypes.c_ubyte),
+        ("bourrage", ctypes.c_ubyte * 3),
+        ("data", ctypes.c_ubyte * 8)
+    )
+
+
+# ================================================ Classe InterfaceSimulee =============================================
+# Générateur de trames NMEA 2000 pour essayer l'application sans bateau : position, cap, vent, profondeur...
+# "trames_par_seconde" = 0 : les trames sont produites le plus vite possible.
+class InterfaceSimulee(InterfaceCAN):
+    nom = "Simulation"
+
+    def __init__(self, trames_par_seconde=SIMULATION_TRAMES_S):
+        super().__init__()
+        self.trames_par_seconde = trames_par_seconde
+        self._numero = 0
+        self._prochaine = 0.0
+        self._code = 0
+        self._masque = CAN_MASQUE_ID
+
+    def open(self, bitrate=CAN_BAUD_250K, acceptance_code=CANUSB_ACCEPTANCE_CODE_ALL,
+             acceptance_mask=CANUSB_ACCEPTANCE_MASK_ALL, flags=CANUSB_FLAG_TIMESTAMP):
+        self.debit_max = self.trames_par_seconde or math.inf
+        # Le filtre d'acceptation est appliqué comme le ferait l'adaptateur (voir FiltreCAN.py).
+        self._masque = ~(acceptance_mask >> 3) & CAN_MASQUE_ID
+        self._code = (acceptance_code >> 3) & self._masque
+        self._numero = 0
+        self._prochaine = time.perf_counter()
+        self._handle = 256
+        return self._handle
+
+    def lire_dans(self, msg, delai, arret=None):
+        if self.trames_par_seconde:
+            attente = self._prochaine - time.perf_counter()
+            if attente > delai:
+                dormir(delai, arret)
+                return False
+            if attente > 0:
+                dormir(attente, arret)
+            self._prochaine += 1 / self.trames_par_seconde
+        # Une trame refusée par le filtre d'acceptation n'arrive pas : elle a quand même pris sa place sur le bus.
+        self._generer(msg)
+        return msg.ID & self._masque == self._code
+
+    # Méthode qui produit la trame suivante dans "msg", les PGN tournent les uns après les autres. ---------------------
+    def _generer(self, msg):
+        n = self._numero
+        self._numero += 1
+        t = n / (self.trames_par_seconde or 1000)      # Temps simulé en secondes.
+        pgn, datas = TRAMES_SIMULEES[n % len(TRAMES_SIMULEES)](t)
+
+        msg.ID = (2 << 26) | (pgn << 8) | 0x23          # Priorité 2, source 0x23.
+        msg.TimeStamp = int(t * 1000) & 0x7FFFFFFF
+        msg.flags = 0
+        msg.len = 8
+        msg.data[:] = datas.ljust(8, b"\xff")
+# ============================================ FIN DE LA CLASSE InterfaceSimulee =======================================
+
+
+# Trames simulées : un bateau qui tourne en rond à 6 noeuds près de Huahine, vent de 15 noeuds. ------------------------
+def _position(t):
+    angle = t / 600
+    return 129025, struct.pack("<ii", int((-16.72 + 0.01 * math.sin(angle)) * 1e7),
+                               int((-151.03 + 0.01 * math.cos(angle)) * 1e7))
+
+
+def _cap(t):
+    return 127250, struct.pack("<BHhhB", 0, int((t / 600 % (2 * math.pi)) * 1e4), 0, 0, 0)
+
+
+def _vent(t):
+    return 130306, struct.pack("<BHHB", 0, int(15 / 1.94384449 * 100 + 50 * math.sin(t)), 7854, 2)
+
+
+def _profondeur(t):
+    return 128267, struct.pack("<BIh", 0, int((12 + 3 * math.sin(t / 60)) * 100), 0)
+
+
+def _cog_sog(t):
+    return 129026, struct.pack("<BBHH", 0, 0, int((t / 600 % (2 * math.pi)) * 1e4), int(6 / 1.94384449 * 100))
+
+
+TRAMES_SIMULEES = (_position, _cap, _vent, _profondeur, _cog_sog)
+
+
+# Interfaces disponibles, par nom.
+INTERFACES = {"CANUSB": InterfaceCANUSB,
+              "SocketCAN": InterfaceSocketCAN,
+              "Simulation": InterfaceSimulee}
+
+INTERFACE_DEFAUT = "CANUSB" if sys.platform == "win32" else "SocketCAN"
+
+
+# Fonction qui crée une interface par son nom. -------------------------------------------------------------------------
+def creer_interface(nom=INTERFACE_DEFAUT, **options):
+    classe = INTERFACES.get(nom)
+    if classe is None:
+        raise CanError(f"Interface inconnue : {nom}")
+    return classe(**options)
@@ -0,0 +1,148 @@
+import os
+import struct
+
+import numpy as np
+
+from Package.DecodageLot import TramesLot, lire_lignes
+
+# **********************************************************************************************************************
+#       Journal binaire du bus CAN : enregistrements de taille fixe, au format de la structure CanMsg
+# **********************************************************************************************************************
+# En-tête de 16 octets : signature, version, taille d'un enregistrement, réservé.
+# Puis un enregistrement de 20 octets par trame : ID, TimeStamp, flags, len, 8 octets de données, 2 octets de bourrage,
+# comme CanMsg sous Windows (c_long sur 4 octets). Le fichier est lu par projection en mémoire, sans copie.
+
+EXTENSION_BINAIRE = ".can"
+SIGNATURE = b"HUACAN\x1a\n"
+VERSION = 1
+ENTETE = struct.Struct("<8sHHI")
+
+# Un enregistrement du journal binaire.
+TRAME = np.dtype({"names": ("ID", "TimeStamp", "flags", "len", "data"),
+                  "formats": ("<u4", "<i4", "u1", "u1", ("u1", 8)),
+                  "offsets": (0, 4, 8, 9, 10),
+                  "itemsize": 20})
+
+# Nombre de lignes converties à la fois entre le texte et le binaire.
+LIGNES_PAR_LOT = 100000
+
+
+# ============================================== EN-TETE DU JOURNAL ====================================================
+# Fonction qui retourne l'en-tête d'un journal binaire. ----------------------------------------------------------------
+def entete():
+    return ENTETE.pack(SIGNATURE, VERSION, TRAME.itemsize, 0)
+
+
+# Fonction qui indique si un fichier est un journal binaire, d'après sa signature. -------------------------------------
+def est_binaire(chemin):
+    try:
+        with open(chemin, "rb") as fichier:
+            return fichier.read(len(SIGNATURE)) == SIGNATURE
+    except OSError:
+        return False
+
+
+# Fonction qui vérifie l'en-tête d'un journal binaire. -----------------------------------------------------------------
+def verifier_entete(octets):
+    if len(octets) < ENTETE.size:
+        raise ValueError("Journal binaire trop court.")
+    signature, version, taille, _ = ENTETE.unpack(octets[:ENTETE.size])
+    if signature != SIGNATURE:
+        raise ValueError("Ce fichier n'est pas un journal binaire du bus CAN.")
+    if version != VERSION or taille != TRAME.itemsize:
+        raise ValueError(f"Version {version} du journal binaire non prise en charge (enregistrement de {taille} octets).")
+
+
+# ============================================ LECTURE DU JOURNAL ======================================================
+# Fonction qui projette un journal binaire en mémoire et le retourne comme tableau structuré "TRAME". -----------------
+# Le tableau est en lecture seule et ne copie rien : seules les trames lues sont chargées depuis le disque.
+def lire_binaire(chemin):
+    taille = os.path.getsize(chemin)
+    with open(chemin, "rb") as fichier:
+        verifier_entete(fichier.read(ENTETE.size))
+
+    nombre, reste = divmod(taille - ENTETE.size, TRAME.itemsize)
+    if reste:
+        # Dernier enregistrement incomplet : le programme s'est arrêté pendant l'écriture.
+        print(f"Enregistrement incomplet ignoré à la fin de {chemin} ({reste} octets).")
+    if nombre == 0:
+        return np.zeros(0, dtype=TRAME)
+    return np.memmap(chemin, dtype=TRAME, mode="r", offset=ENTETE.size, shape=(nombre,))
+
+
+# Fonction qui présente un tableau "TRAME" comme un lot de trames pour le décodage par lots. ---------------------------
+def trames_binaire(tableau):
+    return TramesLot(tableau["TimeStamp"], tableau["ID"], np.minimum(tableau["len"], 8), tableau["data"], 0)
+
+
+# ============================================ ECRITURE DU JOURNAL =====================================================
+# Fonction qui transforme un lot de trames (voir DecodageLot.TramesLot) en tableau "TRAME". ----------------------------
+def tableau_lot(trames):
+    tableau = np.zeros(len(trames.ids), dtype=TRAME)
+    tableau["TimeStamp"] = trames.horodatage
+    tableau["ID"] = trames.ids
+    tableau["len"] = trames.longueurs
+    tableau["data"] = trames.octets
+    return tableau
+
+
+# Fonction qui transforme un lot de trames en enregistrements binaires. ------------------------------------------------
+def enregistrements_lot(trames):
+    return tableau_lot(trames).tobytes()
+
+
+# Fonction qui copie un tableau de CanMsg (l'anneau de l'acquisition, ID sur 4 ou 8 octets) en tableau "TRAME". --------
+def copie_trames(tableau):
+    copie = np.empty(len(tableau), dtype=TRAME)
+    copie["ID"] = tableau["ID"]
+    copie["TimeStamp"] = tableau["TimeStamp"]
+    copie["flags"] = tableau["flags"]
+    copie["len"] = tableau["len"]
+    copie["data"] = tableau["data"]
+    return copie
+
+
+# Fonction qui met en texte un tableau "TRAME" : "TimeStamp ID Len XX XX ...". -----------------------------------------
+def lignes_texte(tableau):
+    datas = np.ascontiguousarray(tableau["data"]).tobytes()
+    for i, (horodatage, id_msg, longueur) in enumerate(zip(tableau["TimeStamp"].tolist(), tableau["ID"].tolist(),
+                                                           tableau["len"].tolist())):
+        octets = datas[8 * i:8 * i + min(longueur, 8)]
+        if octets:
+            yield f"{horodatage} {id_msg:08X} {longueur} {octets.hex(' ').upper()}\n"
+        else:
+            yield f"{horodatage} {id_msg:08X} {longueur}\n"
+
+
+# ========================================= CONVERSIONS TEXTE <-> BINAIRE ==============================================
+# Fonction qui convertit un journal texte en journal binaire, retourne le nombre de trames écrites. -------------------
+def texte_vers_binaire(chemin_texte, chemin_binaire, lignes_par_lot=LIGNES_PAR_LOT):
+    nombre = 0
+    with open(chemin_texte, "r", encoding="utf-8-sig", errors="replace") as source, \
+            open(chemin_binaire, "wb") as destination:
+        destination.write(entete())
+        lot = []
+        for ligne in source:
+            if ligne.strip():
+                lot.append(ligne)
+            if len(lot) >= lignes_par_lot:
+                nombre += _ecrire_lot(destination, lot)
+                lot = []
+        if lot:
+            nombre += _ecrire_lot(destination, lot)
+    return nombre
+
+
+def _ecrire_lot(destination, lignes):
+    trames = lire_lignes(lignes)
+    destination.write(enregistrements_lot(trames))
+    return len(trames.ids)
+
+
+# Fonction qui convertit un journal binaire en journal texte, retourne le nombre de trames écrites. -------------------
+def binaire_vers_texte(chemin_binaire, chemin_texte, lignes_par_lot=LIGNES_PAR_LOT):
+    tableau = lire_binaire(chemin_binaire)
+    with open(chemin_texte, "w", encoding="utf-8") as destination:
+        for debut in range(0, len(tableau), lignes_par_lot):
+            destination.writelines(lignes_texte(tableau[debut:debut + lignes_par_lot]))
+    return len(tableau)
@@ -1,709 +1,375 @@
-import math
 import asyncio
+import threading
 from Package.constante import *
+from Package.DefinitionsPGN import PGN_DEFINITIONS, DECODEURS, DECODEURS_MESSAGES, Decodage
+from Package.Reassemblage import Reassembleur
 
 # **********************************************************************************************************************
 #       Programme d'analyse des trames du bus CAN et les transforment en NMEA 2000
 # **********************************************************************************************************************
 
+# ================================ FONCTIONS DE DECODAGE SANS ETAT =====================================================
+# Ces fonctions n'écrivent dans aucune variable partagée : elles peuvent être appelées en même temps
+# depuis plusieurs threads, ou depuis des processus de travail.
+
+# On récupère le PGN, puis la source ensuite la detination ensuite la priorité. ----------------------------------------
+def decoder_pgn(id_msg):
+    pf = (id_msg & 0x00FF0000) >> 16  # Extraire les bits PF (byte 2)
+    ps = (id_msg & 0x0000FF00) >> 8  # Extraire les bits PS (byte 1)
+    dp = (id_msg & 0x03000000) >> 24  # Extraire les bits DP (bits 24-25)
+
+    if pf < 240:  # Si PF < 240, c'est un message point à point
+        return (dp << 16) | (pf << 8)  # Construire le PGN
+
+    # Sinon, c'est un message global (broadcast)
+    return (dp << 16) | (pf << 8) | ps
+
+
+def decoder_source(id_msg):
+    return id_msg & 0xFF
+
+
+def decoder_destination(id_msg):
+    if ((id_msg & 0xFF0000) >> 16) < 240:
+        return (id_msg & 0x00FF00) >> 8
+    return (id_msg & 0xFF0000) >> 16
+
+
+def decoder_priorite(id_msg):
+    return (id_msg & 0x1C000000) >> 26
+
+
+# Renvoi un tuple contenant toutes les variables contenus dans l'id. ---------------------------------------------------
+def decoder_id(id_msg):
+    return decoder_pgn(id_msg), decoder_source(id_msg), decoder_destination(id_msg), decoder_priorite(id_msg)
+
+
+# Décode les octets d'une trame seule avec les fonctions compilées depuis le registre "PGN_DEFINITIONS". ---------------
+# Le résultat est un "Decodage" aux valeurs numériques, mis en texte seulement à l'affichage.
+def decoder_octets(pgn, datas):
+    decodeur = DECODEURS.get(pgn)
+    if decodeur is None:
+        print(f"PGN inattendu : {pgn}, Données : {datas}")
+        return Decodage(pgn, "<PGN inconnu sur cette version>", (), ())
+    return decodeur(datas)
+
+
+# Décode un message complet, après réassemblage. -----------------------------------------------------------------------
+def decoder_message(message):
+    try:
+        return DECODEURS_MESSAGES[message.pgn](message.octets)
+    except (IndexError, KeyError) as e:
+        print(f"Message incomplet sur le PGN {message.pgn}, longueur {len(message.octets)} : {e}")
+        return None
+# ============================== FIN DES FONCTIONS DE DECODAGE SANS ETAT ===============================================
+
+
+# ===================================================== Classe CacheID ==================================================
+# Sur un bus réel, il n'y a que quelques centaines d'identifiants différents : le tuple (pgn, source, destination,
+# priorité) est calculé une seule fois par identifiant, puis relu dans un dictionnaire.
+# Le cache est borné : une fois plein, les identifiants les plus anciens sont retirés.
+# Il est partagé par le thread de la fenêtre et ceux des exports : les ajouts et les retraits se font sous un verrou.
+# Une lecture réussie ne prend pas le verrou (dict.get est atomique), son compteur peut perdre quelques unités.
+class CacheID:
+    def __init__(self, taille_max=CACHE_ID_TAILLE):
+        self._taille_max = taille_max
+        self._verrou = threading.Lock()
+        self._ids = {}      # id_msg -> (pgn, source, destination, priorité)
+        self._textes = {}   # "09F80103" -> (id_msg, pgn, source, destination, priorité)
+        self.succes = 0
+        self.echecs = 0
+
+    # Méthode qui retourne (pgn, source, destination, priorité) d'un identifiant. --------------------------------------
+    def id(self, id_msg):
+        resultat = self._ids.get(id_msg)
+        if resultat is not None:
+            self.succes += 1
+            return resultat
+
+        with self._verrou:
+            self.echecs += 1
+            resultat = decoder_id(id_msg)
+            self._borner(self._ids)
+            self._ids[id_msg] = resultat
+            return resultat
+
+    # Méthode qui retourne (id_msg, pgn, source, destination, priorité) d'un identifiant en hexadécimal. ---------------
+    def texte(self, id_texte):
+        resultat = self._textes.get(id_texte)
+        if resultat is not None:
+            self.succes += 1
+            return resultat
+
+        with self._verrou:
+            self.echecs += 1
+            id_msg = int(id_texte, 16)
+            resultat = (id_msg,) + decoder_id(id_msg)
+            self._borner(self._textes)
+            self._textes[id_texte] = resultat
+            return resultat
+
+    # Méthode qui retire le plus ancien identifiant si le cache est plein (appelée avec le verrou). --------------------
+    def _borner(self, cache):
+        if len(cache) >= self._taille_max:
+            del cache[next(iter(cache))]
+
+    # Méthode pour vider le cache. -------------------------------------------------------------------------------------
+    def vider(self):
+        with self._verrou:
+            self._ids.clear()
+            self._textes.clear()
+            self.succes = 0
+            self.echecs = 0
+
+    # Méthode qui retourne les compteurs. ------------------------------------------------------------------------------
+    def statistiques(self):
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {"ids": len(self._ids),
+                    "textes": len(self._textes),
+                    "succes": self.succes,
+                    "echecs": self.echecs,
+                    "taux": self.succes / total if total else 0.0}
+# ================================================= FIN DE LA CLASSE CacheID ===========================================
+
+# Cache partagé par le temps réel, la table et l'import des fichiers.
+CACHE_ID = CacheID()
+
+
+# ================================================== Classe CacheDecodage ==============================================
+# Les instruments répètent sans cesse les mêmes octets (vent, cap, profondeur stables) : le texte décodé d'une trame
+# est gardé par (identifiant, octets). Une fois le cache plein, la trame la moins récemment lue est retirée.
+class CacheDecodage:
+    def __init__(self, taille_max=CACHE_DECODAGE_TAILLE):
+        self._taille_max = taille_max
+        self._textes = {}   # (id_msg, octets) -> (pgn, source, valeurs en texte), du moins récent au plus récent
+        self.succes = 0
+        self.echecs = 0
+
+    # Méthode qui retourne (pgn, source, valeurs en texte) d'une trame, "octets" est un bytes. -------------------------
+    def texte(self, id_msg, octets):
+        cle = (id_msg, octets)
+        resultat = self._textes.pop(cle, None)
+        if resultat is not None:
+            self.succes += 1
+        else:
+            self.echecs += 1
+            resultat = self._decoder(id_msg, octets)
+            if len(self._textes) >= self._taille_max:
+                del self._textes[next(iter(self._textes))]
+        self._textes[cle] = resultat
+        return resultat
+
+    # Méthode qui décode une trame seule et met ses valeurs en texte : "Libellé: valeur unité | ...". ------------------
+    @staticmethod
+    def _decoder(id_msg, octets):
+        pgn, source, _, _ = CACHE_ID.id(id_msg)
+        decodeur = DECODEURS.get(pgn)
+        if decodeur is None:
+            return pgn, source, ""
+        try:
+            resultat = decodeur(list(octets))
+        except (IndexError, KeyError, ValueError) as e:
+            return pgn, source, f"Erreur : {e}"
+        textes = [f"{nom}: {texte} {unite}".rstrip() for (nom, texte), unite in zip(resultat.couples(),
+                                                                                  resultat.unites())]
+        if resultat.trame is not None:
+            textes.insert(0, f"{resultat.titre}: N° {resultat.trame}")
+        return pgn, source, " | ".join(textes)
+
+    # Méthode pour vider le cache. -------------------------------------------------------------------------------------
+    def vider(self):
+        self._textes.clear()
+        self.succes = 0
+        self.echecs = 0
+
+    # Méthode qui retourne les compteurs. ------------------------------------------------------------------------------
+    def statistiques(self):
+        total = self.succes + self.echecs
+        return {"textes": len(self._textes),
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "taux": self.succes / total if total else 0.0}
+# ============================================== FIN DE LA CLASSE CacheDecodage ========================================
+
+# Cache des colonnes décodées de la table.
+CACHE_DECODAGE = CacheDecodage()
+
+
+# ================================================ Classe ContexteDecodage =============================================
+# L'état d'un flux de trames (réassemblage des PGN sur plusieurs trames) est gardé ici, et non dans le décodeur.
+# Chaque flux a son propre contexte : le temps réel, un export, un processus de travail...
+# Un contexte n'est utilisé que par un seul thread à la fois.
+class ContexteDecodage:
+    def __init__(self):
+        self.reassembleur = Reassembleur()
+
+    # Méthode qui décode une trame reçue en gardant la suite des PGN sur plusieurs trames. ----------------------------
+    # Pour un PGN sur plusieurs trames, le message complet est décodé sur sa dernière trame,
+    # les trames intermédiaires ne donnent que leur numéro de trame.
+    def trame(self, pgn, source, datas, horodatage=None):
+        pgn = int(pgn)
+        if pgn in DECODEURS_MESSAGES:
+            message = self.reassembleur.ajouter(source, pgn, datas, horodatage)
+            if message is None:
+                return Decodage(pgn, PGN_DEFINITIONS[pgn].titre, (), (), trame=datas[0] & 0x1F)
+            resultat = decoder_message(message)
+            if resultat is None:
+                return Decodage(pgn, PGN_DEFINITIONS[pgn].titre, (), ())
+            return resultat
+
+        return decoder_octets(pgn, datas)
+# ============================================ FIN DE LA CLASSE ContexteDecodage =======================================
+
+
+# Un abonné à un PGN : la fonction appelée, les champs voulus et la période d'appel (1 = chaque message).
+class Abonne:
+    __slots__ = ("fonction", "champs", "periode", "compteur")
+
+    def __init__(self, fonction, champs=None, periode=1):
+        self.fonction = fonction
+        self.champs = champs
+        self.periode = periode
+        self.compteur = 0
+
+
 # Cette classe permet de déduire le PGN, sa source, son destinataire, sa priorité et la définition des octets.
+# Elle ne garde que le contexte du temps réel, le décodage lui-même passe par les fonctions sans état.
 class NMEA2000:
-    coor = 0
     def __init__(self,main_window):
         self.main_window = main_window
-        self._definition = None
         print("NMEA2000 initialisé.")
 
-        self._analyse0 = None
-        self._analyse1 = None
-        self._analyse2 = None
-        self._analyse3 = None
-        self._analyse4 = None
-        self._analyse5 = None
-        self._analyse6 = None
-        self._analyse7 = None
-
-        self._pgn1 = None
-        self._pgn2 = None
-        self._pgn3 = None
-        self._definition = None
-        self._valeurChoisieTab = None
-        self._valeurChoisie2 = None
-        self._valeurChoisie1 = None
-        self._valeurChoisie3 = None
-        self._priorite = None
-        self._destination = None
-        self._source = None
-        self._pgn = None
-
-        self._coor = None
-
-        # Défini la taille de la mémoire, elle est calculé au plus juste, mais c'est la plus rapide.
-        nombre_octets = 8
-        nombre_pgn = 25
-        nombre_trames = 36  # On limite la valeur à 36 le nombre maximum de trames sur le même PGN.
-        valeur_defaut = 0
-
-        # Crée une table 3D fixe remplie avec la valeur par défaut
-        self.memoire = [[[valeur_defaut for _ in range(nombre_trames)]
-                         for _ in range(nombre_pgn)]
-                        for _ in range(nombre_octets)]
-
-    # ========================== Méthodes de récupération des valeurs dans l'ID ========================================
-    # On récupère le PGN, puis la source ensuite la detination ensuite la priorité.
-    def pgn(self, id_msg):
-        try:
-            pf = (id_msg & 0x00FF0000) >> 16  # Extraire les bits PF (byte 2)
-            ps = (id_msg & 0x0000FF00) >> 8  # Extraire les bits PS (byte 1)
-            dp = (id_msg & 0x03000000) >> 24  # Extraire les bits DP (bits 24-25)
-
-            if pf < 240:  # Si PF < 240, c'est un message point à point
-                self._pgn = (dp << 16) | (pf << 8)  # Construire le PGN
-
-            else:  # Sinon, c'est un message global (broadcast)
-                self._pgn = (dp << 16) | (pf << 8) | ps
-
-            return self._pgn
-
-        except Exception as e:
-            print(f"Erreur dans la méthode 'pgn' : {e}")
-            raise
-
-    def source(self,id_msg):
-        self._source = id_msg & 0xFF
-        return self._source
+        # Contexte du temps réel : réassemblage des PGN sur plusieurs trames.
+        self._contexte = ContexteDecodage()
 
-    def destination(self,id_msg):
-        if ((id_msg & 0xFF0000) >> 16) < 240:
-            self._destination = (id_msg &  0x00FF00) >> 8
-        else:
-            self._destination = (id_msg & 0xFF0000) >> 16
-
-        return self._destination
+        # Abonnés par PGN, et table de routage par identifiant CAN : (pgn, source, abonnés), ou () sans abonné.
+        self._abonnes = {}
+        self._routes = {}
+        self.distribuees = 0
+        self.ignorees = 0
 
-    def priorite(self,id_msg):
-        self._priorite = (id_msg & 0x1C000000) >> 26
-        return self._priorite
+        # La carte reçoit la position environ toutes les secondes (1/10 scrutation).
+        self.abonner(129025, self._position, champs=("Lattitude", "Longitude"), periode=10)
 
-    # Renvoi un tuple contenant toutes les variables contenus dans l'id
-    def id(self,id_msg):
-        return self.pgn(id_msg), self.source(id_msg) ,self.destination(id_msg),self.priorite(id_msg)
+    # ========================== Méthodes de récupération des valeurs dans l'ID ========================================
+    @staticmethod
+    def pgn(id_msg):
+        return decoder_pgn(id_msg)
+
+    @staticmethod
+    def source(id_msg):
+        return decoder_source(id_msg)
+
+    @staticmethod
+    def destination(id_msg):
+        return decoder_destination(id_msg)
+
+    @staticmethod
+    def priorite(id_msg):
+        return decoder_priorite(id_msg)
+
+    # Renvoi un tuple contenant toutes les variables contenus dans l'id, lu dans le cache des identifiants.
+    @staticmethod
+    def id(id_msg):
+        return CACHE_ID.id(id_msg)
+
+    @property
+    def cache_id(self):
+        return CACHE_ID
     # ================================== FIN DES METHODES POUR L'ID ====================================================
 
-    # ================================= Méthodes de gestion de la mémoire ==============================================
-    def set_memoire(self, numero_d_octet, numero_pgn, numero_de_trame, valeur):
-        self.memoire[numero_d_octet][numero_pgn][numero_de_trame] = valeur
-
-    def get_memoire(self, numero_d_octet, numero_pgn, numero_de_trame):
-        return self.memoire[numero_d_octet][numero_pgn][numero_de_trame]
-    # ======================================== Fin des mémoires ========================================================
+    @property
+    def contexte(self):
+        return self._contexte
 
+    @property
+    def reassembleur(self):
+        return self._contexte.reassembleur
 
     # ============================= Méthodes de récupération des valeurs des octets ====================================
-    def octets(self,pgn,datas):
-        self._pgn1 = None
-        self._pgn2 = None
-        self._pgn3 = None
-        self._valeurChoisieTab = None
-        self._valeurChoisie2 = None
-        self._valeurChoisie1 = None
-        self._valeurChoisie3 = None
-        self._definition = None
-        # z = Numéro de trame pour le même PGN.
-
+    # Décodage d'une trame seule, sans état (clic sur la table).
+    @staticmethod
+    def octets(pgn,datas):
+        return decoder_octets(int(pgn), datas)
+
+    # Décodage d'une trame du temps réel, avec le réassemblage et la position sur la carte.
+    def trame(self, pgn, source, datas, horodatage=None):
+        return self._contexte.trame(pgn, source, datas, horodatage)
+
+    # ================================== Abonnements aux PGN ==========================================================
+    # Méthode pour abonner une fonction à un PGN. ----------------------------------------------------------------------
+    # Sans "champs", la fonction reçoit (decodage, source, horodatage), sinon les valeurs des champs demandés.
+    def abonner(self, pgn, fonction, champs=None, periode=1):
+        self._abonnes.setdefault(int(pgn), []).append(Abonne(fonction, champs, periode))
+        self._routes.clear()
+
+    # Méthode pour désabonner une fonction d'un PGN. -------------------------------------------------------------------
+    def desabonner(self, pgn, fonction):
+        abonnes = [a for a in self._abonnes.get(int(pgn), []) if a.fonction != fonction]
+        if abonnes:
+            self._abonnes[int(pgn)] = abonnes
+        else:
+            self._abonnes.pop(int(pgn), None)
+        self._routes.clear()
+
+    # Méthode qui retourne les PGN qui ont au moins un abonné. ---------------------------------------------------------
+    def pgn_abonnes(self):
+        return set(self._abonnes)
+
+    # Méthode qui envoie une trame du temps réel à ses abonnés. --------------------------------------------------------
+    # Une trame sans abonné ne coûte qu'une lecture dans la table de routage.
+    def distribuer(self, id_msg, datas, horodatage=None):
+        route = self._routes.get(id_msg)
+        if route is None:
+            route = self._router(id_msg)
+        if not route:
+            self.ignorees += 1
+            return
+
+        pgn, source, abonnes = route
+        resultat = self._contexte.trame(pgn, source, datas, horodatage)
+        # Trame intermédiaire d'un PGN sur plusieurs trames, ou message incomplet.
+        if resultat.trame is not None or not resultat.valeurs:
+            return
+
+        self.distribuees += 1
+        for abonne in abonnes:
+            abonne.compteur += 1
+            if (abonne.compteur - 1) % abonne.periode:
+                continue
+            try:
+                if abonne.champs is None:
+                    abonne.fonction(resultat, source, horodatage)
+                else:
+                    abonne.fonction(*(resultat.valeur(nom) for nom in abonne.champs))
+            except Exception as e:
+                print(f"Erreur chez un abonné du PGN {pgn} : {e}")
+
+    # Méthode qui calcule la route d'un identifiant pas encore vu. -----------------------------------------------------
+    def _router(self, id_msg):
+        pgn, source, _, _ = CACHE_ID.id(id_msg)
+        abonnes = self._abonnes.get(pgn)
+        route = (pgn, source, tuple(abonnes)) if abonnes else ()
+        if len(self._routes) >= CACHE_ID_TAILLE:
+            self._routes.clear()
+        self._routes[id_msg] = route
+        return route
+
+    # Méthode qui retourne les compteurs de la distribution. -----------------------------------------------------------
+    def statistiques(self):
+        return {"abonnes": {pgn: len(abonnes) for pgn, abonnes in self._abonnes.items()},
+                "routes": len(self._routes),
+                "distribuees": self.distribuees,
+                "ignorees": self.ignorees}
+    # ================================== FIN DES ABONNEMENTS ===========================================================
+
+    # Méthode appelée par l'abonnement au PGN 129025 quand une position doit être envoyée à la carte. ------------------
+    def _position(self, latitude, longitude):
         try:
-            match int(pgn):
-                case 129025:
-                    self._valeurChoisie1 = "{:.6f}".format((datas[3] << 24 | datas[2] << 16
-                                                            | datas[1] << 8 | datas[0]) * (10 ** -7))
-                    self._pgn1 = "Lattitude"
-
-                    self._valeurChoisie2 = "{:.6f}".format((datas[7] << 24 | datas[6] << 16
-                                                            | datas[5] << 8 | datas[3]) * (10 ** -7))
-                    self._pgn2 = "Longitude"
-
-                    # Pour Analyse.
-                    self._analyse3 = "Coor " + self._pgn1
-                    self._analyse2 = "Coor " + self._pgn1
-                    self._analyse1 = "Coor " + self._pgn1
-                    self._analyse0 = "Coor " + self._pgn1
-                    self._analyse7 = "Coor " + self._pgn2
-                    self._analyse6 = "Coor " + self._pgn2
-                    self._analyse5 = "Coor " + self._pgn2
-                    self._analyse4 = "Coor " + self._pgn2
-
-                    # Mise à jour des coordonnées sur la carte environ toutes les secondes (1/10 scrutation).
-                    if NMEA2000.coor % 10 == 0:
-                        try:
-                            asyncio.create_task(
-                                self.safe_update_coordinates(self._valeurChoisie1, self._valeurChoisie2)
-                            )
-                        except Exception as e:
-                            print(f"Erreur lors de la création de la tâche asynchrone : {e}")
-                    NMEA2000.coor += 1
-
-                case 130306:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.01 * 1.94384449)
-                    self._pgn1 = "Noeuds du Vent"
-
-                    self._valeurChoisie2 = "{:.2f}".format((datas[4] << 8 | datas[3]) * 0.0001 * 180 / math.pi)
-                    self._pgn2 = "Direction du vent"
-
-                    self._valeurChoisieTab = datas[5] & 0x07
-                    self._definition = VENT[self._valeurChoisieTab]
-
-                    # Pour Analyse.
-                    self._analyse2 = "Nds " + self._pgn1
-                    self._analyse1 = "Nds " + self._pgn1
-                    self._analyse4 = "Deg " + self._pgn2
-                    self._analyse3 = "Deg " + self._pgn2
-                    self._analyse5 = "Table: sur 3 bits"
-
-                case 129026:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 * 180 / math.pi)
-                    self._pgn1 = "COG"
-
-                    self._valeurChoisie2 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.01 * 1.94384449)
-                    self._pgn2 = "SOG"
-
-                    # Pour Analyse.
-                    self._analyse3 = "Deg " + self._pgn1
-                    self._analyse2 = "Deg " + self._pgn1
-                    self._analyse5 = "Nds " + self._pgn2
-                    self._analyse4 = "Nds " + self._pgn2
-
-                case 127250:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.0001 * 180 / math.pi)
-                    self._pgn1 = "Heading"
-
-                    # Pour Analyse.
-                    self._analyse2 = "Deg " + self._pgn1
-                    self._analyse1 = "Deg " + self._pgn1
-
-                    self._analyse4 = "Deg Déviation"
-                    self._analyse3 = "Deg Déviation"
-                    self._analyse6 = "Deg Variation"
-                    self._analyse5 = "Deg Variation"
-                    self._analyse7 = "Référence 2 bits"
-
-                case 128267:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[4] << 24 | datas[3] << 16
-                                                            |  datas[2] << 8 |  datas[1]   )  * 0.01)
-                    self._pgn1 = "Profondeur"
-
-                    # Pour Analyse.
-                    self._analyse4 = "m " + self._pgn1
-                    self._analyse3 = "m " + self._pgn1
-                    self._analyse2 = "m " + self._pgn1
-                    self._analyse1 = "m " + self._pgn1
-                    self._analyse6 = "Sous la quille"
-                    self._analyse5 = "Sous la quille"
-
-                case 130312:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[4] << 8 | datas[3])  * 0.01 - 273.15)
-                    self._pgn1 = "Température"
-
-                    self._valeurChoisieTab = datas[2]
-                    self._definition = TEMPERATURE[self._valeurChoisieTab]
-
-                    # Pour Analyse.
-                    self._analyse4 = "°C " + self._pgn1
-                    self._analyse3 = "°C " + self._pgn1
-                    self._analyse6 = "°C R&gler la temp."
-                    self._analyse5 = "°C R&gler la temp."
-
-                case 130316:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[5] << 16 | datas[4] << 8 | datas[3]) * 0.01 - 273.15)
-                    self._pgn1 = "Température étendue"
-
-                    self._valeurChoisieTab = datas[2]
-                    self._definition = TEMPERATURE[self._valeurChoisieTab]
-
-                    # Pour Analyse.
-                    self._analyse5 = "°C " + self._pgn1
-                    self._analyse4 = "°C " + self._pgn1
-                    self._analyse3 = "°C " + self._pgn1
-                    self._analyse2 = "Table Temp."
-
-                case 130310:
-                    self._pgn1 = "Température Mer"
-                    if datas[2] & 0xEF != 0xEF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.01 - 273.15)
-
-                    self._pgn2 = "Température de l'air"
-                    if datas[4] & 0xEF != 0xEF:
-                        if datas[4] & 0xEf != 0xEF:
-                            self._valeurChoisie2 = "{:.2f}".format((datas[4] << 8 | datas[3]) * 0.01 - 273.15)
-
-                    self._pgn3 = "Pression atmosphérique"
-                    if datas[6] & 0xEF != 0xEF:
-                        self._valeurChoisie3 = "{:.2f}".format((datas[6] << 8 | datas[5]))
-
-                    # Pour Analyse.
-                    self._analyse2 = "°C " + self._pgn1
-                    self._analyse1 = "°C " + self._pgn1
-                    self._analyse4 = "°C " + self._pgn2
-                    self._analyse3 = "°C " + self._pgn2
-                    self._analyse6 = "mBar " + self._pgn3
-                    self._analyse5 = "mBar " + self._pgn3
-
-                case 128259:
-                    self._pgn1 = "Vitesse surface"
-                    if datas[2] & 0xEf != 0xEF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.01 * 1.94384449)
-
-                    self._pgn2 = "Vitesse fond"
-                    if datas[4] & 0xEf != 0xEF:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[4] << 8 | datas[3]) * 0.01 * 1.94384449)
-
-                    self._valeurChoisieTab = (datas[5])
-                    self._definition = WATER_SPEED[self._valeurChoisieTab]
-
-
-                    # Pour Analyse.
-                    self._analyse2 = "Nds " + self._pgn1
-                    self._analyse1 = "Nds " + self._pgn1
-                    self._analyse4 = "Nds " + self._pgn2
-                    self._analyse3 = "Table 3 bits"
-                    self._analyse5 = "Table 3 bits"
-
-                case 127508:
-                    self._pgn1 = "Volts Batterie"
-                    if (datas[2] <<8 | datas[1]) != 0x7FFF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.01)
-
-                    self._pgn2 = "Ampères Batterie"
-                    raw_value = ((datas[4] << 8) | datas[3])
-                    if raw_value != 0x7FFF:
-                        self._valeurChoisie2 = "{:.2f}".format((raw_value if raw_value < 0x8000 else raw_value - 0x10000) *0.1)
-
-
-                    self._pgn3 = "Température Batterie"
-                    if datas[6] & 0xEf != 0xEF:
-                        self._valeurChoisie3 = "{:.2f}".format((datas[6] << 8 | datas[5]) * 0.01 - 273.15)
-
-                    # Pour Analyse.
-                    self._analyse2 = "Volts " + self._pgn1
-                    self._analyse1 = "Volts " + self._pgn1
-                    self._analyse4 = "Amp " + self._pgn2
-                    self._analyse3 = "Amp " + self._pgn2
-                    self._analyse6 = "°C " + self._pgn3
-                    self._analyse5 = "°C " + self._pgn3
-
-                case 129038:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "AIS Posittion Class A"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]
-                        self._pgn2 = "MMSI"
-                        self.set_memoire(MEMOIRE_PGN_a7,PGN_129038,z + 1,datas[7])
-
-                    elif z == 1:
-                        self._valeurChoisie2 = "{:.6f}".format((datas[3] << 24 | datas[2] << 16 | datas[1] << 8
-                                                | self.get_memoire(MEMOIRE_PGN_a7,PGN_129038,z))
-                                                               * (10**-7))
-                        self._pgn2 = "AIS_A Longitude"
-
-                        self._valeurChoisie3 = "{:.6f}".format((datas[7] << 24 | datas[6] << 16
-                                                                | datas[5] << 8 | datas[4] ) * (10**-7))
-                        self._pgn3 = "AIS_A Latitude"
-
-                    elif z == 2:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 * 180 / math.pi)
-                        self._pgn2 = "AIS_A COG"
-
-                        self._valeurChoisie3 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.01 * 1.94384449)
-                        self._pgn3 = "AIS_A SOG"
-
-                    elif z == 3:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 * 180 / math.pi)
-                        self._pgn2 = "AIS_A Heading"
-
-                case 129794:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "AIS Données classe A"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]
-                        self._pgn2 = "MMSI"
-
-                    elif z == 1:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(4, 8)])
-                        self._pgn2 = "Indicatif"
-
-                    elif z == 2:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 4)])
-                        self._pgn2 = "Indicatif"
-
-                        self._valeurChoisie3 = "".join([chr(datas[i]) for i in range(4, 8)])
-                        self._pgn3 = "Nom du navire"
-
-                    elif z == 3 or z == 4:
-                        self._valeurChoisie3 = "".join([chr(datas[i]) for i in range(1, 8)])
-                        self._pgn3 = "Nom du navire"
-
-                    elif z == 5:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.1)
-                        self._pgn2 = "Longueur"
-
-                        self._valeurChoisie3 = "{:.2f}".format((datas[7] << 8 | datas[6]) * 0.1)
-                        self._pgn3 = "Largeur"
-
-                    elif z == 6:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 / 1.85)
-                        self._pgn2 = "Longueur"
-
-                        self._valeurChoisie3 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.0001 / 1.85)
-                        self._pgn3 = "Largeur"
-
-                    elif z == 7:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(6, 8)])
-                        self._pgn2 = "Destinaion"
-
-                    elif z == 8 or z == 9:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 8)])
-                        self._pgn2 = "Destinaion"
-
-                case 129809:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "AIS Données classe B"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]
-                        self._pgn2 = "MMSI"
-
-                        self._valeurChoisie2 = chr(datas[7])
-                        self._pgn2 = "Nom du navire"
-
-                    elif z == 1:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 8)])
-                        self._pgn2 = "Nom du navire"
-
-                    elif z == 2:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 6)])
-                        self._pgn2 = "Nom du navire"
-
-                case 129039:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "AIS Position classe B"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]
-                        self._pgn2 = "MMSI"
-
-                        self.set_memoire(MEMOIRE_PGN_a7, PGN_129039, z + 1, datas[7])
-
-                    elif z == 1:
-                        self._valeurChoisie2 = "{:.6f}".format((datas[3] << 24 | datas[2] << 16 | datas[1] << 8
-                                                | self.get_memoire(MEMOIRE_PGN_a7,PGN_129039,z)) * (10**-7))
-                        self._pgn2 = "AIS_B Longitude"
-
-                        self._valeurChoisie3 = "{:.6f}".format((datas[7] << 24 | datas[6] << 16
-                                                                | datas[5] << 8 | datas[4] ) * (10**-7))
-                        self._pgn3 = "AIS_B Latitude"
-
-                    elif z == 2:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 * 180 / math.pi)
-                        self._pgn2 = "AIS_B COG"
-
-                        self._valeurChoisie3 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.01 * 1.94384449)
-                        self._pgn3 = "AIS_B SOG"
-
-                    elif z == 3:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[3] << 8 | datas[2]) * 0.0001 * 180 / math.pi)
-                        self._pgn2 = "AIS_B Heading"
-
-                case 129810:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "AIS Données classe A Part B"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]
-                        self._pgn2 = "MMSI"
-
-                    elif z == 2 or z == 3:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 8)])
-                        self._pgn2 = "Indicatif"
-
-                case 129029:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Info. de positioon GNSS"
-
-                    if z == 4:
-                        self._valeurChoisie2 = datas[7]
-                        self._pgn2 = "Nombre de satélites"
-
-                case 129539:
-                    self._valeurChoisie1 = "N° " + str(datas[0] & 0x1F)
-                    self._pgn1 = "Précision GNSS"
-
-                case 130577:
-                    z = (datas[0] & 0x0F)
-                    self._valeurChoisie1 = "N° "+ str(z)
-                    self._pgn1 = "Données de direction"
-
-                    if z == 1:
-                        self._pgn2 = "COG"
-                        if datas[2] & 0xEF != 0xEF:
-                            self._valeurChoisie2 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.0001 * 180 / math.pi)
-
-                        self._pgn3 = "SOG"
-                        if datas[4] & 0xEF != 0xEF:
-                            self._valeurChoisie3 = "{:.2f}".format((datas[4] << 8 | datas[3]) * 0.01 * 1.94384449)
-
-
-                case 127506:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° "+ str(z)
-                    self._pgn1 = "Batteries détaillées"
-
-                    if z == 0:
-                        self._valeurChoisieTab = (datas[4])
-                        self._definition = ENERGIE_DC[self._valeurChoisieTab]
-
-                        self._valeurChoisie2 = datas[5]
-                        self._pgn2 = "Etat de charge"
-
-                        self._valeurChoisie2 = datas[6]
-                        self._pgn2 = "Etat de santé"
-
-                        self.set_memoire(MEMOIRE_PGN_a7,PGN_127506,z + 1,datas[7])
-
-                    elif z == 1:
-                        if not self.get_memoire(MEMOIRE_PGN_a7,PGN_127506,z) == 0xFF:
-                            self._pgn2 = "Temps restant"
-                            if datas[1] & 0xEF != 0xEF:
-                                self._valeurChoisie2 = (datas[1] << 8
-                                                    | self.get_memoire(MEMOIRE_PGN_a7,PGN_127506,z))
-
-                        self._pgn3 = "Ah"
-                        if datas[5] & 0xEF != 0xEF:
-                            self._valeurChoisie3 = datas[5] << 8 | datas[4]
-
-
-
-                case 126720:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Info propriétaire"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[2]
-                        self._pgn2 = "Code propriétaire"
-
-                case 127245:
-                    if datas[0] != 0xFF:
-                        self._valeurChoisie1 =  "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.0001 * 180 / math.pi)
-
-                    self._pgn1 = "Ordre de barre"
-
-                case 127251:
-                    self._valeurChoisie1 =  "{:.2f}".format((datas[3] << 8 | datas[2])  * 0.00000003125 * 180 / math.pi)
-                    self._pgn1 = "Vitesse de rotation"
-
-                case 126464:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(datas[0] & 0x1F)
-                    self._pgn1 = "Liste des PGN"
-
-                    if (z + 3) % 3 == 0:
-                        temp = (datas[5] << 16 | datas[4] << 8 | datas[3])
-                        self._pgn2 = "Num PGN"
-                        if not (temp < 59392 or temp > 130944 or datas[5] & 0xEF == 0xEF):
-                            self._valeurChoisie2 = temp
-                            self.set_memoire(MEMOIRE_PGN_a6, PGN_126464, z + 1, datas[6])
-                            self.set_memoire(MEMOIRE_PGN_a7, PGN_126464, z + 1, datas[7])
-
-
-                    elif (z + 2) % 3 == 0:
-                        temp =  (datas[1] << 16 | self.get_memoire(MEMOIRE_PGN_a7,PGN_126464,z) << 8
-                                                | self.get_memoire(MEMOIRE_PGN_a6,PGN_126464,z))
-                        self._pgn2 = "Num PGN"
-                        if not (temp < 59392 or temp > 130944 or datas[1] & 0xEF == 0xEF):
-                            self._valeurChoisie2 = temp
-
-
-                        temp = (datas[4] << 16 | datas[3] << 8 | datas[2])
-                        self._pgn3 = "Num PGN"
-                        if not (temp < 59392 or temp > 130944 or datas[4] & 0xEF == 0xEF):
-                            self._valeurChoisie3 = temp
-
-
-                        temp = (datas[7] << 16 | datas[6] << 8 | datas[5])
-                        if not (temp < 59392 or temp > 130944 or datas[7] & 0xEF == 0xEF):
-                            self._valeurChoisieTab = "Num PGN: " + str(temp)
-
-
-                    elif (z + 1) % 3 == 0:
-                        temp = (datas[3] << 16 | datas[2] << 8 | datas[1])
-                        self._pgn2 = "Num PGN"
-                        if not (temp < 59392 or temp > 130944 or datas[3] & 0xEF == 0xEF):
-                            self._valeurChoisie2 = temp
-
-
-                        temp = (datas[6] << 16 | datas[5] << 8 | datas[4])
-                        self._pgn3 = "Num PGN"
-                        if not (temp < 59392 or temp > 130944 or datas[6] & 0xEF == 0xEF):
-                            self._valeurChoisie3 = temp
-
-                case 126993:
-                    self._pgn1 = "Heart beat"
-                    self._pgn2 = "Heart beat"
-                    if datas[2] & 0xEF != 0xEF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.001)
-
-
-                case 127505:
-                    self._pgn1 = "Niveau Réservoir"
-                    if datas[2] & 0xEF != 0xEF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[2] << 8 | datas[1]) * 0.004)
-
-
-                    self._pgn2 = "Capacité du reservoir"
-                    if datas[6] & 0xEF != 0xEF:
-                        self._valeurChoisie2 = "{:.2f}".format((datas[6] << 24 | datas[5] << 16
-                                                                | datas[4] << 8 | datas[3]) * 0.1)
-
-                    self._valeurChoisieTab = datas[0] & 0x0F
-                    self._definition = RESERVOIR[self._valeurChoisieTab]
-
-
-                case 128275:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Journal"
-
-                    if z == 1:
-                        self._pgn2 = "Distance parcourrue"
-                        if datas[6] & 0xEF != 0xEF:
-                            self._valeurChoisie2 = (datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3])
-
-                case 129540:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Satélites en vues"
-
-                    if z == 0:
-                        self._valeurChoisie2 = datas[5]
-                        self._pgn2 = "Nombre de satélites"
-
-                case 129284:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Données Navigation"
-
-                    if z == 4:
-                        self._pgn2 ="Latitude Waypoint"
-                        self._pgn3 = "Longitude Waypoint"
-
-                case 126996:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 = "N° " + str(z)
-                    self._pgn1 = "Information prodruit"
-
-                    self._pgn2 = "Configuration"
-                    if datas[6] & 0xEF != 0xEF:
-                        self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(6, 8)])
-
-                    if z == 1 or z == 2 or z == 3 or z == 4:
-                        self._pgn2 = "Configuration"
-                        if datas[1] & 0xEF != 0xEF:
-                            self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 8)])
-
-                    elif z == 5:
-                        self._pgn2 = "Version"
-                        if datas[3] & 0xEF != 0xEF:
-                            self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(3, 8)])
-
-                case 126998:
-                    z = (datas[0] & 0x1F)
-                    self._valeurChoisie1 ="N° " +  str(z)
-                    self._pgn1 = "Info Configuration"
-
-                    if z == 0:
-                        self._pgn2 = "Configuration"
-                        if datas[6] & 0xEF != 0xEF:
-                            self._valeurChoisie2 = "".join([chr(datas[i]) for i in range(1, 7)])
-
-
-                case 127258:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[5] << 8 | datas[4]) * 0.0001 * 180 / math.pi)
-                    self._pgn1 = "Variation magnétique"
-
-                case 130314:
-                    self._valeurChoisie1 = "{:.2f}".format((datas[6] << 24 | datas[5] << 16 | datas[4] << 8 | datas[3]) * 0.001)
-                    self._pgn1 = "Prssion atmosphérique"
-
-                    self._valeurChoisieTab = datas[2]
-                    self._definition = PRESSION[self._valeurChoisieTab]
-
-
-                case 129283:
-                    self._pgn1 = "XTE"
-                    if datas[5] & 0xEF != 0xEF:
-                        self._valeurChoisie1 = "{:.2f}".format((datas[5] << 24 | datas[4] << 16 | datas[3] << 8 | datas[2]) * 0.00001)
-
-                    self._valeurChoisieTab = datas[1] & 0xF0 >> 4
-                    self._definition = MODE_XTE[self._valeurChoisieTab]
-
-                case 59392:
-                    self._valeurChoisie1 = datas[7] << 16 | datas[6] << 8 | datas[5]
-                    self._pgn1 = "Aquittement ISO"
-
-                case 59904:
-                    self._pgn1 = "Réclame le PGN ISO"
-                    self._valeurChoisie1 = datas[2] << 16 | datas[1] << 8 | datas[0]
-
-
-                case 60160:
-                    self._valeurChoisie1 = datas[0]
-                    self._pgn1 = "Protocole de transfert ISO"
-
-                case 61184:
-                    self._valeurChoisie1 = datas[0]
-                    self._pgn1 = "Propriétaire Numeéro"
-
-                case 60416:
-                    self._valeurChoisie1 = datas[0] & 0x0F
-                    self._pgn1 = "Protocole de transfert ISO"
-
-                case 60928:
-                    self._pgn1 = "Réponse Adresse revendiquée"
-                    self._pgn2 = "Code fabriquant"
-                    self._valeurChoisie2 = (datas[3] & 0x7) <<8 | datas[2]
-
-                case _:
-                    self._pgn1 = "<PGN inconnu sur cette version>"
-                    print(f"PGN inattendu : {pgn}, Données : {datas}")
-                    return None, None, None, None, None, None, None
-
-        except KeyError:
-            print(f"ERREUR sur le PGN: {pgn}")
-
-        finally:
-            pass
-
-        # Retoune le tuple qui ne comprend pas les analyses pour l'instant.
-        # return (self._pgn1, self._pgn2, self._pgn3, int(self._valeurChoisie1),
-        #         int(self._valeurChoisie2), int(self._valeurChoisie3), int(self._valeurChoisieTab), self._definition)
-
-        return (
-            self._pgn1,
-            self._pgn2,
-            self._pgn3,
-            self._valeurChoisie1,  # Utiliser float() au lieu de int()
-            self._valeurChoisie2,  # pour gérer les nombres décimaux
-            self._valeurChoisie3,
-            self._valeurChoisieTab if isinstance(self._valeurChoisieTab, str) else self._valeurChoisieTab,
-            self._definition
-        )
+            asyncio.create_task(self.safe_update_coordinates(latitude, longitude))
+        except Exception as e:
+            print(f"Erreur lors de la création de la tâche asynchrone : {e}")
 
     # Méthode asynchrone pour mettre à jour mes coordonnées. -----------------------------------------------------------
     async def safe_update_coordinates(self, latitude, longitude):
@@ -0,0 +1,156 @@
+import time
+from collections import namedtuple
+
+from Package.constante import *
+
+# **********************************************************************************************************************
+#       Réassemblage des PGN sur plusieurs trames (fast packet) NMEA 2000
+# **********************************************************************************************************************
+# Trame 0 : octet 0 = séquence (3 bits) + numéro de trame (5 bits), octet 1 = longueur totale, octets 2 à 7 = données.
+# Trame n : octet 0 = séquence + numéro de trame, octets 1 à 7 = données.
+# Chaque transfert est identifié par (source, PGN, séquence) : plusieurs émetteurs AIS peuvent envoyer le même PGN
+# en même temps sans se mélanger.
+
+# Message complet émis à la fin d'un transfert.
+Message = namedtuple("Message", ("pgn", "source", "sequence", "octets", "horodatage"))
+
+
+# Un transfert en cours, les octets sont préalloués et réutilisés d'un transfert à l'autre.
+class Transfert:
+    __slots__ = ("octets", "longueur", "attendues", "recues", "debut")
+
+    def __init__(self):
+        self.octets = bytearray(FAST_PACKET_TAILLE_MAX)
+        self.longueur = 0
+        self.attendues = 0      # Nombre de trames attendues, déduit de la longueur.
+        self.recues = 0         # Masque des numéros de trames reçues.
+        self.debut = 0          # Horodatage de la trame 0 en ms.
+
+
+# ================================================== Classe Reassembleur ===============================================
+class Reassembleur:
+    def __init__(self, delai_ms=FAST_PACKET_DELAI_MS, transferts_max=FAST_PACKET_TRANSFERTS_MAX):
+        self._delai = delai_ms
+        self._transferts_max = transferts_max
+
+        # Transferts en cours, dans l'ordre de leur première trame.
+        self._en_cours = {}
+        # Réserve des transferts libres, préalloués au démarrage.
+        self._libres = [Transfert() for _ in range(transferts_max)]
+
+        # Compteurs.
+        self.complets = 0
+        self.expires = 0
+        self.evinces = 0
+        self.orphelines = 0     # Trames de suite reçues sans leur trame 0.
+        self.erreurs = 0        # Longueur ou numéro de trame incohérent.
+
+    # Méthode qui ajoute une trame et retourne le message complet à la dernière trame, sinon None. ---------------------
+    def ajouter(self, source, pgn, datas, horodatage=None):
+        if horodatage is None:
+            horodatage = time.monotonic() * 1000
+
+        compteur = datas[0]
+        z = compteur & 0x1F
+        cle = (source, pgn, compteur >> 5)
+
+        if z == 0:
+            return self._debut(cle, datas, horodatage)
+
+        transfert = self._en_cours.get(cle)
+        if transfert is None:
+            self.orphelines += 1
+            return None
+
+        # Transfert trop ancien : il est abandonné.
+        if not 0 <= horodatage - transfert.debut <= self._delai:
+            self.expires += 1
+            self._liberer(cle)
+            return None
+
+        # Numéro de trame au-delà de la longueur annoncée.
+        if z >= transfert.attendues:
+            self.erreurs += 1
+            self._liberer(cle)
+            return None
+
+        position = 6 + 7 * (z - 1)
+        suite = bytes(datas[1:8])
+        transfert.octets[position:position + len(suite)] = suite
+        transfert.recues |= 1 << z
+
+        if transfert.recues == (1 << transfert.attendues) - 1:
+            return self._fin(cle, transfert)
+        return None
+
+    # Méthode qui démarre un transfert sur la trame 0. -----------------------------------------------------------------
+    def _debut(self, cle, datas, horodatage):
+        longueur = datas[1] if len(datas) > 1 else 0
+        if not 0 < longueur <= FAST_PACKET_TAILLE_MAX:
+            self.erreurs += 1
+            return None
+
+        self._purger(horodatage)
+
+        # Une nouvelle trame 0 sur la même clé remplace le transfert précédent.
+        transfert = self._en_cours.pop(cle, None)
+        if transfert is None:
+            transfert = self._reserver()
+
+        transfert.longueur = longueur
+        transfert.attendues = 1 + (longueur - 6 + 6) // 7 if longueur > 6 else 1
+        transfert.recues = 1
+        transfert.debut = horodatage
+        debut = bytes(datas[2:8])
+        transfert.octets[0:len(debut)] = debut
+        self._en_cours[cle] = transfert
+
+        if transfert.attendues == 1:
+            return self._fin(cle, transfert)
+        return None
+
+    # Méthode qui termine un transfert et retourne le message complet. -------------------------------------------------
+    def _fin(self, cle, transfert):
+        message = Message(cle[1], cle[0], cle[2], bytes(transfert.octets[:transfert.longueur]), transfert.debut)
+        self._liberer(cle)
+        self.complets += 1
+        return message
+
+    # Méthode qui prend un transfert libre, ou évince le plus ancien si la réserve est vide. ---------------------------
+    def _reserver(self):
+        if self._libres:
+            return self._libres.pop()
+        plus_ancien = next(iter(self._en_cours))
+        self.evinces += 1
+        return self._en_cours.pop(plus_ancien)
+
+    # Méthode qui rend un transfert à la réserve. ----------------------------------------------------------------------
+    def _liberer(self, cle):
+        transfert = self._en_cours.pop(cle, None)
+        if transfert is not None:
+            self._libres.append(transfert)
+
+    # Méthode qui abandonne les transferts expirés, les plus anciens sont en tête. -------------------------------------
+    def _purger(self, horodatage):
+        while self._en_cours:
+            cle = next(iter(self._en_cours))
+            ecart = horodatage - self._en_cours[cle].debut
+            if 0 <= ecart <= self._delai:
+                break
+            self.expires += 1
+            self._liberer(cle)
+
+    # Méthode pour vider tous les transferts en cours. -----------------------------------------------------------------
+    def vider(self):
+        for cle in list(self._en_cours):
+            self._liberer(cle)
+
+    # Méthode qui retourne les compteurs. ------------------------------------------------------------------------------
+    def statistiques(self):
+        return {"en_cours": len(self._en_cours),
+                "complets": self.complets,
+                "expires": self.expires,
+                "evinces": self.evinces,
+                "orphelines": self.orphelines,
+                "erreurs": self.erreurs}
+# ============================================ FIN DE LA CLASSE Reassembleur ===========================================
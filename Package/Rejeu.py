@@ -0,0 +1,120 @@
+import time
+
+from Package.CAN_dll import CanError
+from Package.InterfacesCAN import InterfaceCAN, dormir
+from Package.ExportNMEA import lots_trames
+from Package.IndexLignes import IndexLignes
+from Package.JournalBinaire import est_binaire, lire_binaire
+
+# **********************************************************************************************************************
+#       Rejeu d'un fichier enregistré (texte ou journal binaire) à la place de l'adaptateur CANUSB
+# **********************************************************************************************************************
+# "Rejeu" est une interface CAN comme les autres (open, read_into, close, status) : les trames passent par
+# Acquisition -> TempsReel.traiter_lot -> table, carte, NMEA 2000, exactement comme des trames reçues.
+# Vitesse : 1.0 = temps d'origine (d'après les TimeStamp), N = N fois plus vite, 0 = le plus vite possible.
+
+HANDLE_REJEU = 256      # Même valeur que le handle d'un adaptateur ouvert.
+
+
+# Levée quand toutes les trames du fichier ont été rejouées.
+class FinRejeu(CanError):
+    pass
+
+
+# ===================================================== Classe Rejeu ===================================================
+class Rejeu(InterfaceCAN):
+    nom = "Rejeu"
+
+    def __init__(self, chemin, vitesse=1.0, debut=0, nombre=None):
+        super().__init__()
+        self.chemin = chemin
+        self.vitesse = vitesse
+        self._debut = debut
+        self._nombre = nombre
+        self._trames = None
+        self._suivante = None       # Trame lue dans le fichier, pas encore arrivée à son heure.
+
+        # Référence de temps : premier TimeStamp du fichier et heure du PC correspondante.
+        self._origine_fichier = None
+        self._origine_pc = None
+
+        # Compteurs.
+        self.emises = 0
+        self._depart = None
+        self._fin = None
+
+    # Méthode qui "ouvre" le fichier, les paramètres du bus sont ignorés. ----------------------------------------------
+    def open(self, bitrate=None, acceptance_code=None, acceptance_mask=None, flags=None):
+        if est_binaire(self.chemin):
+            total = len(lire_binaire(self.chemin))
+        else:
+            total = IndexLignes(self.chemin).nombre_lignes
+        nombre = total - self._debut if self._nombre is None else self._nombre
+        self._trames = self._generer(nombre)
+        self._suivante = None
+        self._handle = HANDLE_REJEU
+        self.debit_max = None
+        self.emises = 0
+        self._depart = None
+        self._fin = None
+        print(f"Rejeu de {self.chemin} : {nombre} trames, vitesse {self.vitesse or 'maximum'}.")
+        return self._handle
+
+    # Générateur des trames du fichier : (TimeStamp, ID, len, octets). -------------------------------------------------
+    def _generer(self, nombre):
+        for _, trames in lots_trames(self.chemin, self._debut, nombre):
+            yield from zip(trames.horodatage.tolist(), trames.ids.tolist(), trames.longueurs.tolist(),
+                           trames.octets.tolist())
+
+    # Méthode qui met dans "msg" la trame suivante si son heure arrive dans "delai" secondes, sinon retourne False. ---
+    # À la fin du fichier, retourne d'abord False (pour ne pas perdre un lot commencé), puis lève FinRejeu.
+    def lire_dans(self, msg, delai, arret=None):
+        if self._suivante is None:
+            try:
+                self._suivante = next(self._trames)
+            except StopIteration:
+                if self._fin is None:
+                    self._fin = time.perf_counter()
+                    return False
+                raise FinRejeu(f"Fin du rejeu : {self.statistiques()}")
+        horodatage, id_msg, longueur, octets = self._suivante
+
+        maintenant = time.perf_counter()
+        if self._depart is None:
+            self._depart = maintenant
+            self._origine_fichier = horodatage
+            self._origine_pc = maintenant
+
+        # On attend l'heure de la trame, ramenée à la vitesse du rejeu.
+        if self.vitesse:
+            attente = self._origine_pc + (horodatage - self._origine_fichier) / 1000 / self.vitesse - maintenant
+            if attente > delai:
+                dormir(delai, arret)
+                return False
+            if attente > 0:
+                dormir(attente, arret)
+
+        self._suivante = None
+        msg.ID = id_msg
+        msg.TimeStamp = horodatage
+        msg.flags = 0
+        msg.len = longueur
+        msg.data[:] = octets
+        self.emises += 1
+        return True
+
+    # Méthode de fermeture du rejeu. -----------------------------------------------------------------------------------
+    def close(self):
+        self._trames = None
+        self._suivante = None
+        self._handle = None
+
+    # Méthode qui retourne les compteurs et le débit obtenu. -----------------------------------------------------------
+    def statistiques(self):
+        if self._depart is None:
+            return {"emises": 0, "duree": 0.0, "trames_par_seconde": 0.0}
+        duree = (self._fin or time.perf_counter()) - self._depart
+        return {"emises": self.emises,
+                "duree": duree,
+                "trames_par_seconde": self.emises / duree if duree > 0 else 0.0}
+# ================================================ FIN DE LA CLASSE Rejeu ==============================================
@@ -1,53 +1,50 @@
 
-from Package.CAN_dll import CanMsg
+from Package.Enregistreur import Enregistreur
 
 # Cette classe sert uniquement à traiter les résultats.
 # C'est prévu de lui faire traiter le NMEA 2000 en temps réel.
 # ======================================================================================================================
 class TempsReel:
     def __init__(self):
-        pass
-
-    # Méthode d'enregistremnt du bus CAN en temps réel. ----------------------------------------------------------------
-    @staticmethod
-    async def TempsReel(msg:CanMsg, file_path, coche_file, coche_buffer,coche_nmea, main_window):
-        # print("On entre dans l'enregistement")
-        # Initialise datas comme un str vide.
-        datas = ""
-        # On a défini les huits octets dans "datas".
-        for i in range(msg.len):
-            # On commence par un espace, car ça fini par le dernier octet.
-            datas += " " + format(msg.data[i], "02X")
-
-        if msg:
-            # On met le réulltat dans un fichier si la case à cocher est validée.
-            if coche_file:
-                with open(file_path, "w") as file:
-                    # msg.TimeStamp, msg.ID, msg.len, msg.data existent dans la structure msg
-                    datas = ' '.join([f"{byte:02X}" for byte in msg.data])  # Format avec des bytes en hexadécimal
-                    file.write(f"{msg.TimeStamp} {msg.ID:08X} {msg.len}{datas}\n")
-
-            # On met le réulltat dans la table si la case à cocher est validée
-            if coche_buffer:
-                # Préparation d'un tuple pour la table
-                tuple_modifie = (
-                    format(msg.ID,'08X'),  # Identifiant CAN sur huits caractères en hexadécimale.
-                    str(msg.len),  # Longueur des données sur un caractère.
-                    ' '.join(f"{byte:02X}" for byte in msg.data)  # Données formatées (hexadécimal)
-                )
-                # On met le tuple modifié dans la table en buffer tournant.
-                main_window.add_to_buffer(tuple_modifie)
-
-            # *************** EMPLACEMENT PREVU POUR METTRE LE TEMPS REEL *********************
-            #                             NMEA 2000
-            #                       Affichage des jauges
-            #                       Affichage des MMSI
-            #                       Affichage de la carte
-            # *********************************************************************************
-
-            # On appelle la routine "octets" si la case à cocher est validée pour NMEA 2000 en temps réel.
-            if coche_nmea:
-                # Fournit le résultat de ma position, pour l'afficher sur la carte en temps réel.
-                pgn =  main_window.nmea_2000.pgn( msg.ID)
-                main_window.nmea_2000.octets(pgn, msg.data) # Ce qui est fait dans "octets".
-            # =================================================================================
+        self._enregistreur = None
+
+    @property
+    def enregistreur(self):
+        return self._enregistreur
+
+    # Méthode qui arrête l'enregistrement en cours et écrit ce qui reste sur le disque. --------------------------------
+    def arreter_enregistrement(self):
+        if self._enregistreur is not None:
+            self._enregistreur.arreter()
+            self._enregistreur = None
+
+    # Méthode qui traite un lot de l'acquisition (voir Acquisition.LotTrames), sans copier les trames une par une. -----
+    # Les CanMsg du lot sont les cases de l'anneau : rien ne doit les garder après le traitement.
+    def traiter_lot(self, lot, file_path, coche_file, coche_buffer, coche_nmea, main_window):
+        # Le lot entier est copié d'un coup dans la file de l'enregistreur.
+        if coche_file:
+            if self._enregistreur is None or self._enregistreur.chemin != file_path:
+                self.arreter_enregistrement()
+                self._enregistreur = Enregistreur(file_path)
+                self._enregistreur.demarrer()
+            self._enregistreur.ajouter_lot(lot.tableau)
+        elif self._enregistreur is not None:
+            self.arreter_enregistrement()
+
+        # Le lot est copié tel quel dans le buffer de la table, le texte n'est fait que pour les lignes affichées.
+        if coche_buffer:
+            main_window.add_lot_to_buffer(lot.tableau)
+
+        # *************** EMPLACEMENT PREVU POUR METTRE LE TEMPS REEL *********************
+        #                             NMEA 2000
+        #                       Affichage des jauges
+        #                       Affichage des MMSI
+        #                       Affichage de la carte
+        # *********************************************************************************
+
+        # Les octets sont passés sans copie : le décodeur les lit aussitôt, le réassemblage garde sa propre copie.
+        # Seuls les PGN qui ont un abonné (la carte pour la position...) sont décodés.
+        if coche_nmea:
+            distribuer = main_window.nmea_2000.distribuer
+            for msg in lot:
+                distribuer(msg.ID, msg.data, msg.TimeStamp)
@@ -22,23 +22,58 @@ CANSTATUS_ERROR_PASSIVE = 0x20
 CANSTATUS_ARBITRATION_LOST = 0x40
 CANSTATUS_BUS_ERROR = 0x80
 
-# Liste des PGN nécésitant la mise en mémoire
-PGN_129038 = 0
-PGN_129039 = 1
-PGN_129049 = 2
-PGN_127506 = 3
-PGN_126464 = 4
-# Liste à compléter...
-
-# Liste des huits octets
-MEMOIRE_PGN_a0 = 0
-MEMOIRE_PGN_a1 = 1
-MEMOIRE_PGN_a2 = 2
-MEMOIRE_PGN_a3 = 3
-MEMOIRE_PGN_a4 = 4
-MEMOIRE_PGN_a5 = 5
-MEMOIRE_PGN_a6 = 6
-MEMOIRE_PGN_a7 = 7
+# Réassemblage des PGN sur plusieurs trames (fast packet).
+FAST_PACKET_TAILLE_MAX = 223        # 6 octets dans la trame 0, puis 7 octets dans les 31 suivantes.
+FAST_PACKET_DELAI_MS = 750          # Délai maximum entre la première et la dernière trame d'un transfert.
+FAST_PACKET_TRANSFERTS_MAX = 256    # Nombre maximum de transferts en cours (toutes sources confondues).
+
+# Cache des identifiants CAN 29 bits.
+CACHE_ID_TAILLE = 4096              # Nombre maximum d'identifiants gardés en cache.
+CACHE_DECODAGE_TAILLE = 8192        # Nombre maximum de trames (identifiant, octets) gardées décodées en texte.
+
+# Enregistrement du bus CAN en arrière-plan.
+ENREGISTREUR_FILE_MAX = 100000      # Nombre maximum de trames en attente d'écriture.
+ENREGISTREUR_TAMPON = 1 << 20       # Taille du tampon d'écriture du fichier (1 Mo).
+ENREGISTREUR_FSYNC_S = 2.0          # Période d'écriture forcée sur le disque.
+ENREGISTREUR_TAILLE_MAX = 1 << 30   # Rotation du fichier à 1 Go (0 = jamais).
+ENREGISTREUR_DUREE_MAX_S = 0        # Rotation du fichier sur la durée (0 = jamais).
+
+# Index des lignes des fichiers texte.
+INDEX_PAS = 1000                    # Une position en octets est gardée toutes les "INDEX_PAS" lignes.
+INDEX_BLOC = 1 << 24                # Taille des blocs lus pour construire l'index (16 Mo).
+
+# Export NMEA 2000 en CSV.
+EXPORT_TAILLE_LOT = 50000           # Nombre de lignes lues, décodées et écrites à la fois.
+EXPORT_TAILLE_MORCEAU = 500000      # Nombre de lignes par morceau de l'export parallèle.
+EXPORT_PRELUDE = 20000              # Lignes relues avant un morceau pour réassembler les PGN sur plusieurs trames.
+EXPORT_NPZ_PARTIE = 100000          # Lignes gardées par PGN avant d'écrire ses colonnes dans le .npz.
+
+# Base SQLite des trames décodées.
+SQLITE_TAILLE_LOT = 5000            # Nombre de lignes gardées en attente avant une transaction.
+SQLITE_DELAI_S = 2.0                # Délai maximum avant d'écrire les lignes en attente (temps réel).
+
+# Interfaces du bus CAN.
+CAN_MASQUE_ID = 0x1FFFFFFF          # Identifiant étendu sur 29 bits.
+BITS_PAR_TRAME = 135                # Bits d'une trame étendue de 8 octets, avec les bits de bourrage.
+LECTURE_LOT = 256                   # Nombre maximum de trames lues à la fois par l'acquisition ("read_into").
+LECTURE_DELAI_S = 0.05              # Attente maximum de la première trame d'un "read_into".
+SOCKETCAN_CANAL = "can0"            # Interface SocketCAN par défaut ("vcan0" pour les essais).
+SIMULATION_TRAMES_S = 200           # Trames par seconde du générateur simulé (0 = le plus vite possible).
+FILTRE_ECHANTILLON = 100000         # Trames du fichier ouvert utilisées pour estimer le rejet d'un filtre.
+ATTENTE_ACTIVE_S = 0.002            # Relectures sans pause pendant 2 ms après la dernière trame reçue.
+ATTENTE_MIN_S = 0.0001              # Première pause quand le bus est calme (100 µs)...
+ATTENTE_MAX_S = 0.005               # ...doublée à chaque lecture sans trame, jusqu'à 5 ms.
+
+# Acquisition du bus CAN par un thread de lecture.
+ACQUISITION_FILE_MAX = 65536        # Taille de la file tournante entre le thread de lecture et asyncio.
+ACQUISITION_LOT_MAX = 4096          # Nombre maximum de trames reprises par asyncio à la fois.
+ACQUISITION_DELAI_S = 2.0           # Sans trame pendant ce délai, la lecture s'arrête.
+
+# Table des trames de la fenêtre principale.
+TABLE_RAFRAICHISSEMENT_HZ = 20      # Mises à jour de la table par seconde, quel que soit le débit des trames.
+TABLE_CACHE_LIGNES = 1024           # Lignes de la table gardées en texte (les plus récemment affichées).
+TABLE_FICHIER_BLOC = 1000           # Lignes lues à la fois quand la table parcourt un fichier.
+TABLE_FICHIER_BLOCS = 16            # Blocs gardés en mémoire (les plus récemment affichés).
 
 # ------------------------- Dictionnaire des significations des valeurs reçues dans les tables --------------------------------------
 # Table des températures.
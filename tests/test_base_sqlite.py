@@ -0,0 +1,30 @@
+import sqlite3
+import threading
+
+from Package.BaseSQLite import exporter_sqlite
+
+
+def compter(chemin_base):
+    connexion = sqlite3.connect(chemin_base)
+    try:
+        return connexion.execute("SELECT COUNT(*) FROM pgn_130306").fetchone()[0]
+    finally:
+        connexion.close()
+
+
+# Un nouvel export remplace la base, et un export annulé laisse l'ancienne telle quelle.
+def test_export_remplace_la_base(tmp_path):
+    journal = tmp_path / "journal.txt"
+    journal.write_text("".join(f"{i} 09FD0223 8 00 {i & 0xFF:02X} 01 20 4E 02 FF FF\n" for i in range(2000)))
+    base = str(tmp_path / "vent.db")
+
+    exporter_sqlite(str(journal), base, 0, 2000, taille_lot=500)
+    exporter_sqlite(str(journal), base, 0, 2000, taille_lot=500)
+    assert compter(base) == 2000
+
+    annulation = threading.Event()
+    bilan = exporter_sqlite(str(journal), base, 0, 1000, progression=lambda lignes: annulation.set(),
+                            annulation=annulation, taille_lot=500)
+    assert bilan.annule
+    assert compter(base) == 2000
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["journal.txt", "journal.txt.idx", "vent.db"]
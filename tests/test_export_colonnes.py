@@ -0,0 +1,47 @@
+import zipfile
+
+import numpy as np
+
+from Package.ExportColonnes import ColonnesPGN, lire_npz
+
+
+# Fonction qui exporte des lignes décodées une par une, déposées par parties de "taille_partie" lignes.
+def exporter_lignes(chemin_npz, dossier, lignes, taille_partie):
+    table = ColonnesPGN()
+    for ligne in lignes:
+        table.ajouter_ligne(ligne)
+        if table.nombre >= taille_partie:
+            table.deposer(str(dossier), 129038)
+    with zipfile.ZipFile(chemin_npz, "w", zipfile.ZIP_DEFLATED) as archive:
+        table.deposer(str(dossier), 129038)
+        table.ecrire(archive, 129038)
+    return lire_npz(chemin_npz)
+
+
+# Des colonnes qui n'apparaissent qu'après la première partie sont lues comme si l'export n'avait qu'une partie.
+def test_colonne_apparue_apres_la_premiere_partie(tmp_path):
+    lignes = [{"horodatage": i, "source": 3, "Cap": i * 0.5 if i % 4 else None} for i in range(10)]
+    for i in range(10, 20):
+        lignes.append({"horodatage": i, "source": 3, "Cap": float(i), "MMSI": 227000000 + i,
+                       "Nom": f"BATEAU {i}" if i % 2 else None, "Rang": i})
+    lignes[15]["Cap"] = None
+    # Une colonne de nombres dans la première partie, de textes dans la seconde.
+    for i in range(20):
+        lignes[i]["Etat"] = (i * 0.25 if i % 3 else None) if i < 10 else "EN ROUTE"
+
+    colonnes = exporter_lignes(tmp_path / "parties.npz", tmp_path, lignes, taille_partie=10)
+    entier = exporter_lignes(tmp_path / "entier.npz", tmp_path, lignes, taille_partie=100)
+
+    assert list(colonnes) == list(entier)
+    for nom, tableau in colonnes.items():
+        assert tableau.dtype == entier[nom].dtype, nom
+        np.testing.assert_array_equal(tableau, entier[nom])
+
+    assert colonnes["129038/horodatage"].dtype == np.int64
+    assert colonnes["129038/MMSI"].dtype == np.float64
+    assert np.isnan(colonnes["129038/MMSI"][:10]).all()
+    assert colonnes["129038/MMSI"][10:].tolist() == [227000000.0 + i for i in range(10, 20)]
+    assert colonnes["129038/Nom"].tolist() == [""] * 11 + [f"BATEAU {i}" if i % 2 else "" for i in range(11, 20)]
+    assert colonnes["129038/Etat"].tolist() == [str(i * 0.25) if i % 3 else "" for i in range(10)] + ["EN ROUTE"] * 10
+    with np.load(tmp_path / "parties.npz") as npz:
+        assert npz["129038/Cap"][15] != npz["129038/Cap"][15]     # NaN
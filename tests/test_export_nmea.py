@@ -0,0 +1,24 @@
+from Package.ExportNMEA import exporter_csv, exporter_csv_parallele
+
+
+# Fonction qui écrit un journal texte de "nombre" trames de vent, avec une trame "fast packet" vide à la ligne "vide".
+def ecrire_journal(chemin, nombre, vide):
+    with open(chemin, "w") as f:
+        for i in range(nombre):
+            if i == vide:
+                f.write(f"{i} 19F80503 0\n")     # PGN 129029 sans octets
+            else:
+                f.write(f"{i} 09FD0223 8 00 {i & 0xFF:02X} 01 20 4E 02 FF FF\n")
+
+
+def test_trame_fast_packet_vide_meme_resultat_en_parallele(tmp_path):
+    journal = tmp_path / "journal.txt"
+    ecrire_journal(journal, 3000, 1500)
+
+    sequentiel = exporter_csv(str(journal), str(tmp_path / "sequentiel.csv"), 0, 3000)
+    parallele = exporter_csv_parallele(str(journal), str(tmp_path / "parallele.csv"), 0, 3000,
+                                       processus=2, taille_morceau=1000)
+
+    assert sequentiel == parallele
+    assert sequentiel.erreurs == 1
+    assert (tmp_path / "sequentiel.csv").read_bytes() == (tmp_path / "parallele.csv").read_bytes()
@@ -0,0 +1,23 @@
+import os
+
+from Package.IndexLignes import IndexLignes
+
+
+# Un fichier qui grandit, avec une dernière ligne parfois incomplète, donne le même index qu'une reconstruction.
+def test_index_complete_comme_reconstruit(tmp_path):
+    chemin = tmp_path / "journal.txt"
+    chemin.write_bytes(b"")
+    index = IndexLignes(str(chemin), pas=3)
+    attendu = []
+    for i in range(20):
+        with open(chemin, "ab") as f:
+            f.write(b"".join(b"%d %d\n" % (i, j) for j in range(i % 7)))
+            if i % 3 == 0:
+                f.write(b"fin")
+        attendu = chemin.read_bytes().decode().splitlines()
+
+        assert list(index.iterer(0, len(attendu) + 1)) == attendu
+        reconstruit = IndexLignes(str(chemin), pas=3)
+        reconstruit._construire(os.stat(chemin))
+        assert index.nombre_lignes == reconstruit.nombre_lignes == len(attendu)
+        assert index._positions.tolist() == reconstruit._positions.tolist()